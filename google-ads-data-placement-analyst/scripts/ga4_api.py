@@ -93,20 +93,24 @@ class GA4DataClient:
         """Execute a GA4 Data API request and return results."""
         response = self.client.run_report(request)
 
+        # Header names are the same for every row; resolve them once
+        dim_names = [header.name for header in response.dimension_headers]
+        metric_names = [header.name for header in response.metric_headers]
+
         results = []
         for row in response.rows:
             row_dict = {}
 
             # Dimensions
-            for i, dimension in enumerate(response.dimension_headers):
-                row_dict[dimension.name] = row.dimension_values[i].value
+            for name, dimension_value in zip(dim_names, row.dimension_values):
+                row_dict[name] = dimension_value.value
 
             # Metrics
-            for i, metric in enumerate(response.metric_headers):
+            for name, metric_value in zip(metric_names, row.metric_values):
                 try:
-                    row_dict[metric.name] = float(row.metric_values[i].value)
+                    row_dict[name] = float(metric_value.value)
                 except ValueError:
-                    row_dict[metric.name] = row.metric_values[i].value
+                    row_dict[name] = metric_value.value
 
             results.append(row_dict)
 
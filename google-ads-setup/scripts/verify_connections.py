@@ -9,140 +9,289 @@ Usage:
     python3 verify_connections.py --supabase-url https://project.supabase.co \
         --supabase-key eyJ... --gemini-key AIzaSy... \
         [--google-ads-dev-token xxx] [--google-ads-refresh-token xxx] \
-        [--ga4-property-id 123456789]
+        [--ga4-property-id 123456789] [--full] [--force]
 """
 
 import sys
 import os
 import json
+import time
+import hashlib
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 
-# Color codes for terminal output
-GREEN = '\033[92m'
-RED = '\033[91m'
-YELLOW = '\033[93m'
-BLUE = '\033[94m'
-RESET = '\033[0m'
+# Color codes for terminal output (empty when stdout is piped or logged)
+if sys.stdout.isatty():
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    RESET = '\033[0m'
+else:
+    GREEN = RED = YELLOW = BLUE = RESET = ''
+
+# Log line prefixes, built once
+_SUCCESS = f"{GREEN}✅{RESET} "
+_FAIL = f"{RED}❌{RESET} "
+_WARN = f"{YELLOW}⚠️{RESET}  "
+_INFO = f"{BLUE}ℹ️{RESET}  "
+
+# Independent checks run side by side; total time is the slowest check, not the sum
+VERIFY_MAX_WORKERS = 8
+
+# Transient failures (connection errors, 429, 5xx) are retried with
+# exponential backoff; 401/403 are returned at once so auth problems fail fast
+_RETRY_OPTIONS = dict(
+    total=3,
+    backoff_factor=1.0,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "POST", "DELETE"]),
+    respect_retry_after_header=True,
+    raise_on_status=False,  # hand the last response back so its status is reported
+)
+try:
+    _RETRY = Retry(**_RETRY_OPTIONS, backoff_jitter=0.5)
+except TypeError:  # urllib3 < 2 has no backoff_jitter
+    _RETRY = Retry(**_RETRY_OPTIONS)
+
+# Network checks that passed within VERIFY_CACHE_TTL seconds are not re-run
+# (--force bypasses this). Keys hash the arguments so no secret is written out.
+VERIFY_CACHE_PATH = os.path.expanduser("~/.cache/meta-ad-manager/verify.json")
+VERIFY_CACHE_TTL = 300
+_CACHED_TESTS = {
+    "test_supabase_connection": "Supabase connection",
+    "test_supabase_auth": "Supabase authentication",
+    "test_supabase_write": "Supabase write permissions",
+    "test_gemini_api": "Gemini API",
+    "test_google_ads_connectivity": "Google Ads API connectivity",
+    "test_ga4_connectivity": "GA4 API connectivity",
+}
+
+# One connection pool for every check; repeat calls to a host skip the TLS handshake
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=_RETRY))
 
 
 class ConnectionVerifier:
     """Verifies connections to Google Ads, GA4, and Supabase."""
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.results = []
         self.failures = []
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per-thread log buffer while a test runs
+        self._headers: Dict[str, Dict[str, str]] = {}  # Supabase headers per service key
+        self._probes = {}  # (url, key) -> (response, error) of the shared read probe
+        self._probe_lock = threading.Lock()
+        self._use_cache = use_cache
+        self._cache = self._load_cache()  # cache key -> [timestamp, passed]
+
+    @staticmethod
+    def _load_cache() -> Dict[str, list]:
+        """Read earlier results from VERIFY_CACHE_PATH; a missing or corrupt file is an empty cache."""
+        try:
+            with open(VERIFY_CACHE_PATH) as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        """Write results back to VERIFY_CACHE_PATH, dropping entries past the TTL."""
+        cutoff = time.time() - VERIFY_CACHE_TTL
+        with self._lock:
+            cache = {k: v for k, v in self._cache.items() if v[0] >= cutoff}
+        try:
+            os.makedirs(os.path.dirname(VERIFY_CACHE_PATH), exist_ok=True)
+            with open(VERIFY_CACHE_PATH, "w") as f:
+                json.dump(cache, f)
+        except OSError:
+            pass  # caching is best effort
+
+    @staticmethod
+    def _cache_key(test, args) -> str:
+        """Test name plus a digest of its arguments (stable across runs, unlike hash())."""
+        digest = hashlib.sha256(json.dumps(args).encode()).hexdigest()[:16]
+        return f"{test.__name__}:{digest}"
+
+    def _supabase_headers(self, service_key: str) -> Dict[str, str]:
+        """Return the Supabase request headers for service_key, built once per key."""
+        headers = self._headers.get(service_key)
+        if headers is None:
+            headers = self._headers[service_key] = {
+                "Authorization": f"Bearer {service_key}",
+                "Content-Type": "application/json",
+            }
+        return headers
+
+    def _emit(self, msg: str, is_result: bool = True, failure: Optional[Tuple[str, str]] = None):
+        """Record one log line, or buffer it if the current thread is inside run_test."""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            buffer.append((msg, is_result, failure))
+        else:
+            self._record([(msg, is_result, failure)])
+
+    def _record(self, entries):
+        """Append log lines to the results and print them as one uninterrupted block."""
+        with self._lock:
+            for msg, is_result, failure in entries:
+                if is_result:
+                    self.results.append(msg)
+                if failure:
+                    self.failures.append(failure)
+                print(msg)
+
+    def run_test(self, test, *args) -> bool:
+        """
+        Run one test_* method, holding back its output until it finishes.
+
+        Safe to call from several threads at once: each test's lines are
+        printed together, in completion order. A network check that passed
+        within VERIFY_CACHE_TTL is reported as cached instead of re-run.
+        """
+        label = _CACHED_TESTS.get(test.__name__)
+        key = self._cache_key(test, args) if label else None
+        if key and self._use_cache:
+            entry = self._cache.get(key)
+            if entry and entry[1] and time.time() - entry[0] < VERIFY_CACHE_TTL:
+                self.log_success(label, "(cached)")
+                return True
+
+        self._local.buffer = []
+        passed = False
+        try:
+            passed = test(*args)
+            return passed
+        finally:
+            if key:
+                with self._lock:
+                    self._cache[key] = [time.time(), bool(passed)]
+            entries, self._local.buffer = self._local.buffer, None
+            self._record(entries)
 
     def log_success(self, test_name: str, detail: str = ""):
         """Log successful test."""
-        msg = f"{GREEN}✅{RESET} {test_name}"
+        msg = _SUCCESS + test_name
         if detail:
-            msg += f" — {detail}"
-        self.results.append(msg)
-        print(msg)
+            msg += " — " + detail
+        self._emit(msg)
 
     def log_failure(self, test_name: str, detail: str = ""):
         """Log failed test."""
-        msg = f"{RED}❌{RESET} {test_name}"
+        msg = _FAIL + test_name
         if detail:
-            msg += f" — {detail}"
-        self.results.append(msg)
-        self.failures.append((test_name, detail))
-        print(msg)
+            msg += " — " + detail
+        self._emit(msg, failure=(test_name, detail))
 
     def log_warning(self, test_name: str, detail: str = ""):
         """Log warning."""
-        msg = f"{YELLOW}⚠️{RESET}  {test_name}"
+        msg = _WARN + test_name
         if detail:
-            msg += f" — {detail}"
-        self.results.append(msg)
-        print(msg)
+            msg += " — " + detail
+        self._emit(msg)
 
     def log_info(self, message: str):
         """Log informational message."""
-        msg = f"{BLUE}ℹ️{RESET}  {message}"
-        print(msg)
+        msg = _INFO + message
+        self._emit(msg, is_result=False)
 
     # =========================================================================
     # Supabase Tests
     # =========================================================================
 
+    def _supabase_read_probe(self, supabase_url: str, service_key: str):
+        """
+        GET setup_log?limit=1 once per (url, key) and share the outcome.
+
+        Both the connection and the authentication test read this single
+        response. Returns (response, None) or (None, exception).
+        """
+        with self._probe_lock:
+            key = (supabase_url, service_key)
+            if key not in self._probes:
+                try:
+                    response = _SESSION.get(
+                        f"{supabase_url}/rest/v1/setup_log?limit=1",
+                        headers=self._supabase_headers(service_key),
+                        timeout=10
+                    )
+                    self._probes[key] = (response, None)
+                except Exception as e:
+                    self._probes[key] = (None, e)
+            return self._probes[key]
+
     def test_supabase_connection(self, supabase_url: str, service_key: str) -> bool:
-        """Test Supabase connection with a simple version query."""
+        """Test Supabase connection; any HTTP answer to the auth probe proves the API is reachable."""
         self.log_info("Testing Supabase connection...")
 
-        try:
-            headers = {
-                "Authorization": f"Bearer {service_key}",
-                "Content-Type": "application/json",
-            }
-
-            # Test with a simple REST API call
-            response = requests.get(
-                f"{supabase_url}/rest/v1/",
-                headers=headers,
-                timeout=10
-            )
-
-            if response.status_code in [200, 401, 403]:  # 401/403 is auth failing, which we handle next
-                self.log_success("Supabase connection", f"API reachable (HTTP {response.status_code})")
-                return True
-            else:
-                self.log_failure("Supabase connection", f"Unexpected status {response.status_code}")
-                return False
-
-        except requests.exceptions.Timeout:
+        response, error = self._supabase_read_probe(supabase_url, service_key)
+        if isinstance(error, requests.exceptions.Timeout):
             self.log_failure("Supabase connection", "Request timeout (10s)")
             return False
-        except Exception as e:
-            self.log_failure("Supabase connection", str(e))
+        if error is not None:
+            self.log_failure("Supabase connection", str(error))
             return False
 
+        # 401/403 is auth failing, which test_supabase_auth reports
+        if response.status_code < 500:
+            self.log_success("Supabase connection", f"API reachable (HTTP {response.status_code})")
+            return True
+        self.log_failure("Supabase connection", f"Unexpected status {response.status_code}")
+        return False
+
     def test_supabase_auth(self, supabase_url: str, service_key: str) -> bool:
         """Test Supabase authentication."""
         self.log_info("Testing Supabase authentication...")
 
-        try:
-            headers = {
-                "Authorization": f"Bearer {service_key}",
-                "Content-Type": "application/json",
-            }
+        # Try to query a basic table (should have setup_log)
+        response, error = self._supabase_read_probe(supabase_url, service_key)
+        if error is not None:
+            self.log_failure("Supabase authentication", str(error))
+            return False
 
-            # Try to query a basic table (should have setup_log)
-            response = requests.get(
-                f"{supabase_url}/rest/v1/setup_log?limit=1",
+        if response.status_code == 200:
+            self.log_success("Supabase authentication", "Service role key valid (read access confirmed)")
+            return True
+        elif response.status_code == 401:
+            self.log_failure("Supabase authentication", "Invalid or expired service role key")
+            return False
+        elif response.status_code == 403:
+            self.log_failure("Supabase authentication", "Service role key doesn't have read access")
+            return False
+        else:
+            self.log_warning("Supabase authentication", f"Unexpected status {response.status_code}")
+            return False
+
+    def _delete_test_row(self, supabase_url: str, headers: Dict[str, str]):
+        """Remove the write probe's row, on the same pooled connection; warn if it stays behind."""
+        try:
+            response = _SESSION.delete(
+                f"{supabase_url}/rest/v1/setup_log?phase=eq.99&phase_name=eq.__SETUP_TEST__",
                 headers=headers,
                 timeout=10
             )
-
-            if response.status_code == 200:
-                self.log_success("Supabase authentication", "Service role key valid (read access confirmed)")
-                return True
-            elif response.status_code == 401:
-                self.log_failure("Supabase authentication", "Invalid or expired service role key")
-                return False
-            elif response.status_code == 403:
-                self.log_failure("Supabase authentication", "Service role key doesn't have read access")
-                return False
-            else:
-                self.log_warning("Supabase authentication", f"Unexpected status {response.status_code}")
-                return response.status_code == 200
-
+            if response.status_code in [200, 204]:
+                return
+            detail = f"HTTP {response.status_code}"
         except Exception as e:
-            self.log_failure("Supabase authentication", str(e))
-            return False
+            detail = str(e)
+        self.log_warning("Supabase write probe cleanup",
+                         f"Test row (phase 99, __SETUP_TEST__) left in setup_log: {detail}")
 
     def test_supabase_write(self, supabase_url: str, service_key: str) -> bool:
         """Test Supabase write permissions."""
         self.log_info("Testing Supabase write permissions...")
 
         try:
-            headers = {
-                "Authorization": f"Bearer {service_key}",
-                "Content-Type": "application/json",
-            }
+            # return=minimal: the inserted row is not echoed back
+            headers = {**self._supabase_headers(service_key), "Prefer": "return=minimal"}
 
             # Try to insert a test row into setup_log
             test_data = {
@@ -151,7 +300,7 @@ class ConnectionVerifier:
                 "status": "TESTING"
             }
 
-            response = requests.post(
+            response = _SESSION.post(
                 f"{supabase_url}/rest/v1/setup_log",
                 headers=headers,
                 json=test_data,
@@ -159,13 +308,8 @@ class ConnectionVerifier:
             )
 
             if response.status_code in [200, 201]:
-                # Clean up the test row
-                requests.delete(
-                    f"{supabase_url}/rest/v1/setup_log?phase=eq.99",
-                    headers=headers,
-                    timeout=10
-                )
                 self.log_success("Supabase write permissions", "Write access confirmed")
+                self._delete_test_row(supabase_url, headers)
                 return True
             elif response.status_code == 403:
                 self.log_failure("Supabase write permissions", "Service role key doesn't have write access")
@@ -219,7 +363,7 @@ class ConnectionVerifier:
         self.log_info("Testing Google Ads API connectivity...")
 
         try:
-            response = requests.get(
+            response = _SESSION.get(
                 "https://googleads.googleapis.com/",
                 timeout=10
             )
@@ -271,7 +415,7 @@ class ConnectionVerifier:
         self.log_info("Testing GA4 API connectivity...")
 
         try:
-            response = requests.get(
+            response = _SESSION.get(
                 "https://analyticsreporting.googleapis.com/",
                 timeout=10
             )
@@ -314,7 +458,8 @@ class ConnectionVerifier:
     # =========================================================================
 
     def print_summary(self):
-        """Print test summary."""
+        """Print test summary and save results for the next run."""
+        self._save_cache()
         print("\n" + "="*70)
 
         if self.failures:
@@ -365,33 +510,58 @@ def main():
         required=False,
         help="GA4 property ID (numeric)"
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Probe Google Ads and GA4 endpoints even without their credentials"
+    )
+    parser.add_argument(
+        "--force", "--no-cache",
+        dest="force",
+        action="store_true",
+        help="Re-run every check, ignoring results cached in the last few minutes"
+    )
 
     args = parser.parse_args()
 
-    verifier = ConnectionVerifier()
+    verifier = ConnectionVerifier(use_cache=not args.force)
 
     print(f"\n{BLUE}{'='*70}{RESET}")
     print(f"{BLUE}Google Ads AI System — Connection Verification{RESET}")
     print(f"{BLUE}{'='*70}{RESET}\n")
 
-    # Run tests based on provided arguments
-    if args.supabase_url and args.supabase_key:
-        verifier.test_supabase_connection(args.supabase_url, args.supabase_key)
-        verifier.test_supabase_auth(args.supabase_url, args.supabase_key)
-        verifier.test_supabase_write(args.supabase_url, args.supabase_key)
-
-    if args.gemini_key:
-        verifier.test_gemini_api(args.gemini_key)
-
-    # Google Ads tests
-    verifier.test_google_ads_connectivity()
-    if args.google_ads_dev_token and args.google_ads_refresh_token:
-        verifier.test_google_ads_credentials(args.google_ads_dev_token, args.google_ads_refresh_token)
-
-    # GA4 tests
-    verifier.test_ga4_connectivity()
-    if args.ga4_property_id:
-        verifier.test_ga4_property_id(args.ga4_property_id)
+    # Run tests based on provided arguments, concurrently; each test's
+    # output is printed as a block when it finishes
+    with ThreadPoolExecutor(max_workers=VERIFY_MAX_WORKERS) as executor:
+        def submit(test, *test_args):
+            return executor.submit(verifier.run_test, test, *test_args)
+
+        supabase_auth = None
+        if args.supabase_url and args.supabase_key:
+            submit(verifier.test_supabase_connection, args.supabase_url, args.supabase_key)
+            supabase_auth = submit(verifier.test_supabase_auth, args.supabase_url, args.supabase_key)
+
+        if args.gemini_key:
+            submit(verifier.test_gemini_api, args.gemini_key)
+
+        # Google Ads tests; endpoint probes only for services being configured
+        if args.full or args.google_ads_dev_token or args.google_ads_refresh_token:
+            submit(verifier.test_google_ads_connectivity)
+        if args.google_ads_dev_token and args.google_ads_refresh_token:
+            submit(verifier.test_google_ads_credentials, args.google_ads_dev_token, args.google_ads_refresh_token)
+
+        # GA4 tests
+        if args.full or args.ga4_property_id:
+            submit(verifier.test_ga4_connectivity)
+        if args.ga4_property_id:
+            submit(verifier.test_ga4_property_id, args.ga4_property_id)
+
+        # The write probe only runs once the key is known to be valid
+        if supabase_auth is not None:
+            if supabase_auth.result():
+                submit(verifier.test_supabase_write, args.supabase_url, args.supabase_key)
+            else:
+                verifier.log_warning("Supabase write permissions", "Skipped (authentication failed)")
 
     # Print summary
     success = verifier.print_summary()
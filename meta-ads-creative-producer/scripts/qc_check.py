@@ -15,12 +15,107 @@ import argparse
 import json
 import logging
 import os
+import time
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
 import base64
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional: OpenCV lets check_text_density skip Gemini for clearly-compliant images
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+# Only advertise brotli if urllib3 can decode it (needs the brotli package).
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip"
+
+# Payloads carry a base64-encoded image, so use orjson when available and
+# the stdlib encoder otherwise.
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    _json_loads = json.loads
+
+# Stands in for the image data while the request payload is serialized
+_IMAGE_PLACEHOLDER = "__IMAGE_DATA__"
+_IMAGE_PLACEHOLDER_JSON = b'"__IMAGE_DATA__"'
+
+
+@lru_cache(maxsize=1)
+def _shared_session() -> requests.Session:
+    """
+    Return the process-wide Gemini session.
+
+    Every QCPipeline instance shares one connection pool, so a batch pays
+    for the TLS handshake once. The adapter backs off on rate limits and
+    transient server errors (honouring Retry-After) instead of failing the
+    QC record on the first 429/503.
+    """
+    retry = Retry(
+        total=5,
+        backoff_factor=0.8,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(max_retries=retry, pool_maxsize=16))
+    return session
+
+
+@lru_cache(maxsize=16)
+def _request_frame(mime_type: str, prompt: str) -> Tuple[bytes, bytes]:
+    """
+    Serialize a Gemini Vision request around its image slot.
+
+    The (ASCII) base64 image bytes are joined in between the two halves
+    rather than decoded to str and copied again by the JSON encoder. The
+    prompts are class constants, so each frame is only encoded once.
+
+    Args:
+        mime_type: Image MIME type
+        prompt: Analysis prompt
+
+    Returns:
+        (head, tail) bytes to place before and after the base64 data
+    """
+    request_payload = {
+        "contents": [
+            {
+                "parts": [
+                    {
+                        "inlineData": {
+                            "mimeType": mime_type,
+                            "data": _IMAGE_PLACEHOLDER
+                        }
+                    },
+                    {"text": prompt}
+                ]
+            }
+        ],
+        "generationConfig": {
+            "temperature": 0.2,  # Lower temperature for consistent analysis
+            "topK": 40,
+            "topP": 0.95,
+        },
+    }
+    head, tail = _json_dumps(request_payload).split(_IMAGE_PLACEHOLDER_JSON, 1)
+    return head + b'"', b'"' + tail
 
 
 # Configure logging
@@ -75,6 +170,65 @@ class QCPipeline:
         },
     }
 
+    # Prompts are fixed per mode, so build them once at class definition
+    _TEXT_DENSITY_PROMPT = """Analyze this image and estimate the percentage of the image area covered by text overlays, badges, and logos with text.
+
+Text includes:
+- Badge overlays (price, discount, social proof)
+- CTA text on image
+- Logo text (brand name in logo)
+- Any watermarks with text
+
+Text does NOT include:
+- Product packaging text (part of physical product)
+- Incidental text in background (store signs, etc.)
+
+Provide your analysis in this format:
+TEXT_COVERAGE_PERCENTAGE: [0-100]%
+TEXT_ELEMENTS: [list each text element found]
+ASSESSMENT: [brief assessment of coverage level]
+PASSES_20PCT_LIMIT: [YES or NO]"""
+
+    _SCORING_PROMPT_A = """Analyze this ad creative on the following criteria. Score each 1-10 (unless otherwise noted).
+
+SCORING CRITERIA:
+
+1. Professional Quality (1-10): Does it look like a real, polished ad? Evaluate composition, lighting, clarity, polish level.
+
+2. Text Readability (1-10): Can you read all badge/overlay text clearly? Check for overlapping, cut-off, garbled, or too-small text.
+
+3. Text Density (1-10, BUT PASS/FAIL): Estimate percentage of image covered by text. ≤20% = PASS, >20% = FAIL (automatic fail regardless of other scores).
+
+4. Color Consistency (1-10): Does the palette make sense as a unified design? Colors harmonize, no jarring contrasts.
+
+5. Artifacts/Distortions (1-10): Any AI-generation weirdness? Extra fingers, melted text, warped edges, uncanny faces?
+
+6. Brand Integrity (1-10): Are product imagery and logo untouched? Is compliance text preserved?
+
+Provide scores in this format:
+CRITERION_1: [score] [brief reasoning]
+CRITERION_2: [score] [brief reasoning]
+CRITERION_3: [PASS/FAIL] [percentage]% coverage [brief reasoning]
+CRITERION_4: [score] [brief reasoning]
+CRITERION_5: [score] [brief reasoning]
+CRITERION_6: [score] [brief reasoning]
+
+OVERALL_FEEDBACK: [brief overall assessment]"""
+
+    # Mode B appends brand identity and competitor-trace criteria
+    _SCORING_PROMPT_B = _SCORING_PROMPT_A + """\n\n7. Brand Identity (1-10): Does it clearly read as YOUR brand (not generic)? Evaluate logo visibility, color scheme, overall brand presence.
+
+8. Zero Competitor Trace (PASS/FAIL): Is there ANY remnant of competitor branding? Logo, product, exact color scheme, or branded elements?
+
+CRITERION_7: [score] [brief reasoning]
+CRITERION_8: [PASS/FAIL] [brief reasoning]"""
+
+    # Gemini rejects inline image requests larger than 20 MB
+    MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+    # Local text-coverage estimates below this fraction skip the Gemini call
+    LOCAL_TEXT_DENSITY_SKIP = 0.15
+
     def __init__(self, gemini_api_key: str):
         """
         Initialize QC pipeline.
@@ -84,6 +238,7 @@ class QCPipeline:
         """
         self.gemini_api_key = gemini_api_key
         self.gemini_endpoint = "https://generativelanguage.googleapis.com/v1beta/models"
+        self._session = _shared_session()
 
     def _call_gemini_vision(self, image_path: str, prompt: str) -> str:
         """
@@ -97,40 +252,28 @@ class QCPipeline:
             Model response text
         """
         try:
-            with open(image_path, "rb") as img_file:
-                image_data = base64.standard_b64encode(img_file.read()).decode("utf-8")
+            fd = os.open(image_path, os.O_RDONLY)
+            try:
+                image_b64 = base64.standard_b64encode(os.read(fd, os.fstat(fd).st_size))
+            finally:
+                os.close(fd)
 
             # Determine MIME type
             mime_type = "image/png" if image_path.lower().endswith(".png") else "image/jpeg"
 
-            request_payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {
-                                "inlineData": {
-                                    "mimeType": mime_type,
-                                    "data": image_data
-                                }
-                            },
-                            {"text": prompt}
-                        ]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": 0.2,  # Lower temperature for consistent analysis
-                    "topK": 40,
-                    "topP": 0.95,
-                },
+            headers = {
+                "Content-Type": "application/json",
+                "Accept-Encoding": _ACCEPT_ENCODING,
             }
-
-            headers = {"Content-Type": "application/json"}
             url = f"{self.gemini_endpoint}/gemini-pro-vision:generateContent?key={self.gemini_api_key}"
 
-            response = requests.post(url, json=request_payload, headers=headers, timeout=60)
+            head, tail = _request_frame(mime_type, prompt)
+            body = b"".join((head, image_b64, tail))
+
+            response = self._session.post(url, data=body, headers=headers, timeout=60)
             response.raise_for_status()
 
-            response_data = response.json()
+            response_data = _json_loads(response.content)
 
             if "candidates" in response_data and len(response_data["candidates"]) > 0:
                 candidate = response_data["candidates"][0]
@@ -145,41 +288,67 @@ class QCPipeline:
             logger.error(f"Gemini Vision call failed: {e}")
             return ""
 
-    def check_text_density(self, image_path: str) -> Dict:
+    def _local_text_density(self, image_path: str) -> Optional[float]:
         """
-        Check text coverage (density) in image.
+        Estimate text coverage locally from OpenCV MSER regions.
+
+        MSER also fires on non-text edges, so this overestimates coverage;
+        a low value is a safe signal that the image is under the 20% limit.
 
         Args:
             image_path: Path to the image
 
         Returns:
-            Dict with percentage and pass/fail status
+            Covered fraction of the image (0-1), or None if unavailable
         """
-        prompt = """Analyze this image and estimate the percentage of the image area covered by text overlays, badges, and logos with text.
+        if cv2 is None:
+            return None
 
-Text includes:
-- Badge overlays (price, discount, social proof)
-- CTA text on image
-- Logo text (brand name in logo)
-- Any watermarks with text
+        try:
+            img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                return None
+
+            regions, _ = cv2.MSER_create().detectRegions(img)
+            mask = np.zeros_like(img, dtype=np.uint8)
+            if len(regions):
+                points = np.concatenate(regions)
+                mask[points[:, 1], points[:, 0]] = 1
+                # Close the gaps between glyphs so text lines count as areas
+                mask = cv2.dilate(mask, np.ones((5, 5), np.uint8))
+
+            return float(mask.mean())
+        except cv2.error as e:
+            logger.warning(f"Local text density estimate failed: {e}")
+            return None
 
-Text does NOT include:
-- Product packaging text (part of physical product)
-- Incidental text in background (store signs, etc.)
+    def check_text_density(self, image_path: str) -> Dict:
+        """
+        Check text coverage (density) in image.
 
-Provide your analysis in this format:
-TEXT_COVERAGE_PERCENTAGE: [0-100]%
-TEXT_ELEMENTS: [list each text element found]
-ASSESSMENT: [brief assessment of coverage level]
-PASSES_20PCT_LIMIT: [YES or NO]"""
+        Args:
+            image_path: Path to the image
 
-        analysis = self._call_gemini_vision(image_path, prompt)
+        Returns:
+            Dict with percentage and pass/fail status
+        """
+        local_fraction = self._local_text_density(image_path)
+        if local_fraction is not None and local_fraction < self.LOCAL_TEXT_DENSITY_SKIP:
+            return {
+                "raw_analysis": "",
+                "passes_20pct": True,
+                "estimated_percentage": round(local_fraction * 100, 1),
+                "source": "local",
+            }
+
+        analysis = self._call_gemini_vision(image_path, self._TEXT_DENSITY_PROMPT)
 
         # Parse response
         result = {
             "raw_analysis": analysis,
             "passes_20pct": False,
             "estimated_percentage": None,
+            "source": "gemini",
         }
 
         try:
@@ -207,50 +376,25 @@ PASSES_20PCT_LIMIT: [YES or NO]"""
         Returns:
             Dict with QC scores and verdict
         """
-        if not os.path.exists(image_path):
+        try:
+            image_size = os.stat(image_path).st_size
+        except FileNotFoundError:
             return {
                 "passed": False,
                 "error": f"Image file not found: {image_path}",
                 "scores": {}
             }
 
-        logger.info(f"Running QC pipeline on: {image_path}")
-
-        # Prompt for scoring
-        scoring_prompt = f"""Analyze this ad creative on the following criteria. Score each 1-10 (unless otherwise noted).
-
-SCORING CRITERIA:
-
-1. Professional Quality (1-10): Does it look like a real, polished ad? Evaluate composition, lighting, clarity, polish level.
-
-2. Text Readability (1-10): Can you read all badge/overlay text clearly? Check for overlapping, cut-off, garbled, or too-small text.
-
-3. Text Density (1-10, BUT PASS/FAIL): Estimate percentage of image covered by text. ≤20% = PASS, >20% = FAIL (automatic fail regardless of other scores).
-
-4. Color Consistency (1-10): Does the palette make sense as a unified design? Colors harmonize, no jarring contrasts.
-
-5. Artifacts/Distortions (1-10): Any AI-generation weirdness? Extra fingers, melted text, warped edges, uncanny faces?
-
-6. Brand Integrity (1-10): Are product imagery and logo untouched? Is compliance text preserved?
-
-Provide scores in this format:
-CRITERION_1: [score] [brief reasoning]
-CRITERION_2: [score] [brief reasoning]
-CRITERION_3: [PASS/FAIL] [percentage]% coverage [brief reasoning]
-CRITERION_4: [score] [brief reasoning]
-CRITERION_5: [score] [brief reasoning]
-CRITERION_6: [score] [brief reasoning]
-
-OVERALL_FEEDBACK: [brief overall assessment]"""
-
-        # Add Mode B criteria if applicable
-        if mode == "B":
-            scoring_prompt += """\n\n7. Brand Identity (1-10): Does it clearly read as YOUR brand (not generic)? Evaluate logo visibility, color scheme, overall brand presence.
+        if image_size == 0 or image_size > self.MAX_IMAGE_BYTES:
+            return {
+                "passed": False,
+                "error": f"Image file size out of range ({image_size} bytes): {image_path}",
+                "scores": {}
+            }
 
-8. Zero Competitor Trace (PASS/FAIL): Is there ANY remnant of competitor branding? Logo, product, exact color scheme, or branded elements?
+        logger.info(f"Running QC pipeline on: {image_path}")
 
-CRITERION_7: [score] [brief reasoning]
-CRITERION_8: [PASS/FAIL] [brief reasoning]"""
+        scoring_prompt = self._SCORING_PROMPT_B if mode == "B" else self._SCORING_PROMPT_A
 
         analysis = self._call_gemini_vision(image_path, scoring_prompt)
 
@@ -304,7 +448,7 @@ CRITERION_8: [PASS/FAIL] [brief reasoning]"""
             "average_score": verdict["average"],
             "details": verdict,
             "raw_analysis": analysis,
-            "qc_timestamp": datetime.utcnow().isoformat()
+            "qc_timestamp_ns": time.time_ns()
         }
 
         logger.info(f"QC Complete: {'PASS' if result['passed'] else 'FAIL'} (avg score: {result['average_score']})")
@@ -464,6 +608,12 @@ def main():
     # Run QC
     result = qc.run_qc(args.image, brand_config, mode=args.mode)
 
+    # run_qc stamps results as integer ns; format only for the report
+    if "qc_timestamp_ns" in result:
+        result["qc_timestamp"] = datetime.fromtimestamp(
+            result["qc_timestamp_ns"] / 1e9, tz=timezone.utc
+        ).isoformat()
+
     # Save report if requested
     if args.output:
         with open(args.output, "w") as f:
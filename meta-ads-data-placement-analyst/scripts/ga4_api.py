@@ -4,16 +4,79 @@ Uses service account authentication for server-side API access.
 """
 
 import json
+import threading
+from array import array
+import time
+from datetime import datetime, timezone
 import requests
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional
 from google.auth.transport.requests import Request
 from google.oauth2.service_account import Credentials
 
+# urllib3 only decodes brotli responses when the brotli package is present,
+# so advertise "br" only when we can actually decompress it.
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = 'gzip, br'
+except ImportError:
+    _ACCEPT_ENCODING = 'gzip'
+
+# Large runReport responses parse much faster with orjson; it is optional.
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+
+@lru_cache(maxsize=1)
+def _shared_session() -> requests.Session:
+    """Return the process-wide GA4 session shared by every GA4APIClient."""
+    # runReport is a read, so retrying POSTs on quota/5xx errors is safe
+    retry = Retry(
+        total=5,
+        backoff_factor=0.8,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({'POST'}),
+        respect_retry_after_header=True
+    )
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=retry, pool_maxsize=16))
+    return session
+
+
+def _to_number(value: Any) -> Any:
+    """Convert a GA4 metric value to float, leaving non-numeric values as-is."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _to_numbers(values: List[Any]) -> List[Any]:
+    """Convert a row of GA4 metric values, falling back per value if any is non-numeric."""
+    # Metric rows are almost always all-numeric: one C-level map(float) pass
+    # avoids a Python-level call and try/except per cell.
+    try:
+        return list(map(float, values))
+    except (TypeError, ValueError):
+        return [_to_number(value) for value in values]
+
+
 class GA4APIClient:
     """Client for GA4 Data API v1 operations."""
 
     API_URL = "https://analyticsdata.googleapis.com/v1beta"
     SCOPES = ['https://www.googleapis.com/auth/analytics.readonly']
+    TOKEN_EXPIRY_MARGIN = 60  # seconds before expiry at which we refresh
+    REPORT_PAGE_SIZE = 10000
 
     def __init__(self, service_account_path: str):
         """
@@ -26,6 +89,9 @@ class GA4APIClient:
             FileNotFoundError: If service account file not found
             ValueError: If credentials are invalid
         """
+        self._token_lock = threading.Lock()
+        self._token_exp = 0.0  # time.monotonic() deadline of the current token
+
         try:
             self.credentials = Credentials.from_service_account_file(
                 service_account_path,
@@ -38,12 +104,22 @@ class GA4APIClient:
         except Exception as e:
             raise ValueError(f"Failed to load service account credentials: {e}")
 
+        self._session = _shared_session()
+
     def _refresh_token(self):
         """Refresh the access token."""
         request = Request()
         self.credentials.refresh(request)
         self.access_token = self.credentials.token
 
+        # credentials.expiry is naive UTC; track it on the monotonic clock
+        if self.credentials.expiry is not None:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            remaining = (self.credentials.expiry - now).total_seconds()
+            self._token_exp = time.monotonic() + remaining
+        else:
+            self._token_exp = 0.0
+
     def get_access_token(self, service_account_path: str) -> str:
         """
         Get access token from service account.
@@ -59,8 +135,16 @@ class GA4APIClient:
 
     def _ensure_token_valid(self):
         """Ensure access token is fresh."""
-        if not self.credentials.valid:
-            self._refresh_token()
+        # Lock-free fast path while the cached token is well within its lifetime
+        if time.monotonic() < self._token_exp - self.TOKEN_EXPIRY_MARGIN:
+            return
+
+        with self._token_lock:
+            if time.monotonic() < self._token_exp - self.TOKEN_EXPIRY_MARGIN:
+                return
+            # Without a known expiry, fall back to google-auth's own check
+            if self._token_exp or not self.credentials.valid:
+                self._refresh_token()
 
     def run_report(
         self,
@@ -69,7 +153,8 @@ class GA4APIClient:
         metrics: List[str],
         date_range: Dict[str, str],
         dimension_filter: Optional[Dict[str, Any]] = None,
-        limit: int = 100000
+        limit: int = 100000,
+        offset: int = 0
     ) -> Dict[str, Any]:
         """
         Run a GA4 Data API report.
@@ -81,6 +166,7 @@ class GA4APIClient:
             date_range (Dict): {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
             dimension_filter (Dict): Filter criteria (optional)
             limit (int): Max rows per request (default 100000)
+            offset (int): Row offset to start from (default 0)
 
         Returns:
             Dict: Raw API response
@@ -94,7 +180,8 @@ class GA4APIClient:
 
         headers = {
             'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'Accept-Encoding': _ACCEPT_ENCODING
         }
 
         request_body = {
@@ -108,18 +195,132 @@ class GA4APIClient:
             "metrics": [{"name": metric} for metric in metrics],
             "limit": str(limit)
         }
+        if offset:
+            request_body["offset"] = str(offset)
 
         # Add filter if provided
         if dimension_filter:
             request_body["dimensionFilter"] = dimension_filter
 
         try:
-            response = requests.post(url, json=request_body, headers=headers, timeout=60)
+            response = self._session.post(url, data=_json_dumps(request_body), headers=headers, timeout=60)
             response.raise_for_status()
-            return response.json()
+            return _json_loads(response.content)
         except requests.RequestException as e:
             raise requests.RequestException(f"GA4 API report request failed: {e}")
 
+    def _paged_reports(
+        self,
+        property_id: str,
+        dimensions: List[str],
+        metrics: List[str],
+        date_range: Dict[str, str],
+        dimension_filter: Optional[Dict[str, Any]] = None,
+        page_size: int = REPORT_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield a report page by page, fetching the next page in the background
+        while the caller processes the current one.
+
+        Args:
+            property_id (str): GA4 property ID (numeric)
+            dimensions (List[str]): Dimension names
+            metrics (List[str]): Metric names
+            date_range (Dict): {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
+            dimension_filter (Dict): Filter criteria (optional)
+            page_size (int): Rows per request
+
+        Yields:
+            Dict: Raw API response for each page
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            offset = 0
+            future = executor.submit(
+                self.run_report, property_id, dimensions, metrics,
+                date_range, dimension_filter, page_size, offset
+            )
+            while future is not None:
+                response = future.result()
+                offset += page_size
+
+                # rowCount is the total across all pages
+                future = None
+                if offset < int(response.get('rowCount', 0)):
+                    future = executor.submit(
+                        self.run_report, property_id, dimensions, metrics,
+                        date_range, dimension_filter, page_size, offset
+                    )
+
+                yield response
+
+    def run_paged_report(
+        self,
+        property_id: str,
+        dimensions: List[str],
+        metrics: List[str],
+        date_range: Dict[str, str],
+        dimension_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a GA4 report in REPORT_PAGE_SIZE pages and return parsed records.
+
+        Parsing of each page overlaps with the request for the next one.
+
+        Args:
+            property_id (str): GA4 property ID (numeric)
+            dimensions (List[str]): Dimension names
+            metrics (List[str]): Metric names
+            date_range (Dict): {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
+            dimension_filter (Dict): Filter criteria (optional)
+
+        Returns:
+            List[Dict]: Parsed records across all pages
+        """
+        records = []
+        for response in self._paged_reports(
+            property_id, dimensions, metrics, date_range, dimension_filter,
+            page_size=self.REPORT_PAGE_SIZE
+        ):
+            records.extend(self.parse_report(response))
+        return records
+
+    def run_paged_report_columns(
+        self,
+        property_id: str,
+        dimensions: List[str],
+        metrics: List[str],
+        date_range: Dict[str, str],
+        dimension_filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a GA4 report in REPORT_PAGE_SIZE pages and return merged columns.
+
+        Args:
+            property_id (str): GA4 property ID (numeric)
+            dimensions (List[str]): Dimension names
+            metrics (List[str]): Metric names
+            date_range (Dict): {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
+            dimension_filter (Dict): Filter criteria (optional)
+
+        Returns:
+            Dict: Field name -> column across all pages, as parse_report_columns
+        """
+        columns: Dict[str, Any] = {}
+        for response in self._paged_reports(
+            property_id, dimensions, metrics, date_range, dimension_filter,
+            page_size=self.REPORT_PAGE_SIZE
+        ):
+            for name, values in self.parse_report_columns(response).items():
+                merged = columns.get(name)
+                if merged is None:
+                    columns[name] = values
+                elif type(merged) is type(values):
+                    merged.extend(values)
+                else:
+                    # A numeric column turned mixed on a later page
+                    columns[name] = list(merged) + list(values)
+        return columns
+
     def parse_report(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Parse GA4 Data API response into flat records.
@@ -133,40 +334,90 @@ class GA4APIClient:
         Raises:
             KeyError: If response structure is unexpected
         """
-        records = []
-
         if 'rows' not in response:
-            return records
-
-        dimension_headers = response.get('dimensionHeaders', [])
-        metric_headers = response.get('metricHeaders', [])
-
-        for row in response['rows']:
-            record = {}
-
-            # Parse dimensions
-            if 'dimensions' in row:
-                for i, value in enumerate(row['dimensions']):
-                    if i < len(dimension_headers):
-                        dim_name = dimension_headers[i].get('name')
-                        record[dim_name] = value
-
-            # Parse metrics
-            if 'metricValues' in row:
-                for i, value in enumerate(row['metricValues']):
-                    if i < len(metric_headers):
-                        metric_name = metric_headers[i].get('name')
-                        # Try to convert to numeric
-                        try:
-                            record[metric_name] = float(value.get('value', 0))
-                        except (ValueError, AttributeError):
-                            record[metric_name] = value.get('value', 0)
+            return []
+
+        dim_names = [h.get('name') for h in response.get('dimensionHeaders', [])]
+        metric_names = [h.get('name') for h in response.get('metricHeaders', [])]
+        rows = response['rows']
 
+        # Build rectangular dimension/metric tables up front, then zip them
+        # against the header names instead of inserting cell by cell.
+        dim_table = [row.get('dimensions', []) for row in rows]
+        metric_table = [
+            _to_numbers([mv.get('value', 0) for mv in row.get('metricValues', [])])
+            for row in rows
+        ]
+
+        records = []
+        for dims, metrics in zip(dim_table, metric_table):
+            record = dict(zip(dim_names, dims))
+            record.update(zip(metric_names, metrics))
             if record:
                 records.append(record)
 
         return records
 
+    def parse_report_columns(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parse GA4 Data API response column-wise, one sequence per field.
+
+        Numeric metric columns are array('d') (8 bytes per value and
+        buffer-compatible, so numpy.frombuffer / pandas can use them without
+        copying). Dimension columns, and metric columns holding any
+        non-numeric value, are plain lists. Cells missing from a row are None.
+
+        Args:
+            response (Dict): Raw API response from run_report
+
+        Returns:
+            Dict: Field name -> column of values, all of equal length
+        """
+        rows = response.get('rows', [])
+        dim_names = [h.get('name') for h in response.get('dimensionHeaders', [])]
+        metric_names = [h.get('name') for h in response.get('metricHeaders', [])]
+
+        columns = {}
+
+        dim_table = [row.get('dimensions', []) for row in rows]
+        for i, name in enumerate(dim_names):
+            columns[name] = [dims[i] if i < len(dims) else None for dims in dim_table]
+
+        metric_table = [row.get('metricValues', []) for row in rows]
+        for i, name in enumerate(metric_names):
+            values = [mvs[i].get('value', 0) if i < len(mvs) else None for mvs in metric_table]
+            try:
+                columns[name] = array('d', map(float, values))
+            except (TypeError, ValueError):
+                columns[name] = [_to_number(value) for value in values]
+
+        return columns
+
+    def _landing_page_query(self, source_filter: str) -> Dict[str, Any]:
+        """Dimensions, metrics and session-source filter of the landing page report."""
+        return {
+            'dimensions': [
+                'landingPage',
+                'deviceCategory'
+            ],
+            'metrics': [
+                'sessions',
+                'conversions',
+                'bounceRate',
+                'avgSessionDuration',
+                'totalRevenue'
+            ],
+            'dimension_filter': {
+                "filter": {
+                    "fieldName": "sessionSource",
+                    "stringFilter": {
+                        "matchType": "EXACT",
+                        "value": source_filter
+                    }
+                }
+            }
+        }
+
     def get_landing_page_metrics(
         self,
         property_id: str,
@@ -184,35 +435,34 @@ class GA4APIClient:
         Returns:
             List[Dict]: Landing page metrics
         """
-        # Build filter for session source
-        dimension_filter = {
-            "filter": {
-                "fieldName": "sessionSource",
-                "stringFilter": {
-                    "matchType": "EXACT",
-                    "value": source_filter
-                }
-            }
-        }
-
-        response = self.run_report(
+        return self.run_paged_report(
             property_id=property_id,
-            dimensions=[
-                'landingPage',
-                'deviceCategory'
-            ],
-            metrics=[
-                'sessions',
-                'conversions',
-                'bounceRate',
-                'avgSessionDuration',
-                'totalRevenue'
-            ],
             date_range=date_range,
-            dimension_filter=dimension_filter
+            **self._landing_page_query(source_filter)
         )
 
-        return self.parse_report(response)
+    def get_landing_page_columns(
+        self,
+        property_id: str,
+        date_range: Dict[str, str],
+        source_filter: str = "facebook"
+    ) -> Dict[str, Any]:
+        """
+        Get the landing page report column-wise (see parse_report_columns).
+
+        Args:
+            property_id (str): GA4 property ID
+            date_range (Dict): Date range for query
+            source_filter (str): Session source to filter on (default 'facebook')
+
+        Returns:
+            Dict: Field name -> column of values
+        """
+        return self.run_paged_report_columns(
+            property_id=property_id,
+            date_range=date_range,
+            **self._landing_page_query(source_filter)
+        )
 
     def get_campaign_metrics(
         self,
@@ -241,7 +491,7 @@ class GA4APIClient:
             }
         }
 
-        response = self.run_report(
+        return self.run_paged_report(
             property_id=property_id,
             dimensions=[
                 'sessionCampaignId'
@@ -256,8 +506,6 @@ class GA4APIClient:
             dimension_filter=dimension_filter
         )
 
-        return self.parse_report(response)
-
     def get_ad_metrics(
         self,
         property_id: str,
@@ -285,7 +533,7 @@ class GA4APIClient:
             }
         }
 
-        response = self.run_report(
+        return self.run_paged_report(
             property_id=property_id,
             dimensions=[
                 'sessionManualAdContent'  # This is utm_content
@@ -299,8 +547,6 @@ class GA4APIClient:
             dimension_filter=dimension_filter
         )
 
-        return self.parse_report(response)
-
     def get_device_metrics(
         self,
         property_id: str,
@@ -328,7 +574,7 @@ class GA4APIClient:
             }
         }
 
-        response = self.run_report(
+        return self.run_paged_report(
             property_id=property_id,
             dimensions=[
                 'deviceCategory'
@@ -342,8 +588,6 @@ class GA4APIClient:
             dimension_filter=dimension_filter
         )
 
-        return self.parse_report(response)
-
     def get_geographic_metrics(
         self,
         property_id: str,
@@ -371,7 +615,7 @@ class GA4APIClient:
             }
         }
 
-        response = self.run_report(
+        return self.run_paged_report(
             property_id=property_id,
             dimensions=[
                 'country',
@@ -386,8 +630,6 @@ class GA4APIClient:
             dimension_filter=dimension_filter
         )
 
-        return self.parse_report(response)
-
 
 if __name__ == "__main__":
     import argparse
@@ -4,17 +4,260 @@ Handles rate limiting, pagination, and error handling.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
 import json
-from typing import Optional, List, Dict, Any
+import os
+import hashlib
+import functools
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple, Union
 from datetime import datetime, timedelta
+from urllib.parse import urlencode, quote
+
+# orjson is optional; it decodes Graph API pages several times faster
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+# Meta payloads compress well; only ask for br when urllib3 can decode it
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = 'gzip, br'
+except ImportError:
+    _ACCEPT_ENCODING = 'gzip'
+
+# Optional: ijson parses pages straight off the socket instead of buffering the body
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+TOKEN_CACHE_PATH = os.path.expanduser('~/.cache/meta_ads/tokens.json')
+TOKEN_TTL = 55 * 24 * 3600  # long-lived tokens last 60 days; leave headroom
+TOKEN_REFRESH_MARGIN = 24 * 3600  # refresh tokens this close to expiry
+
+# account/creds key -> (token, expires_at); None expiry means "until the process exits"
+_token_cache: Dict[str, tuple] = {}
+
+
+class TokenCache:
+    """File-backed access-token cache keyed by ad account ID."""
+
+    def __init__(self, path: str = TOKEN_CACHE_PATH):
+        """
+        Initialize token cache.
+
+        Args:
+            path (str): JSON file holding cached tokens (created with 0600 perms)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'rb') as f:
+                return _json_loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, account_id: str) -> Optional[tuple]:
+        """
+        Get a cached token that is not due for refresh.
+
+        Args:
+            account_id (str): Meta ad account ID
+
+        Returns:
+            Optional[tuple]: (access_token, expires_at), or None if missing or
+                within 24h of expiry
+        """
+        entry = self._read().get(account_id)
+        if not entry or entry.get('expires_at', 0) - time.time() <= TOKEN_REFRESH_MARGIN:
+            return None
+        return entry['access_token'], entry['expires_at']
+
+    def set(self, account_id: str, token: str, expires_at: float):
+        """
+        Store a token for an account.
+
+        Args:
+            account_id (str): Meta ad account ID
+            token (str): Access token
+            expires_at (float): Expiry as a Unix timestamp
+        """
+        with self._lock:
+            entries = self._read()
+            entries[account_id] = {'access_token': token, 'expires_at': expires_at}
+
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_json_dumps(entries))
+            os.replace(tmp_path, self.path)
+
+
+class EtagCache:
+    """File-backed store of the last ETag and rows seen for an edge."""
+
+    def __init__(self, directory: str = os.path.expanduser('~/.cache/meta_ads/etags')):
+        """
+        Initialize ETag cache.
+
+        Args:
+            directory (str): Directory holding one JSON file per cached edge
+        """
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+
+    def get(self, key: str) -> tuple:
+        """
+        Get the cached ETag and rows for an edge.
+
+        Args:
+            key (str): Edge identifier (endpoint plus requested fields)
+
+        Returns:
+            tuple: (etag, rows), or (None, None) if nothing is cached
+        """
+        try:
+            with open(self._path(key), 'rb') as f:
+                entry = _json_loads(f.read())
+            return entry['etag'], entry['rows']
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def set(self, key: str, etag: str, rows: List[Dict[str, Any]]):
+        """
+        Store the ETag and rows for an edge (best-effort).
+
+        Args:
+            key (str): Edge identifier (endpoint plus requested fields)
+            etag (str): ETag response header
+            rows (List[Dict]): Rows returned with that ETag
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(_json_dumps({'etag': etag, 'rows': rows}))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+RESPONSE_CACHE_DIR = os.path.expanduser('~/.cache/meta_ads/responses')
+_response_cache: Dict[str, tuple] = {}  # key -> (fetched_at, encoded cache entry)
+
+
+def ttl_cache(default_ttl_minutes: float, skip: Optional[Callable[..., bool]] = None):
+    """
+    Cache a client method's result in memory and under RESPONSE_CACHE_DIR.
+
+    The key is a SHA-1 of the method name and its arguments, so the access
+    token never ends up in it. Callers pass force_refresh=True to bypass the
+    cache for one call (the fresh result still overwrites the entry).
+
+    Entries are kept encoded, also in memory, and decoded on every hit, so
+    each caller gets its own rows and may mutate them freely.
+
+    Args:
+        default_ttl_minutes (float): How long a cached result stays valid
+        skip (Callable): Called with the method's args/kwargs; returning True
+            bypasses the cache entirely
+
+    Returns:
+        Callable: Decorator
+    """
+    ttl = default_ttl_minutes * 60
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, force_refresh: bool = False, **kwargs):
+            if skip is not None and skip(*args, **kwargs):
+                return func(self, *args, **kwargs)
+
+            raw_key = json.dumps([func.__qualname__, args, kwargs], sort_keys=True, default=str)
+            key = hashlib.sha1(raw_key.encode('utf-8')).hexdigest()
+            path = os.path.join(RESPONSE_CACHE_DIR, f"{key}.json")
+            now = time.time()
+
+            if not force_refresh:
+                entry = _response_cache.get(key)
+                if entry is None:
+                    try:
+                        with open(path, 'rb') as f:
+                            blob = f.read()
+                        entry = (_json_loads(blob)['fetched_at'], blob)
+                    except (OSError, ValueError, KeyError):
+                        entry = None
+                if entry is not None and now - entry[0] <= ttl:
+                    _response_cache[key] = entry
+                    return _json_loads(entry[1])['rows']
+
+            rows = func(self, *args, **kwargs)
+            blob = _json_dumps({'fetched_at': now, 'rows': rows})
+            _response_cache[key] = (now, blob)
+            try:
+                os.makedirs(RESPONSE_CACHE_DIR, mode=0o700, exist_ok=True)
+                # Per-process/thread temp name: concurrent writers of one key must not collide
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(blob)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass  # the disk cache is best-effort
+            return rows
+
+        return wrapper
+
+    return decorator
+
+
+def _is_rolling_window(account_id: str = None, level: str = "account", fields: List[str] = None,
+                       breakdowns: List[str] = None, date_range: Dict[str, str] = None,
+                       filtering: List[Dict[str, Any]] = None,
+                       time_increment: Union[int, str, None] = None) -> bool:
+    """Whether an insights request covers today (or Meta's default relative window)."""
+    if not date_range or not date_range.get('end_date'):
+        return True
+    return date_range['end_date'] >= datetime.now().strftime('%Y-%m-%d')
+
 
 class MetaAPIClient:
     """Client for Meta Ads API v21.0 operations."""
 
     BASE_URL = "https://graph.facebook.com/v21.0"
     RATE_LIMIT_CALLS_PER_HOUR = 200
-    RATE_LIMIT_SLEEP = 0.3  # seconds between calls
+    # Meta reports usage as % of budget in X-App-Usage / X-Business-Use-Case-Usage
+    USAGE_HIGH_WATER = 75  # start slowing down above this %
+    USAGE_BLOCK = 95  # above this %, wait until access is regained
+    USAGE_BACKOFF_BASE = 1.0  # seconds of delay at the high-water mark
+    MAX_CONCURRENT_REQUESTS = 4  # in-flight requests across accounts/shards
+    BATCH_MAX_REQUESTS = 50  # Graph API limit per batch call
+    DEFAULT_INSIGHTS_FIELDS = [
+        'impressions', 'clicks', 'spend', 'actions',
+        'action_values', 'cpa', 'roas', 'cpm', 'cpc', 'ctr', 'frequency'
+    ]
+
+    # Async insights report runs (AdReportRun)
+    ASYNC_JOB_MIN_DAYS = 7  # longer date ranges go through an async job
+    ASYNC_JOB_POLL_INITIAL = 5  # seconds
+    ASYNC_JOB_POLL_MAX = 300  # seconds
+    ASYNC_JOB_TIMEOUT = 40 * 60  # seconds
+    SHARD_MIN_DAYS = 31  # longer ranges are split into per-month async jobs
 
     def __init__(self, access_token: str):
         """
@@ -31,14 +274,37 @@ class MetaAPIClient:
         self.access_token = access_token
         self.call_count = 0
         self.last_call_time = None
-
-    def load_token(self, creds_path: str) -> str:
+        self._rate_lock = threading.Lock()
+        self._usage_pct = 0.0  # highest usage % reported by the last response
+        self._regain_at = 0.0  # time.monotonic() when a blocked budget frees up
+
+        # One keep-alive pool for every page; 429s are handled by _handle_retry
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers.update({'Accept-Encoding': _ACCEPT_ENCODING})
+        self._etag_cache = EtagCache()
+
+    def load_token(self, creds_path: str, account_id: Optional[str] = None) -> str:
         """
-        Load access token from credentials file.
+        Load access token, preferring cached tokens over the credentials file.
+
+        Lookup order is the in-process cache, the on-disk TokenCache, then the
+        credentials file. A token read from the file is exchanged for a
+        long-lived one when META_APP_ID and META_APP_SECRET are set.
 
         Args:
             creds_path (str): Path to credentials JSON file
                 Expected format: {"access_token": "..."}
+            account_id (str): Meta ad account ID used as the cache key
+                (defaults to the credentials file path)
 
         Returns:
             str: Access token
@@ -47,45 +313,472 @@ class MetaAPIClient:
             FileNotFoundError: If credentials file not found
             KeyError: If 'access_token' key missing
         """
+        if account_id:
+            key = account_id if account_id.startswith('act_') else f"act_{account_id}"
+        else:
+            key = os.path.realpath(creds_path)
+
+        cached = _token_cache.get(key)
+        if cached and (cached[1] is None or cached[1] - time.time() > TOKEN_REFRESH_MARGIN):
+            self.access_token = cached[0]
+            return cached[0]
+
+        disk_cache = TokenCache()
+        cached = disk_cache.get(key)
+        if cached:
+            _token_cache[key] = cached
+            self.access_token = cached[0]
+            return cached[0]
+
         try:
             with open(creds_path, 'r') as f:
                 creds = json.load(f)
             token = creds.get('access_token')
             if not token:
                 raise KeyError("'access_token' key not found in credentials file")
-            self.access_token = token
-            return token
         except FileNotFoundError:
             raise FileNotFoundError(f"Credentials file not found: {creds_path}")
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in credentials file: {e}")
 
+        expires_at = None
+        app_id = os.environ.get('META_APP_ID')
+        app_secret = os.environ.get('META_APP_SECRET')
+        if app_id and app_secret:
+            token = self.exchange_token(token, app_id, app_secret)
+            expires_at = time.time() + TOKEN_TTL
+            disk_cache.set(key, token, expires_at)
+
+        _token_cache[key] = (token, expires_at)
+        self.access_token = token
+        return token
+
+    def exchange_token(self, token: str, app_id: str, app_secret: str) -> str:
+        """
+        Exchange a token for a long-lived (60-day) access token.
+
+        Args:
+            token (str): Short- or long-lived user access token
+            app_id (str): Meta app ID
+            app_secret (str): Meta app secret
+
+        Returns:
+            str: Long-lived access token
+
+        Raises:
+            requests.RequestException: If API call fails
+        """
+        params = {
+            'grant_type': 'fb_exchange_token',
+            'client_id': app_id,
+            'client_secret': app_secret,
+            'fb_exchange_token': token
+        }
+        try:
+            response = self._session.get(f"{self.BASE_URL}/oauth/access_token", params=params, timeout=30)
+            response.raise_for_status()
+            return _json_loads(response.content)['access_token']
+        except (requests.RequestException, KeyError, ValueError) as e:
+            raise requests.RequestException(f"Meta token exchange failed: {e}")
+
     def _apply_rate_limit(self):
-        """Apply rate limiting between API calls."""
-        time.sleep(self.RATE_LIMIT_SLEEP)
-        self.call_count += 1
-        self.last_call_time = time.time()
+        """Delay the next call only when Meta reports the usage budget is under pressure."""
+        with self._rate_lock:
+            usage = self._usage_pct
+            regain_at = self._regain_at
+
+        delay = 0.0
+        now = time.monotonic()
+        if usage > self.USAGE_BLOCK and regain_at > now:
+            delay = regain_at - now
+        elif usage > self.USAGE_HIGH_WATER:
+            delay = self.USAGE_BACKOFF_BASE * (usage / self.USAGE_HIGH_WATER) ** 2
+
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._rate_lock:
+            self.call_count += 1
+            self.last_call_time = time.time()
+
+    def _update_budget(self, headers: Dict[str, str]):
+        """
+        Record rate-limit usage from Meta's usage headers.
 
-    def _handle_retry(self, response: requests.Response, max_retries: int = 3) -> Optional[requests.Response]:
+        Args:
+            headers: Response headers
+        """
+        usage = 0.0
+        regain_minutes = 0
+
+        try:
+            app_usage = headers.get('X-App-Usage')
+            if app_usage:
+                app = _json_loads(app_usage)
+                usage = max(app.get('call_count', 0), app.get('total_cputime', 0), app.get('total_time', 0))
+
+            buc_usage = headers.get('X-Business-Use-Case-Usage')
+            if buc_usage:
+                for entries in _json_loads(buc_usage).values():
+                    for entry in entries:
+                        usage = max(
+                            usage,
+                            entry.get('call_count', 0),
+                            entry.get('total_cputime', 0),
+                            entry.get('total_time', 0)
+                        )
+                        regain_minutes = max(regain_minutes, entry.get('estimated_time_to_regain_access', 0))
+        except (ValueError, AttributeError):
+            return  # Malformed header: keep the previous budget state
+
+        with self._rate_lock:
+            self._usage_pct = usage
+            self._regain_at = time.monotonic() + regain_minutes * 60 if regain_minutes else 0.0
+
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
         """
-        Handle rate limit retries with exponential backoff.
+        Seconds to wait before retrying a 429, as advertised by Meta.
+
+        Prefers Retry-After, then the largest estimated_time_to_regain_access
+        (minutes) in X-Business-Use-Case-Usage, then exponential backoff.
 
         Args:
-            response: Response object
+            response: The 429 response
+            attempt (int): Zero-based retry attempt
+
+        Returns:
+            float: Delay in seconds
+        """
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass  # HTTP-date form; fall through
+
+        buc_usage = response.headers.get('X-Business-Use-Case-Usage')
+        if buc_usage:
+            try:
+                regain_minutes = max(
+                    (entry.get('estimated_time_to_regain_access', 0)
+                     for entries in _json_loads(buc_usage).values() for entry in entries),
+                    default=0
+                )
+                if regain_minutes:
+                    return regain_minutes * 60.0
+            except (ValueError, AttributeError):
+                pass
+
+        return float(min(2 ** attempt, 300))
+
+    def _handle_retry(self, response: requests.Response, attempt: int, max_retries: int = 3):
+        """
+        Wait out a 429 before the caller re-issues the request.
+
+        Args:
+            response: The 429 response
+            attempt (int): Zero-based retry attempt
             max_retries (int): Maximum number of retries
 
+        Raises:
+            requests.RequestException: If max_retries is exhausted
+        """
+        if attempt >= max_retries:
+            raise requests.RequestException(f"Rate limited (429) after {max_retries} retries")
+
+        wait_time = self._retry_delay(response, attempt)
+        print(f"Rate limited (429). Waiting {wait_time:.0f}s before retry {attempt + 1}/{max_retries}")
+        time.sleep(wait_time)
+
+    def _read_page(self, response: requests.Response) -> Dict[str, Any]:
+        """
+        Parse a Graph API page.
+
+        With ijson installed the body is parsed incrementally from the
+        (streamed) socket, so the raw page bytes are never held in memory
+        alongside the parsed rows.
+
+        Args:
+            response: Successful response, requested with stream=True when ijson is available
+
+        Returns:
+            Dict: Top-level page object ('data', 'paging', ...)
+        """
+        if ijson is None:
+            return _json_loads(response.content)
+
+        response.raw.decode_content = True  # let urllib3 undo gzip
+        try:
+            return dict(ijson.kvitems(response.raw, '', use_float=True))
+        finally:
+            response.close()
+
+    def _paginate(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        if_none_match: Optional[str] = None,
+        page_etags: Optional[List[str]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        GET an edge and follow its 'after' cursors, yielding one row list per page.
+
+        Args:
+            endpoint (str): Full Graph API URL
+            params (Dict): Query parameters; an 'after' entry is the starting cursor
+            if_none_match (str): ETag sent with the first request; on 304
+                nothing is yielded
+            page_etags (List[str]): If given, each page's ETag header is appended
+
+        Yields:
+            List[Dict]: The 'data' rows of each page
+
+        Raises:
+            requests.RequestException: If API call fails
+        """
+        page_cursor = params.get('after')
+        headers = {'If-None-Match': if_none_match} if if_none_match else None
+
+        # Encode the static query once; only the cursor changes between pages
+        base_url = f"{endpoint}?{urlencode({k: v for k, v in params.items() if k != 'after'})}"
+
+        retries = 0
+
+        while True:
+            url = f"{base_url}&after={quote(page_cursor, safe='')}" if page_cursor else base_url
+
+            self._apply_rate_limit()
+            response = self._session.get(url, headers=headers, timeout=30, stream=ijson is not None)
+            self._update_budget(response.headers)
+
+            if response.status_code == 304:
+                response.close()
+                return
+
+            # Handle rate limiting: wait, then re-issue the same page
+            if response.status_code == 429:
+                response.close()
+                self._handle_retry(response, retries)
+                retries += 1
+                continue
+
+            try:
+                response.raise_for_status()
+            except requests.HTTPError:
+                response.close()
+                raise
+            retries = 0
+            headers = None  # only the first page is conditional
+            if page_etags is not None:
+                page_etags.append(response.headers.get('ETag'))
+            data = self._read_page(response)
+
+            yield data.get('data', ())
+
+            # Check for pagination
+            if 'paging' in data and 'cursors' in data['paging']:
+                page_cursor = data['paging']['cursors'].get('after')
+                if not page_cursor:
+                    break  # No more pages
+            else:
+                break  # No paging info
+
+    def _fetch_all_pages(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        conditional: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Collect every page of an edge into one list.
+
+        Args:
+            endpoint (str): Full Graph API URL
+            params (Dict): Query parameters
+            conditional (bool): Send If-None-Match with the cached ETag and
+                return the cached rows on 304. Only results that fit in the
+                first page are cached, since an ETag covers one page.
+
         Returns:
-            requests.Response: The response after retry or original if not retriable
+            List[Dict]: Rows from all pages
+
+        Raises:
+            requests.RequestException: If API call fails
         """
-        if response.status_code == 429:  # Too Many Requests
-            for attempt in range(max_retries):
-                wait_time = 60 * (attempt + 1)  # 60s, 120s, 180s
-                print(f"Rate limited (429). Waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                time.sleep(wait_time)
-                # Re-attempt the request
-                return response  # Caller should retry the request
-        return response
+        if not conditional:
+            return list(chain.from_iterable(self._paginate(endpoint, params)))
+
+        etag_key = f"{endpoint}?fields={params.get('fields', '')}"
+        etag, cached_rows = self._etag_cache.get(etag_key)
+        page_etags = []
+        pages = list(self._paginate(endpoint, params, if_none_match=etag, page_etags=page_etags))
+        if not pages:
+            return cached_rows  # 304 Not Modified
+
+        rows = list(chain.from_iterable(pages))
+        # Meta returns an 'after' cursor even on the last page, so trailing pages may be empty
+        if page_etags[0] and sum(1 for page in pages if page) <= 1:
+            self._etag_cache.set(etag_key, page_etags[0], rows)
+        return rows
+
+    def batch_get(self, relative_urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Issue many GETs through the Graph API batch endpoint.
+
+        Up to BATCH_MAX_REQUESTS requests travel in one POST and are executed
+        by Meta in parallel, so a fan-out costs one round trip per 50 calls.
+
+        Args:
+            relative_urls (List[str]): Paths relative to BASE_URL, with query
+                strings (e.g. 'act_123/campaigns?fields=id,name')
+
+        Returns:
+            List[Dict]: Decoded response bodies, in request order
 
+        Raises:
+            requests.RequestException: If the batch call or any request in it fails
+        """
+        results = []
+        for start in range(0, len(relative_urls), self.BATCH_MAX_REQUESTS):
+            chunk = relative_urls[start:start + self.BATCH_MAX_REQUESTS]
+            payload = {
+                'access_token': self.access_token,
+                'batch': _json_dumps([{'method': 'GET', 'relative_url': url} for url in chunk]).decode(),
+                'include_headers': 'false'
+            }
+
+            self._apply_rate_limit()
+            response = self._session.post(self.BASE_URL, data=payload, timeout=60)
+            self._update_budget(response.headers)
+            response.raise_for_status()
+
+            for url, item in zip(chunk, _json_loads(response.content)):
+                if item is None:
+                    raise requests.RequestException(f"Batched request timed out: {url}")
+                if item.get('code') != 200:
+                    raise requests.RequestException(f"Batched request failed ({item.get('code')}): {item.get('body')}")
+                results.append(_json_loads(item['body']))
+
+        return results
+
+    def _build_insights_params(
+        self,
+        level: str,
+        fields: Optional[List[str]],
+        breakdowns: Optional[List[str]],
+        date_range: Optional[Dict[str, str]],
+        filtering: Optional[List[Dict[str, Any]]],
+        time_increment: Union[int, str, None] = None
+    ) -> Dict[str, Any]:
+        """Build the query parameters shared by sync and async insights requests."""
+        if fields is None:
+            fields = self.DEFAULT_INSIGHTS_FIELDS
+
+        params = {
+            'access_token': self.access_token,
+            'fields': ','.join(fields),
+            'level': level,
+        }
+
+        if breakdowns:
+            params['breakdowns'] = ','.join(breakdowns)
+
+        if date_range:
+            params['time_range'] = _json_dumps({
+                'since': date_range.get('start_date'),
+                'until': date_range.get('end_date')
+            }).decode()
+
+        if filtering:
+            params['filtering'] = _json_dumps(filtering).decode()
+
+        if time_increment is not None:
+            params['time_increment'] = time_increment
+
+        return params
+
+    def _use_async_job(self, level: str, date_range: Optional[Dict[str, str]]) -> bool:
+        """Whether an insights request is heavy enough to run as an async report."""
+        if level == 'ad':
+            return True
+        if not date_range or not date_range.get('start_date') or not date_range.get('end_date'):
+            return False
+        start = datetime.strptime(date_range['start_date'], '%Y-%m-%d')
+        end = datetime.strptime(date_range['end_date'], '%Y-%m-%d')
+        return (end - start).days > self.ASYNC_JOB_MIN_DAYS
+
+    @staticmethod
+    def _shard_date_range(start: str, end: str, granularity: str = "month") -> List[Tuple[str, str]]:
+        """
+        Split an inclusive YYYY-MM-DD range into calendar-month windows.
+
+        Args:
+            start (str): First day of the range
+            end (str): Last day of the range
+            granularity (str): Only 'month' is supported
+
+        Returns:
+            List[Tuple[str, str]]: (since, until) pairs covering the range
+        """
+        if granularity != "month":
+            raise ValueError(f"Unsupported shard granularity: {granularity}")
+
+        day = datetime.strptime(start, '%Y-%m-%d')
+        last = datetime.strptime(end, '%Y-%m-%d')
+        shards = []
+        while day <= last:
+            next_month = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+            shard_end = min(next_month - timedelta(days=1), last)
+            shards.append((day.strftime('%Y-%m-%d'), shard_end.strftime('%Y-%m-%d')))
+            day = next_month
+        return shards
+
+    def _can_shard(self, date_range: Optional[Dict[str, str]], time_increment: Union[int, str, None]) -> bool:
+        """
+        Whether a request can be split by month without changing its rows.
+
+        Only daily and monthly increments produce the same rows per shard;
+        without an increment Meta aggregates over the whole range.
+        """
+        if str(time_increment) not in ('1', 'monthly'):
+            return False
+        if not date_range or not date_range.get('start_date') or not date_range.get('end_date'):
+            return False
+        start = datetime.strptime(date_range['start_date'], '%Y-%m-%d')
+        end = datetime.strptime(date_range['end_date'], '%Y-%m-%d')
+        return (end - start).days > self.SHARD_MIN_DAYS
+
+    def _get_insights_sharded(self, account_id: str, date_range: Dict[str, str], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Run one async report per month concurrently and union the rows.
+
+        Args:
+            account_id (str): Meta ad account ID
+            date_range (Dict): {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
+            **kwargs: Passed through to get_insights_async
+
+        Returns:
+            List[Dict]: Insights rows from all shards, without duplicates
+        """
+        shards = self._shard_date_range(date_range['start_date'], date_range['end_date'])
+
+        def fetch(shard: Tuple[str, str]) -> List[Dict[str, Any]]:
+            return self.get_insights_async(
+                account_id, date_range={'start_date': shard[0], 'end_date': shard[1]}, **kwargs
+            )
+
+        rows = []
+        seen = set()
+        with ThreadPoolExecutor(max_workers=min(self.MAX_CONCURRENT_REQUESTS, len(shards))) as executor:
+            for shard_rows in executor.map(fetch, shards):
+                for row in shard_rows:
+                    key = json.dumps(row, sort_keys=True)
+                    if key not in seen:
+                        seen.add(key)
+                        rows.append(row)
+        return rows
+
+    @ttl_cache(default_ttl_minutes=15, skip=_is_rolling_window)
     def get_insights(
         self,
         account_id: str,
@@ -93,11 +786,16 @@ class MetaAPIClient:
         fields: List[str] = None,
         breakdowns: List[str] = None,
         date_range: Dict[str, str] = None,
-        filtering: List[Dict[str, Any]] = None
+        filtering: List[Dict[str, Any]] = None,
+        time_increment: Union[int, str, None] = None
     ) -> List[Dict[str, Any]]:
         """
         Get insights data from Meta Ads API.
 
+        Ad-level requests and date ranges longer than ASYNC_JOB_MIN_DAYS
+        are routed through get_insights_async. Daily or monthly requests
+        spanning more than SHARD_MIN_DAYS run as concurrent per-month jobs.
+
         Args:
             account_id (str): Meta ad account ID (with or without 'act_' prefix)
             level (str): 'account', 'campaign', 'adset', or 'ad'
@@ -105,21 +803,30 @@ class MetaAPIClient:
             breakdowns (List[str]): Breakdown dimensions
             date_range (Dict): {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
             filtering (List[Dict]): Filter criteria
+            time_increment (int|str): Days per row, 'monthly' or 'all_days'
+            force_refresh (bool): Skip the 15-minute response cache
 
         Returns:
             List[Dict]: Insights data, paginated
 
         Raises:
+            ValueError: If no fields are given for a level other than 'account'
             requests.RequestException: If API call fails
         """
-        if fields is None:
-            fields = [
-                'impressions', 'clicks', 'spend', 'actions',
-                'action_values', 'cpa', 'roas', 'cpm', 'cpc', 'ctr', 'frequency'
-            ]
+        if not fields and level != 'account':
+            raise ValueError(f"fields must be given explicitly for level='{level}' insights")
 
-        if breakdowns is None:
-            breakdowns = []
+        if self._can_shard(date_range, time_increment):
+            return self._get_insights_sharded(
+                account_id, date_range, level=level, fields=fields, breakdowns=breakdowns,
+                filtering=filtering, time_increment=time_increment
+            )
+
+        if self._use_async_job(level, date_range):
+            return self.get_insights_async(
+                account_id, level=level, fields=fields, breakdowns=breakdowns,
+                date_range=date_range, filtering=filtering, time_increment=time_increment
+            )
 
         # Format account ID
         if not account_id.startswith('act_'):
@@ -128,67 +835,195 @@ class MetaAPIClient:
         # Build endpoint
         endpoint = f"{self.BASE_URL}/{account_id}/insights"
 
+        params = self._build_insights_params(level, fields, breakdowns, date_range, filtering, time_increment)
+        params['limit'] = 500  # Max results per page
+
+        try:
+            return self._fetch_all_pages(endpoint, params)
+        except requests.RequestException as e:
+            raise requests.RequestException(f"Meta API insights request failed: {e}")
+
+    def _wait_for_report_run(self, report_run_id: str) -> None:
+        """
+        Poll an async report run with exponential backoff until it completes.
+
+        Args:
+            report_run_id (str): AdReportRun ID returned when the job was created
+
+        Raises:
+            requests.RequestException: If the job fails, is skipped, or times out
+        """
+        endpoint = f"{self.BASE_URL}/{report_run_id}"
         params = {
             'access_token': self.access_token,
-            'fields': ','.join(fields),
-            'level': level,
+            'fields': 'async_status,async_percent_completion'
         }
 
-        if breakdowns:
-            params['breakdowns'] = ','.join(breakdowns)
+        delay = self.ASYNC_JOB_POLL_INITIAL
+        deadline = time.monotonic() + self.ASYNC_JOB_TIMEOUT
+
+        while True:
+            self._apply_rate_limit()
+            response = self._session.get(endpoint, params=params, timeout=30)
+            self._update_budget(response.headers)
+            response.raise_for_status()
+            job = _json_loads(response.content)
+
+            status = job.get('async_status')
+            # The API can report 100% while the job is still "Job Running"
+            if status == 'Job Completed' and job.get('async_percent_completion') == 100:
+                return
+            if status in ('Job Failed', 'Job Skipped'):
+                raise requests.RequestException(f"Async report {report_run_id} ended with status '{status}'")
+            if time.monotonic() + delay > deadline:
+                raise requests.RequestException(
+                    f"Async report {report_run_id} did not complete within {self.ASYNC_JOB_TIMEOUT // 60} minutes"
+                )
+
+            time.sleep(delay)
+            delay = min(delay * 2, self.ASYNC_JOB_POLL_MAX)
+
+    def get_insights_async(
+        self,
+        account_id: str,
+        level: str = "account",
+        fields: List[str] = None,
+        breakdowns: List[str] = None,
+        date_range: Dict[str, str] = None,
+        filtering: List[Dict[str, Any]] = None,
+        time_increment: Union[int, str, None] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get insights data through a Meta async report run (AdReportRun).
 
-        if date_range:
-            params['time_range'] = json.dumps({
-                'since': date_range.get('start_date'),
-                'until': date_range.get('end_date')
-            })
+        Meta aggregates the report server-side, which avoids the timeouts and
+        "reduce the amount of data" errors of large synchronous requests.
 
-        if filtering:
-            params['filtering'] = json.dumps(filtering)
+        Args:
+            account_id (str): Meta ad account ID (with or without 'act_' prefix)
+            level (str): 'account', 'campaign', 'adset', or 'ad'
+            fields (List[str]): Fields to retrieve
+            breakdowns (List[str]): Breakdown dimensions
+            date_range (Dict): {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
+            filtering (List[Dict]): Filter criteria
+            time_increment (int|str): Days per row, 'monthly' or 'all_days'
 
-        params['limit'] = 500  # Max results per page
+        Returns:
+            List[Dict]: Insights data, paginated
 
-        all_data = []
-        page_cursor = None
+        Raises:
+            requests.RequestException: If API call or report job fails
+        """
+        if not account_id.startswith('act_'):
+            account_id = f"act_{account_id}"
+
+        params = self._build_insights_params(level, fields, breakdowns, date_range, filtering, time_increment)
 
         try:
-            while True:
-                if page_cursor:
-                    params['after'] = page_cursor
+            self._apply_rate_limit()
+            response = self._session.post(f"{self.BASE_URL}/{account_id}/insights", data=params, timeout=30)
+            self._update_budget(response.headers)
+            response.raise_for_status()
+            report_run_id = _json_loads(response.content)['report_run_id']
+
+            self._wait_for_report_run(report_run_id)
+
+            return self._fetch_all_pages(
+                f"{self.BASE_URL}/{report_run_id}/insights",
+                {'access_token': self.access_token, 'limit': 500}
+            )
+        except (requests.RequestException, KeyError) as e:
+            raise requests.RequestException(f"Meta API async insights request failed: {e}")
+
+    def get_insights_for_accounts(
+        self,
+        account_ids: List[str],
+        max_workers: int = MAX_CONCURRENT_REQUESTS,
+        **kwargs
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get insights for several ad accounts concurrently.
 
-                self._apply_rate_limit()
-                response = requests.get(endpoint, params=params, timeout=30)
+        Each account's cursor pagination stays sequential; only the accounts
+        are fetched in parallel, so network round trips overlap.
 
-                # Handle rate limiting
-                if response.status_code == 429:
-                    self._handle_retry(response)
-                    continue  # Retry
+        Args:
+            account_ids (List[str]): Meta ad account IDs
+            max_workers (int): Maximum accounts fetched at once
+            **kwargs: Passed through to get_insights
 
-                response.raise_for_status()
-                data = response.json()
+        Returns:
+            Dict[str, List[Dict]]: Insights data keyed by account ID
 
-                if 'data' in data:
-                    all_data.extend(data['data'])
+        Raises:
+            requests.RequestException: If any API call fails
+        """
+        if not account_ids:
+            return {}
 
-                # Check for pagination
-                if 'paging' in data and 'cursors' in data['paging']:
-                    page_cursor = data['paging']['cursors'].get('after')
-                    if not page_cursor:
-                        break  # No more pages
-                else:
-                    break  # No paging info
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(account_ids))) as executor:
+            futures = {
+                account_id: executor.submit(self.get_insights, account_id, **kwargs)
+                for account_id in account_ids
+            }
+            return {account_id: future.result() for account_id, future in futures.items()}
 
-            return all_data
+    def get_edge_for_accounts(
+        self,
+        account_ids: List[str],
+        edge: str,
+        fields: List[str],
+        limit: int = 500
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get an edge (campaigns, adsets, ads, ...) for several accounts at once.
 
-        except requests.RequestException as e:
-            raise requests.RequestException(f"Meta API insights request failed: {e}")
+        The first page of every account is fetched in a single batch call;
+        accounts with more pages continue with regular cursor pagination.
 
+        Args:
+            account_ids (List[str]): Meta ad account IDs
+            edge (str): Edge name, e.g. 'campaigns'
+            fields (List[str]): Fields to retrieve
+            limit (int): Rows per page
+
+        Returns:
+            Dict[str, List[Dict]]: Rows keyed by account ID (as passed in)
+
+        Raises:
+            requests.RequestException: If API call fails
+        """
+        query = urlencode({'fields': ','.join(fields), 'limit': limit})
+        nodes = [a if a.startswith('act_') else f"act_{a}" for a in account_ids]
+
+        try:
+            first_pages = self.batch_get([f"{node}/{edge}?{query}" for node in nodes])
+
+            results = {}
+            for account_id, node, page in zip(account_ids, nodes, first_pages):
+                rows = list(page.get('data', ()))
+                paging = page.get('paging', {})
+                if paging.get('next'):
+                    params = {
+                        'access_token': self.access_token,
+                        'fields': ','.join(fields),
+                        'limit': limit,
+                        'after': paging['cursors']['after']
+                    }
+                    rows.extend(chain.from_iterable(self._paginate(f"{self.BASE_URL}/{node}/{edge}", params)))
+                results[account_id] = rows
+            return results
+        except (requests.RequestException, KeyError) as e:
+            raise requests.RequestException(f"Meta API batched {edge} request failed: {e}")
+
+    @ttl_cache(default_ttl_minutes=360)
     def get_campaigns(self, account_id: str) -> List[Dict[str, Any]]:
         """
         Get all campaigns for the account.
 
         Args:
             account_id (str): Meta ad account ID
+            force_refresh (bool): Skip the 6-hour response cache
 
         Returns:
             List[Dict]: Campaign objects
@@ -203,40 +1038,19 @@ class MetaAPIClient:
             'limit': 500
         }
 
-        all_campaigns = []
-        page_cursor = None
-
         try:
-            while True:
-                if page_cursor:
-                    params['after'] = page_cursor
-
-                self._apply_rate_limit()
-                response = requests.get(endpoint, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-
-                if 'data' in data:
-                    all_campaigns.extend(data['data'])
-
-                if 'paging' in data and 'cursors' in data['paging']:
-                    page_cursor = data['paging']['cursors'].get('after')
-                    if not page_cursor:
-                        break
-                else:
-                    break
-
-            return all_campaigns
-
+            return self._fetch_all_pages(endpoint, params, conditional=True)
         except requests.RequestException as e:
             raise requests.RequestException(f"Meta API campaigns request failed: {e}")
 
+    @ttl_cache(default_ttl_minutes=360)
     def get_adsets(self, account_id: str) -> List[Dict[str, Any]]:
         """
         Get all ad sets for the account.
 
         Args:
             account_id (str): Meta ad account ID
+            force_refresh (bool): Skip the 6-hour response cache
 
         Returns:
             List[Dict]: Ad set objects
@@ -251,40 +1065,21 @@ class MetaAPIClient:
             'limit': 500
         }
 
-        all_adsets = []
-        page_cursor = None
-
         try:
-            while True:
-                if page_cursor:
-                    params['after'] = page_cursor
-
-                self._apply_rate_limit()
-                response = requests.get(endpoint, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-
-                if 'data' in data:
-                    all_adsets.extend(data['data'])
-
-                if 'paging' in data and 'cursors' in data['paging']:
-                    page_cursor = data['paging']['cursors'].get('after')
-                    if not page_cursor:
-                        break
-                else:
-                    break
-
-            return all_adsets
-
+            return self._fetch_all_pages(endpoint, params, conditional=True)
         except requests.RequestException as e:
             raise requests.RequestException(f"Meta API ad sets request failed: {e}")
 
-    def get_ads_with_creative(self, account_id: str) -> List[Dict[str, Any]]:
+    @ttl_cache(default_ttl_minutes=360)
+    def get_ads_with_creative(self, account_id: str, include_story_spec: bool = True) -> List[Dict[str, Any]]:
         """
         Get all ads with creative details for the account.
 
         Args:
             account_id (str): Meta ad account ID
+            include_story_spec (bool): Request object_story_spec, by far the
+                heaviest field; pass False when only creative IDs are needed
+            force_refresh (bool): Skip the 6-hour response cache
 
         Returns:
             List[Dict]: Ad objects with creative information
@@ -292,72 +1087,65 @@ class MetaAPIClient:
         if not account_id.startswith('act_'):
             account_id = f"act_{account_id}"
 
+        fields = 'id,name,adset_id,status,created_time,updated_time,creative'
+        if include_story_spec:
+            fields += ',object_story_spec'
+
         endpoint = f"{self.BASE_URL}/{account_id}/ads"
         params = {
             'access_token': self.access_token,
-            'fields': 'id,name,adset_id,status,created_time,updated_time,creative,object_story_spec',
+            'fields': fields,
             'limit': 500
         }
 
-        all_ads = []
-        page_cursor = None
-
         try:
-            while True:
-                if page_cursor:
-                    params['after'] = page_cursor
-
-                self._apply_rate_limit()
-                response = requests.get(endpoint, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-
-                if 'data' in data:
-                    all_ads.extend(data['data'])
-
-                if 'paging' in data and 'cursors' in data['paging']:
-                    page_cursor = data['paging']['cursors'].get('after')
-                    if not page_cursor:
-                        break
-                else:
-                    break
-
-            return all_ads
-
+            return self._fetch_all_pages(endpoint, params)
         except requests.RequestException as e:
             raise requests.RequestException(f"Meta API ads request failed: {e}")
 
 
-def load_token(creds_path: str) -> str:
+def load_token(creds_path: str, account_id: Optional[str] = None) -> str:
     """
-    Load access token from credentials file.
+    Load access token from the token cache or credentials file.
 
     Args:
         creds_path (str): Path to credentials JSON file
+        account_id (str): Meta ad account ID used as the cache key
 
     Returns:
         str: Access token
     """
     client = MetaAPIClient("temp")
-    return client.load_token(creds_path)
+    return client.load_token(creds_path, account_id=account_id)
 
 
 if __name__ == "__main__":
     import argparse
+    import sys
 
     parser = argparse.ArgumentParser(description='Meta Ads API Helper')
-    parser.add_argument('--token', required=True, help='Meta API access token')
+    token_group = parser.add_mutually_exclusive_group(required=True)
+    token_group.add_argument('--token', help='Meta API access token')
+    token_group.add_argument('--creds', help='Credentials JSON file (token is cached across runs)')
     parser.add_argument('--account-id', required=True, help='Meta ad account ID')
     parser.add_argument('--operation', required=True, choices=['campaigns', 'adsets', 'ads', 'insights'],
                        help='Operation to perform')
     parser.add_argument('--level', default='account', help='Insights level (account, campaign, adset, ad)')
     parser.add_argument('--breakdown', help='Breakdown dimension (comma-separated)')
+    parser.add_argument('--fields', default=','.join(MetaAPIClient.DEFAULT_INSIGHTS_FIELDS),
+                       help='Insights fields (comma-separated)')
     parser.add_argument('--start-date', help='Start date (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='End date (YYYY-MM-DD)')
+    parser.add_argument('--time-increment', help="Insights row granularity: days (e.g. 1), 'monthly' or 'all_days'")
+
+    parser.add_argument('--output-format', choices=['json', 'jsonl'],
+                       help='Output format (default: jsonl for more than 1000 rows, else json)')
 
     args = parser.parse_args()
 
-    client = MetaAPIClient(args.token)
+    client = MetaAPIClient(args.token or "pending")
+    if args.creds:
+        client.load_token(args.creds, account_id=args.account_id)
 
     if args.operation == 'campaigns':
         result = client.get_campaigns(args.account_id)
@@ -370,6 +1158,19 @@ if __name__ == "__main__":
         if args.start_date and args.end_date:
             date_range = {'start_date': args.start_date, 'end_date': args.end_date}
         breakdowns = args.breakdown.split(',') if args.breakdown else []
-        result = client.get_insights(args.account_id, level=args.level, breakdowns=breakdowns, date_range=date_range)
-
-    print(json.dumps(result, indent=2))
+        result = client.get_insights(args.account_id, level=args.level, fields=args.fields.split(','),
+                                     breakdowns=breakdowns, date_range=date_range,
+                                     time_increment=args.time_increment)
+
+    output_format = args.output_format
+    if output_format is None:
+        output_format = 'jsonl' if isinstance(result, list) and len(result) > 1000 else 'json'
+
+    if output_format == 'jsonl':
+        # One row per line, written as it is encoded; nothing is joined in memory
+        write = sys.stdout.buffer.write
+        for row in (result if isinstance(result, list) else [result]):
+            write(_json_dumps(row))
+            write(b"\n")
+    else:
+        print(json.dumps(result, indent=2))
@@ -4,12 +4,65 @@ Handles authentication and common CRUD operations.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator
+from urllib.parse import quote
+
+# Row payloads are encoded straight to bytes: msgspec first (it also takes
+# msgspec.Struct rows), then orjson, then the stdlib
+try:
+    import msgspec
+    _json_dumps = msgspec.json.encode
+    _json_loads = msgspec.json.decode
+except ImportError:
+    try:
+        import orjson
+        _json_dumps = orjson.dumps
+        _json_loads = orjson.loads
+    except ImportError:
+        def _json_dumps(obj: Any) -> bytes:
+            return json.dumps(obj).encode('utf-8')
+        _json_loads = json.loads
+
+
+def _encode_filters(filters: Optional[Dict[str, Any]]) -> str:
+    """
+    Encode equality/IN filters as a PostgREST query string.
+
+    Keys and values are percent-encoded, so values containing '&' or '='
+    cannot break out of their filter.
+
+    Args:
+        filters (Dict): Column -> value (a list becomes an IN filter)
+
+    Returns:
+        str: 'col=eq.value&col2=in.(a,b)', or '' when there are no filters
+    """
+    if not filters:
+        return ''
+
+    parts = []
+    for key, value in filters.items():
+        if isinstance(value, bool):
+            condition = f"eq.{str(value).lower()}"
+        elif isinstance(value, list):
+            condition = f"in.({quote(','.join(str(v) for v in value), safe=',')})"
+        else:
+            condition = f"eq.{quote(str(value), safe='')}"
+        parts.append(f"{quote(key, safe='')}={condition}")
+    return '&'.join(parts)
+
 
 class SupabaseClient:
     """Client for Supabase REST API operations."""
 
+    BATCH_CHUNK_SIZE = 500  # rows per POST in insert_batch/upsert_batch
+    BATCH_MAX_CONCURRENCY = 8  # sub-batches in flight at once
+    POOL_MAXSIZE = 32  # keep-alive connections to the project host
+
     def __init__(self, url: str, key: str):
         """
         Initialize Supabase client.
@@ -34,19 +87,122 @@ class SupabaseClient:
             'Content-Type': 'application/json'
         }
 
+        # Reuse keep-alive connections across calls. POST is not retried:
+        # a plain INSERT that reached the server must not be replayed.
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'PATCH', 'DELETE'])
+        )
+        # Every request goes to one host, so give it a dedicated pool. With
+        # pool_block, concurrent batch posts wait for a kept-alive connection
+        # instead of opening (and TLS-handshaking) throwaway sockets.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.POOL_MAXSIZE,
+            pool_block=True,
+            max_retries=retry
+        )
+        self._session = requests.Session()
+        self._session.mount(f"{self.url}/", adapter)
+
+    def _write_headers(self, return_rows: bool, prefer: Optional[str] = None) -> Dict[str, str]:
+        """
+        Headers for a write, asking PostgREST to echo rows back only when needed.
+
+        Args:
+            return_rows (bool): Request return=representation instead of return=minimal
+            prefer (str): Extra Prefer directives (e.g. upsert resolution)
+
+        Returns:
+            Dict: Request headers
+        """
+        directives = ['return=representation' if return_rows else 'return=minimal']
+        if prefer:
+            directives.append(prefer)
+        return {**self.headers, 'Prefer': ','.join(directives)}
+
+    def select_iter(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[str]] = None,
+        page_size: int = 1000,
+        order: str = 'id.asc'
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        SELECT query streamed page by page with Range headers.
+
+        Pages are ordered by `order` so that successive ranges neither repeat
+        nor skip rows. The first request asks for the exact match count
+        (Prefer: count=exact) and the scan stops once that many rows have been
+        read. Each page advances by the rows actually returned, so a page_size
+        above the project's max-rows setting costs extra requests but does
+        not truncate the result.
+
+        Args:
+            table (str): Table name
+            filters (Dict): Filter criteria as key-value pairs
+            columns (List): Specific columns to return
+            page_size (int): Rows per request
+            order (str): PostgREST order clause on a unique key (e.g. 'id.asc')
+
+        Yields:
+            Dict: One row at a time
+
+        Raises:
+            requests.RequestException: If API call fails
+        """
+        select = quote(','.join(columns), safe=',*()') if columns else '*'
+        url = f"{self.base_url}/{table}?select={select}&order={quote(order, safe=',.')}"
+
+        query = _encode_filters(filters)
+        if query:
+            url = f"{url}&{query}"
+
+        headers = {**self.headers, 'Range-Unit': 'items', 'Prefer': 'count=exact'}
+        start = 0
+        total = None
+
+        while True:
+            headers['Range'] = f"{start}-{start + page_size - 1}"
+            try:
+                response = self._session.get(url, headers=headers, timeout=30)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                raise requests.RequestException(f"Supabase SELECT failed: {e}")
+
+            rows = _json_loads(response.content) if response.content else []
+            yield from rows
+            start += len(rows)
+
+            if total is None:
+                # Content-Range: '0-999/12345' ('*' when the count is unknown)
+                count = response.headers.get('Content-Range', '').rpartition('/')[2]
+                total = int(count) if count.isdigit() else -1
+                headers.pop('Prefer')  # counting once is enough
+            if not rows or (start >= total if total >= 0 else len(rows) < page_size):
+                break
+
     def select(
         self,
         table: str,
         filters: Optional[Dict[str, Any]] = None,
-        columns: Optional[List[str]] = None
+        columns: Optional[List[str]] = None,
+        order: str = 'id.asc'
     ) -> List[Dict[str, Any]]:
         """
         SELECT query - retrieve rows from a table.
 
+        Reads every matching row via select_iter, so results are not capped
+        at PostgREST's max-rows setting.
+
         Args:
             table (str): Table name
             filters (Dict): Filter criteria as key-value pairs
             columns (List): Specific columns to return
+            order (str): PostgREST order clause on a unique key (e.g. 'id.asc')
 
         Returns:
             List[Dict]: Query results
@@ -54,40 +210,13 @@ class SupabaseClient:
         Raises:
             requests.RequestException: If API call fails
         """
-        url = f"{self.base_url}/{table}"
-        params = {}
-
-        # Add column selection
-        if columns:
-            params['select'] = ','.join(columns)
-        else:
-            params['select'] = '*'
-
-        # Add filters
-        if filters:
-            for key, value in filters.items():
-                if isinstance(value, str):
-                    params[f"{key}=eq.{value}"] = None
-                elif isinstance(value, (int, float)):
-                    params[f"{key}=eq.{value}"] = None
-                elif isinstance(value, bool):
-                    params[f"{key}=eq.{str(value).lower()}"] = None
-                elif isinstance(value, list):
-                    # For IN filters
-                    val_str = ','.join(str(v) for v in value)
-                    params[f"{key}=in.({val_str})"] = None
-
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json() if response.text else []
-        except requests.RequestException as e:
-            raise requests.RequestException(f"Supabase SELECT failed: {e}")
+        return list(self.select_iter(table, filters=filters, columns=columns, order=order))
 
     def insert(
         self,
         table: str,
-        data: Dict[str, Any]
+        data: Dict[str, Any],
+        return_rows: bool = False
     ) -> Dict[str, Any]:
         """
         INSERT a single row into a table.
@@ -95,9 +224,10 @@ class SupabaseClient:
         Args:
             table (str): Table name
             data (Dict): Row data
+            return_rows (bool): Have PostgREST send the inserted row back
 
         Returns:
-            Dict: Inserted row (if select='*' in response)
+            Dict: Inserted row if return_rows, else {}
 
         Raises:
             requests.RequestException: If API call fails
@@ -105,31 +235,73 @@ class SupabaseClient:
         url = f"{self.base_url}/{table}"
 
         try:
-            response = requests.post(
+            response = self._session.post(
                 url,
-                json=data,
-                headers=self.headers,
+                data=_json_dumps(data),
+                headers=self._write_headers(return_rows),
                 timeout=30
             )
             response.raise_for_status()
-            return response.json() if response.text else {}
+            return _json_loads(response.content) if return_rows and response.content else {}
         except requests.RequestException as e:
             raise requests.RequestException(f"Supabase INSERT failed: {e}")
 
+    def _post_batch(
+        self,
+        url: str,
+        data: List[Dict[str, Any]],
+        headers: Dict[str, str],
+        chunk_size: int,
+        max_concurrency: int,
+        return_rows: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        POST rows in sub-batches of chunk_size, up to max_concurrency at a time.
+
+        Chunks are committed independently, so a failure can leave earlier
+        chunks written.
+
+        Returns:
+            List[Dict]: Rows returned by each chunk, in input order ([] unless return_rows)
+        """
+        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)] or [data]
+
+        def post_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            response = self._session.post(url, data=_json_dumps(chunk), headers=headers, timeout=(5, 60))
+            response.raise_for_status()
+            return _json_loads(response.content) if return_rows and response.content else []
+
+        if len(chunks) == 1:
+            return post_chunk(chunks[0])
+
+        results = []
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks))) as executor:
+            for rows in executor.map(post_chunk, chunks):
+                results.extend(rows)
+        return results
+
     def insert_batch(
         self,
         table: str,
-        data: List[Dict[str, Any]]
+        data: List[Dict[str, Any]],
+        chunk_size: int = BATCH_CHUNK_SIZE,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+        return_rows: bool = False
     ) -> List[Dict[str, Any]]:
         """
         INSERT multiple rows into a table.
 
+        Large inputs are split into chunk_size sub-batches posted concurrently.
+
         Args:
             table (str): Table name
-            data (List[Dict]): List of rows to insert
+            data (List[Dict]): Rows to insert (msgspec.Struct rows also work when msgspec is installed)
+            chunk_size (int): Rows per request
+            max_concurrency (int): Maximum requests in flight
+            return_rows (bool): Have PostgREST send the inserted rows back
 
         Returns:
-            List[Dict]: Inserted rows
+            List[Dict]: Inserted rows if return_rows, else []
 
         Raises:
             requests.RequestException: If API call fails
@@ -137,14 +309,8 @@ class SupabaseClient:
         url = f"{self.base_url}/{table}"
 
         try:
-            response = requests.post(
-                url,
-                json=data,
-                headers=self.headers,
-                timeout=60
-            )
-            response.raise_for_status()
-            return response.json() if response.text else []
+            headers = self._write_headers(return_rows)
+            return self._post_batch(url, data, headers, chunk_size, max_concurrency, return_rows)
         except requests.RequestException as e:
             raise requests.RequestException(f"Supabase INSERT BATCH failed: {e}")
 
@@ -152,7 +318,8 @@ class SupabaseClient:
         self,
         table: str,
         filters: Dict[str, Any],
-        data: Dict[str, Any]
+        data: Dict[str, Any],
+        return_rows: bool = False
     ) -> List[Dict[str, Any]]:
         """
         UPDATE rows matching filters.
@@ -161,36 +328,29 @@ class SupabaseClient:
             table (str): Table name
             filters (Dict): Filter criteria
             data (Dict): Data to update
+            return_rows (bool): Have PostgREST send the updated rows back
 
         Returns:
-            List[Dict]: Updated rows
+            List[Dict]: Updated rows if return_rows, else []
 
         Raises:
             requests.RequestException: If API call fails
         """
         url = f"{self.base_url}/{table}"
-        params = {}
-
-        # Add filters to query string
-        if filters:
-            for key, value in filters.items():
-                if isinstance(value, str):
-                    params[f"{key}=eq.{value}"] = None
-                elif isinstance(value, (int, float)):
-                    params[f"{key}=eq.{value}"] = None
-                elif isinstance(value, bool):
-                    params[f"{key}=eq.{str(value).lower()}"] = None
+
+        query = _encode_filters(filters)
+        if query:
+            url = f"{url}?{query}"
 
         try:
-            response = requests.patch(
+            response = self._session.patch(
                 url,
-                json=data,
-                headers=self.headers,
-                params=params,
+                data=_json_dumps(data),
+                headers=self._write_headers(return_rows),
                 timeout=30
             )
             response.raise_for_status()
-            return response.json() if response.text else []
+            return _json_loads(response.content) if return_rows and response.content else []
         except requests.RequestException as e:
             raise requests.RequestException(f"Supabase UPDATE failed: {e}")
 
@@ -198,7 +358,8 @@ class SupabaseClient:
         self,
         table: str,
         data: Dict[str, Any],
-        on_conflict: str = "id"
+        on_conflict: str = "id",
+        return_rows: bool = False
     ) -> Dict[str, Any]:
         """
         UPSERT a row (insert if new, update if exists).
@@ -207,27 +368,27 @@ class SupabaseClient:
             table (str): Table name
             data (Dict): Row data
             on_conflict (str): Column to use for conflict detection (default 'id')
+            return_rows (bool): Have PostgREST send the written row back
 
         Returns:
-            Dict: Inserted/updated row
+            Dict: Inserted/updated row if return_rows, else {}
 
         Raises:
             requests.RequestException: If API call fails
         """
         url = f"{self.base_url}/{table}"
 
-        headers = self.headers.copy()
-        headers['Prefer'] = f'resolution=merge-duplicates,on_conflict={on_conflict}'
+        headers = self._write_headers(return_rows, f'resolution=merge-duplicates,on_conflict={on_conflict}')
 
         try:
-            response = requests.post(
+            response = self._session.post(
                 url,
-                json=data,
+                data=_json_dumps(data),
                 headers=headers,
                 timeout=30
             )
             response.raise_for_status()
-            return response.json() if response.text else {}
+            return _json_loads(response.content) if return_rows and response.content else {}
         except requests.RequestException as e:
             raise requests.RequestException(f"Supabase UPSERT failed: {e}")
 
@@ -235,36 +396,36 @@ class SupabaseClient:
         self,
         table: str,
         data: List[Dict[str, Any]],
-        on_conflict: str = "id"
+        on_conflict: str = "id",
+        chunk_size: int = BATCH_CHUNK_SIZE,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+        return_rows: bool = False
     ) -> List[Dict[str, Any]]:
         """
         UPSERT multiple rows.
 
+        Large inputs are split into chunk_size sub-batches posted concurrently.
+
         Args:
             table (str): Table name
-            data (List[Dict]): List of rows
+            data (List[Dict]): List of rows (dicts, or msgspec.Struct instances with msgspec)
             on_conflict (str): Column to use for conflict detection
+            chunk_size (int): Rows per request
+            max_concurrency (int): Maximum requests in flight
+            return_rows (bool): Have PostgREST send the written rows back
 
         Returns:
-            List[Dict]: Upserted rows
+            List[Dict]: Upserted rows if return_rows, else []
 
         Raises:
             requests.RequestException: If API call fails
         """
         url = f"{self.base_url}/{table}"
 
-        headers = self.headers.copy()
-        headers['Prefer'] = f'resolution=merge-duplicates,on_conflict={on_conflict}'
+        headers = self._write_headers(return_rows, f'resolution=merge-duplicates,on_conflict={on_conflict}')
 
         try:
-            response = requests.post(
-                url,
-                json=data,
-                headers=headers,
-                timeout=60
-            )
-            response.raise_for_status()
-            return response.json() if response.text else []
+            return self._post_batch(url, data, headers, chunk_size, max_concurrency, return_rows)
         except requests.RequestException as e:
             raise requests.RequestException(f"Supabase UPSERT BATCH failed: {e}")
 
@@ -287,32 +448,27 @@ class SupabaseClient:
             requests.RequestException: If API call fails
         """
         url = f"{self.base_url}/{table}"
-        params = {}
 
-        # Add filters
-        if filters:
-            for key, value in filters.items():
-                if isinstance(value, str):
-                    params[f"{key}=eq.{value}"] = None
-                elif isinstance(value, (int, float)):
-                    params[f"{key}=eq.{value}"] = None
+        query = _encode_filters(filters)
+        if query:
+            url = f"{url}?{query}"
 
         try:
-            response = requests.delete(
+            response = self._session.delete(
                 url,
                 headers=self.headers,
-                params=params,
                 timeout=30
             )
             response.raise_for_status()
-            return response.json() if response.text else []
+            return _json_loads(response.content) if response.content else []
         except requests.RequestException as e:
             raise requests.RequestException(f"Supabase DELETE failed: {e}")
 
     def count(
         self,
         table: str,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        exact: bool = False
     ) -> int:
         """
         COUNT rows in a table, optionally with filters.
@@ -320,33 +476,28 @@ class SupabaseClient:
         Args:
             table (str): Table name
             filters (Dict): Filter criteria
+            exact (bool): Use count=exact (a full scan) instead of the
+                planner's estimate (count=planned)
 
         Returns:
-            int: Row count
+            int: Row count (an estimate unless exact)
 
         Raises:
             requests.RequestException: If API call fails
         """
-        url = f"{self.base_url}/{table}"
+        url = f"{self.base_url}/{table}?select=count&limit=1"
 
         headers = self.headers.copy()
-        headers['Prefer'] = 'count=exact'
-
-        params = {'select': 'count', 'limit': '1'}
+        headers['Prefer'] = 'count=exact' if exact else 'count=planned'
 
-        # Add filters
-        if filters:
-            for key, value in filters.items():
-                if isinstance(value, str):
-                    params[f"{key}=eq.{value}"] = None
-                elif isinstance(value, (int, float)):
-                    params[f"{key}=eq.{value}"] = None
+        query = _encode_filters(filters)
+        if query:
+            url = f"{url}&{query}"
 
         try:
-            response = requests.get(
+            response = self._session.get(
                 url,
                 headers=headers,
-                params=params,
                 timeout=30
             )
             response.raise_for_status()
@@ -358,6 +509,7 @@ class SupabaseClient:
 
 if __name__ == "__main__":
     import argparse
+    import sys
 
     parser = argparse.ArgumentParser(description='Supabase REST API Client')
     parser.add_argument('--url', required=True, help='Supabase project URL')
@@ -367,6 +519,10 @@ if __name__ == "__main__":
                        help='Operation')
     parser.add_argument('--data', help='JSON data (for insert/update)')
     parser.add_argument('--filters', help='JSON filters')
+    parser.add_argument('--exact', action='store_true', help='Exact row count (slow on large tables)')
+
+    parser.add_argument('--output-format', choices=['json', 'jsonl'],
+                       help='Output format (default: jsonl for more than 1000 rows, else json)')
 
     args = parser.parse_args()
 
@@ -378,12 +534,23 @@ if __name__ == "__main__":
     if args.operation == 'select':
         result = client.select(args.table, filters=filters)
     elif args.operation == 'insert':
-        result = client.insert(args.table, data)
+        result = client.insert(args.table, data, return_rows=True)
     elif args.operation == 'update':
-        result = client.update(args.table, filters, data)
+        result = client.update(args.table, filters, data, return_rows=True)
     elif args.operation == 'delete':
         result = client.delete(args.table, filters)
     elif args.operation == 'count':
-        result = client.count(args.table, filters=filters)
-
-    print(json.dumps(result, indent=2))
+        result = client.count(args.table, filters=filters, exact=args.exact)
+
+    output_format = args.output_format
+    if output_format is None:
+        output_format = 'jsonl' if isinstance(result, list) and len(result) > 1000 else 'json'
+
+    if output_format == 'jsonl':
+        # One row per line, written as it is encoded; nothing is joined in memory
+        write = sys.stdout.buffer.write
+        for row in (result if isinstance(result, list) else [result]):
+            write(_json_dumps(row))
+            write(b"\n")
+    else:
+        print(json.dumps(result, indent=2))
@@ -4,11 +4,88 @@ Pulls GA4 data filtered to Meta Ads traffic and calculates performance metrics.
 """
 
 import json
-from typing import List, Dict, Any
+from array import array
+from operator import itemgetter
+from typing import List, Dict, Any, Tuple
+
+# NumPy is optional; large reports are scored column-wise when it is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Overall-score normalisation: metric * scale gives 100 at the typical value
+# (4% conversion rate, 90s session, 45 revenue per session)
+_CR_SCORE_SCALE = 100 / 4.0
+_DURATION_SCORE_SCALE = 100 / 90
+_RPS_SCORE_SCALE = 100 / 45
+
+# Metrics summed by LandingPageAnalyzer._account_totals
+_TOTALS_FIELDS = itemgetter('conversions', 'totalRevenue', 'sessions')
+
+# Funnel stages in cascade order; an event belongs to the first stage whose
+# name it contains. _STAGE_TABLE caches that resolution per event name.
+_FUNNEL_STAGES = ('page_view', 'add_to_cart', 'begin_checkout', 'purchase')
+_STAGE_TABLE = {
+    'page_view': 'page_view',
+    'add_to_cart': 'add_to_cart',
+    'begin_checkout': 'begin_checkout',
+    'purchase': 'purchase',
+    'ecommerce_purchase': 'purchase',
+}
+
+
+def _funnel_stage(event_name: str):
+    """Return the funnel stage for a lower-cased GA4 event name, or None."""
+    try:
+        return _STAGE_TABLE[event_name]
+    except KeyError:
+        stage = next((s for s in _FUNNEL_STAGES if s in event_name), None)
+        _STAGE_TABLE[event_name] = stage
+        return stage
+
+
+_NO_DEVICE_TYPE: Dict[str, Any] = {}
+
+
+def _device_type(page: Dict[str, Any]) -> Dict[str, Any]:
+    """The device_type field for an enriched page; empty without deviceCategory."""
+    if 'deviceCategory' in page:
+        return {'device_type': page['deviceCategory']}
+    return _NO_DEVICE_TYPE
+
+
+# Numba is optional too; it compiles the score kernel for the NumPy path
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None and np is not None:
+    @numba.njit(cache=True)
+    def _score_kernel(bounce: float, cr: float, duration: float, rps: float) -> float:
+        """Overall score for one page; same formula as _calculate_overall_score."""
+        bounce_score = max(0.0, 100.0 - bounce)
+        conversion_score = min(100.0, cr * _CR_SCORE_SCALE)
+        duration_score = min(100.0, duration * _DURATION_SCORE_SCALE)
+        revenue_score = min(100.0, rps * _RPS_SCORE_SCALE)
+        return bounce_score * 0.25 + conversion_score * 0.35 + duration_score * 0.15 + revenue_score * 0.25
+
+    @numba.njit(cache=True, parallel=True)
+    def _score_batch(bounce, cr, duration, rps):
+        """Overall scores for whole columns (float64 arrays of equal length)."""
+        out = np.empty(bounce.shape[0])
+        for i in numba.prange(bounce.shape[0]):
+            out[i] = _score_kernel(bounce[i], cr[i], duration[i], rps[i])
+        return out
+else:
+    _score_batch = None
 
 class LandingPageAnalyzer:
     """Analyzer for landing page performance using GA4 data."""
 
+    VECTORIZE_MIN_ROWS = 500  # below this the per-row loop is as fast
+
     def __init__(self, ga4_client):
         """
         Initialize landing page analyzer.
@@ -35,6 +112,16 @@ class LandingPageAnalyzer:
         Returns:
             List[Dict]: Landing page metrics with calculated scores
         """
+        # Column-wise fetch: metrics stay in flat float buffers until the
+        # enriched rows are built
+        if np is not None and hasattr(self.ga4_client, 'get_landing_page_columns'):
+            columns = self.ga4_client.get_landing_page_columns(
+                property_id=property_id,
+                date_range=date_range,
+                source_filter=source_filter
+            )
+            return self._enrich_columns(columns)
+
         # Query GA4 for landing page data
         landing_pages_data = self.ga4_client.get_landing_page_metrics(
             property_id=property_id,
@@ -58,44 +145,46 @@ class LandingPageAnalyzer:
         enriched = []
 
         # Calculate account-level averages
-        account_avg_cr = self._calculate_average_conversion_rate(raw_data)
-        account_avg_rps = self._calculate_average_revenue_per_session(raw_data)
+        account_avg_cr, account_avg_rps = self._account_totals(raw_data)
 
-        for page in raw_data:
-            enriched_page = page.copy()
+        if np is not None and len(raw_data) >= self.VECTORIZE_MIN_ROWS:
+            return self._enrich_vectorized(raw_data, account_avg_cr, account_avg_rps)
 
+        thresholds = self._verdict_thresholds(account_avg_cr, account_avg_rps)
+        for page in raw_data:
             # Calculate additional metrics
-            enriched_page['conversion_rate_pct'] = (
+            sessions = page.get('sessions', 0)
+            conversion_rate_pct = (
                 (page.get('conversions', 0) / page.get('sessions', 1)) * 100
-                if page.get('sessions', 0) > 0 else 0
+                if sessions > 0 else 0
             )
-
-            enriched_page['bounce_rate_pct'] = page.get('bounceRate', 0)
-
-            enriched_page['avg_session_duration_sec'] = page.get('avgSessionDuration', 0)
-
-            enriched_page['revenue_per_session'] = (
+            revenue_per_session = (
                 page.get('totalRevenue', 0) / page.get('sessions', 1)
-                if page.get('sessions', 0) > 0 else 0
+                if sessions > 0 else 0
             )
 
-            # Calculate mobile vs. desktop split (if available)
-            if 'deviceCategory' in page:
-                enriched_page['device_type'] = page['deviceCategory']
-
-            # Compare to account averages
-            enriched_page['conversion_rate_vs_avg'] = (
-                enriched_page['conversion_rate_pct'] / account_avg_cr * 100
-                if account_avg_cr > 0 else 0
-            )
-
-            enriched_page['revenue_per_session_vs_avg'] = (
-                enriched_page['revenue_per_session'] / account_avg_rps * 100
-                if account_avg_rps > 0 else 0
-            )
+            # One dict build per row instead of copy() plus a setitem per field
+            enriched_page = {
+                **page,
+                'conversion_rate_pct': conversion_rate_pct,
+                'bounce_rate_pct': page.get('bounceRate', 0),
+                'avg_session_duration_sec': page.get('avgSessionDuration', 0),
+                'revenue_per_session': revenue_per_session,
+                # Mobile vs. desktop split (if available)
+                **_device_type(page),
+                # Compare to account averages
+                'conversion_rate_vs_avg': (
+                    conversion_rate_pct / account_avg_cr * 100
+                    if account_avg_cr > 0 else 0
+                ),
+                'revenue_per_session_vs_avg': (
+                    revenue_per_session / account_avg_rps * 100
+                    if account_avg_rps > 0 else 0
+                ),
+            }
 
             # Assign verdict
-            enriched_page['verdict'] = self._calculate_verdict(enriched_page, account_avg_cr, account_avg_rps)
+            enriched_page['verdict'] = self._calculate_verdict(enriched_page, *thresholds)
 
             # Calculate overall score
             enriched_page['overall_score'] = self._calculate_overall_score(enriched_page)
@@ -107,58 +196,240 @@ class LandingPageAnalyzer:
 
         return enriched
 
-    def _calculate_average_conversion_rate(self, pages: List[Dict[str, Any]]) -> float:
-        """Calculate account-level average conversion rate."""
-        total_conversions = sum(p.get('conversions', 0) for p in pages)
-        total_sessions = sum(p.get('sessions', 0) for p in pages)
-        return (total_conversions / total_sessions * 100) if total_sessions > 0 else 0
+    def _enrich_vectorized(
+        self,
+        raw_data: List[Dict[str, Any]],
+        account_avg_cr: float,
+        account_avg_rps: float
+    ) -> List[Dict[str, Any]]:
+        """
+        NumPy version of the per-row enrichment in _enrich_landing_page_data.
 
-    def _calculate_average_revenue_per_session(self, pages: List[Dict[str, Any]]) -> float:
-        """Calculate account-level average revenue per session."""
-        total_revenue = sum(p.get('totalRevenue', 0) for p in pages)
-        total_sessions = sum(p.get('sessions', 0) for p in pages)
-        return (total_revenue / total_sessions) if total_sessions > 0 else 0
+        Computes every metric, verdict and score as whole-column operations
+        and produces the same rows in the same order as the loop.
 
-    def _calculate_verdict(
+        Args:
+            raw_data: Raw landing page metrics from GA4
+            account_avg_cr: Account average conversion rate
+            account_avg_rps: Account average revenue per session
+
+        Returns:
+            List: Enriched data with scores and verdicts
+        """
+        n = len(raw_data)
+
+        def column(key: str):
+            return np.fromiter((p.get(key, 0) for p in raw_data), dtype=np.float64, count=n)
+
+        return self._enrich_arrays(
+            raw_data,
+            column('sessions'), column('conversions'), column('totalRevenue'),
+            column('bounceRate'), column('avgSessionDuration'),
+            account_avg_cr, account_avg_rps
+        )
+
+    def _enrich_columns(self, columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Enrich a column-wise landing page report (GA4APIClient.get_landing_page_columns).
+
+        Metric columns are read in place as float64 arrays; row dicts are only
+        built for the returned records. Small reports go through the per-row
+        loop instead.
+
+        Args:
+            columns: Field name -> column of values, all of equal length
+
+        Returns:
+            List: Enriched data with scores and verdicts
+        """
+        names = list(columns)
+        pages = [dict(zip(names, values)) for values in zip(*columns.values())]
+        n = len(pages)
+        if n < self.VECTORIZE_MIN_ROWS:
+            return self._enrich_landing_page_data(pages)
+
+        def column(key: str):
+            values = columns.get(key)
+            if values is None:
+                return np.zeros(n)
+            if isinstance(values, array):
+                return np.frombuffer(values, dtype=np.float64)
+            return np.fromiter((v or 0 for v in values), dtype=np.float64, count=n)
+
+        sessions = column('sessions')
+        conversions = column('conversions')
+        revenue = column('totalRevenue')
+
+        total_sessions = float(sessions.sum())
+        if total_sessions > 0:
+            account_avg_cr = float(conversions.sum()) / total_sessions * 100
+            account_avg_rps = float(revenue.sum()) / total_sessions
+        else:
+            account_avg_cr = account_avg_rps = 0
+
+        return self._enrich_arrays(
+            pages, sessions, conversions, revenue,
+            column('bounceRate'), column('avgSessionDuration'),
+            account_avg_cr, account_avg_rps
+        )
+
+    def _enrich_arrays(
         self,
-        page: Dict[str, Any],
+        pages: List[Dict[str, Any]],
+        sessions, conversions, revenue, br, asd,
         account_avg_cr: float,
         account_avg_rps: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Score float64 metric columns and merge the results into new page dicts.
+
+        Args:
+            pages: Raw landing page rows, in column order
+            sessions, conversions, revenue, br, asd: Metric columns
+            account_avg_cr: Account average conversion rate
+            account_avg_rps: Account average revenue per session
+
+        Returns:
+            List: Enriched data with scores and verdicts
+        """
+        n = len(pages)
+
+        has_sessions = sessions > 0
+        cr = np.divide(conversions, sessions, out=np.zeros(n), where=has_sessions) * 100
+        rps = np.divide(revenue, sessions, out=np.zeros(n), where=has_sessions)
+
+        cr_vs_avg = cr / account_avg_cr * 100 if account_avg_cr > 0 else np.zeros(n)
+        rps_vs_avg = rps / account_avg_rps * 100 if account_avg_rps > 0 else np.zeros(n)
+
+        # Same ladder as _calculate_verdict, as boolean masks. The nested
+        # np.where applies them in ladder order, so later masks need not
+        # exclude earlier ones.
+        cr_kill, cr_keep, rps_fix, rps_keep = self._verdict_thresholds(account_avg_cr, account_avg_rps)
+        kill = (br > 65) | (cr < cr_kill) | ((sessions > 100) & (cr < 1.0)) | (asd < 10)
+        fix = ((br >= 50) & (br <= 65)) | ((cr >= cr_kill) & (cr < cr_keep)) | (rps < rps_fix)
+        keep = ((cr >= cr_keep) | (rps >= rps_keep)) & (br < 50)
+        verdict = np.where(
+            sessions < 10, 'INSUFFICIENT_DATA',
+            np.where(kill, 'KILL', np.where(fix, 'FIX', np.where(keep, 'KEEP', 'WATCH')))
+        )
+
+        # Same weights and caps as _calculate_overall_score
+        if _score_batch is not None:
+            score = _score_batch(br, cr, asd, rps)
+        else:
+            score = (
+                np.maximum(0, 100 - br) * 0.25 +
+                np.minimum(100, cr * _CR_SCORE_SCALE) * 0.35 +
+                np.minimum(100, asd * _DURATION_SCORE_SCALE) * 0.15 +
+                np.minimum(100, rps * _RPS_SCORE_SCALE) * 0.25
+            )
+
+        columns = zip(
+            cr.tolist(), br.tolist(), asd.tolist(), rps.tolist(),
+            cr_vs_avg.tolist(), rps_vs_avg.tolist(), verdict.tolist(), score.tolist()
+        )
+        enriched = []
+        for page, (page_cr, page_br, page_asd, page_rps, page_crva, page_rpsva, page_verdict, page_score) \
+                in zip(pages, columns):
+            enriched.append({
+                **page,
+                'conversion_rate_pct': page_cr,
+                'bounce_rate_pct': page.get('bounceRate', 0),
+                'avg_session_duration_sec': page.get('avgSessionDuration', 0),
+                'revenue_per_session': page_rps,
+                **_device_type(page),
+                'conversion_rate_vs_avg': page_crva,
+                'revenue_per_session_vs_avg': page_rpsva,
+                'verdict': page_verdict,
+                'overall_score': round(page_score, 1),
+            })
+
+        # Sort by revenue per session (most valuable first); stable like list.sort
+        order = np.argsort(-rps, kind='stable')
+        return [enriched[i] for i in order.tolist()]
+
+    def _account_totals(self, pages: List[Dict[str, Any]]) -> Tuple[float, float]:
+        """
+        Calculate account-level average conversion rate and revenue per session.
+
+        Args:
+            pages: Landing page metrics
+
+        Returns:
+            Tuple: (average conversion rate %, average revenue per session)
+        """
+        total_conversions = total_revenue = total_sessions = 0
+        try:
+            # GA4 rows normally carry every metric; itemgetter reads all three in one C call
+            for conversions, revenue, sessions in map(_TOTALS_FIELDS, pages):
+                total_conversions += conversions
+                total_revenue += revenue
+                total_sessions += sessions
+        except KeyError:
+            total_conversions = total_revenue = total_sessions = 0
+            for p in pages:
+                total_conversions += p.get('conversions', 0)
+                total_revenue += p.get('totalRevenue', 0)
+                total_sessions += p.get('sessions', 0)
+
+        if total_sessions <= 0:
+            return 0, 0
+        return total_conversions / total_sessions * 100, total_revenue / total_sessions
+
+    @staticmethod
+    def _verdict_thresholds(account_avg_cr: float, account_avg_rps: float) -> Tuple[float, float, float, float]:
+        """Return (cr_kill, cr_keep, rps_fix, rps_keep) for _calculate_verdict."""
+        return account_avg_cr * 0.5, account_avg_cr, account_avg_rps * 0.5, account_avg_rps
+
+    def _calculate_verdict(
+        self,
+        page: Dict[str, Any],
+        cr_kill: float,
+        cr_keep: float,
+        rps_fix: float,
+        rps_keep: float
     ) -> str:
         """
         Calculate KEEP/FIX/KILL verdict for a landing page.
 
+        The thresholds depend only on the account averages, so callers
+        compute them once per report (see _verdict_thresholds).
+
         Args:
             page: Page metrics
-            account_avg_cr: Account average conversion rate
-            account_avg_rps: Account average revenue per session
+            cr_kill: Conversion rate below which a page is killed (half the account average)
+            cr_keep: Account average conversion rate
+            rps_fix: Revenue per session below which a page needs fixing (half the account average)
+            rps_keep: Account average revenue per session
 
         Returns:
             str: Verdict (KEEP, FIX, or KILL)
         """
-        cr = page.get('conversion_rate_pct', 0)
-        br = page.get('bounce_rate_pct', 0)
-        sessions = page.get('sessions', 0)
-        rps = page.get('revenue_per_session', 0)
+        get = page.get
+        cr = get('conversion_rate_pct', 0)
+        br = get('bounce_rate_pct', 0)
+        sessions = get('sessions', 0)
+        rps = get('revenue_per_session', 0)
+        avg_session_duration = get('avgSessionDuration', 0)
 
         # Minimum sessions threshold (need enough data)
         if sessions < 10:
             return 'INSUFFICIENT_DATA'
 
         # KILL criteria
-        if br > 65 or cr < (account_avg_cr * 0.5) or (sessions > 100 and cr < 1.0):
+        if br > 65 or cr < cr_kill or (sessions > 100 and cr < 1.0):
             return 'KILL'
 
         # Ultra-short sessions indicator (potential technical issue)
-        if page.get('avgSessionDuration', 0) < 10:
+        if avg_session_duration < 10:
             return 'KILL'
 
         # FIX criteria
-        if (50 <= br <= 65) or (account_avg_cr * 0.5 <= cr < account_avg_cr) or (rps < account_avg_rps * 0.5):
+        if (50 <= br <= 65) or (cr_kill <= cr < cr_keep) or (rps < rps_fix):
             return 'FIX'
 
         # KEEP criteria
-        if cr >= account_avg_cr or rps >= account_avg_rps:
+        if cr >= cr_keep or rps >= rps_keep:
             if br < 50:
                 return 'KEEP'
 
@@ -175,21 +446,19 @@ class LandingPageAnalyzer:
         Returns:
             float: Score from 0 to 100
         """
+        get = page.get
+
         # Bounce rate score (lower bounce = higher score)
-        bounce_score = max(0, 100 - page.get('bounce_rate_pct', 100))
+        bounce_score = max(0, 100 - get('bounce_rate_pct', 100))
 
-        # Conversion rate score (higher CR = higher score)
-        # Normalize to account average (assume 4% typical account avg)
-        typical_cr = 4.0
-        conversion_score = min(100, (page.get('conversion_rate_pct', 0) / typical_cr) * 100)
+        # Conversion rate score (higher CR = higher score), against a 4% typical account avg
+        conversion_score = min(100, get('conversion_rate_pct', 0) * _CR_SCORE_SCALE)
 
         # Session duration score (higher duration = higher engagement)
-        typical_duration = 90
-        duration_score = min(100, (page.get('avg_session_duration_sec', 0) / typical_duration) * 100)
+        duration_score = min(100, get('avg_session_duration_sec', 0) * _DURATION_SCORE_SCALE)
 
         # Revenue score
-        typical_rps = 45
-        revenue_score = min(100, (page.get('revenue_per_session', 0) / typical_rps) * 100)
+        revenue_score = min(100, get('revenue_per_session', 0) * _RPS_SCORE_SCALE)
 
         # Weighted average
         score = (
@@ -286,15 +555,9 @@ class LandingPageAnalyzer:
         }
 
         for event in funnel_data:
-            event_name = event.get('eventName', '').lower()
-            if 'page_view' in event_name:
-                funnel_stages['page_view'] += event.get('eventCount', 0)
-            elif 'add_to_cart' in event_name:
-                funnel_stages['add_to_cart'] += event.get('eventCount', 0)
-            elif 'begin_checkout' in event_name:
-                funnel_stages['begin_checkout'] += event.get('eventCount', 0)
-            elif 'purchase' in event_name:
-                funnel_stages['purchase'] += event.get('eventCount', 0)
+            stage = _funnel_stage(event.get('eventName', '').lower())
+            if stage:
+                funnel_stages[stage] += event.get('eventCount', 0)
 
         # Calculate drop-off rates
         base_count = max(funnel_stages['page_view'], 1)
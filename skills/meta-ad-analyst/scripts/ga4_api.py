@@ -1,52 +1,156 @@
 #!/usr/bin/env python3
 """GA4 Data API helper — pull reports with dimensions/metrics/filters."""
-import json, subprocess, sys, time
-from datetime import datetime, timedelta
+import hashlib, json, os, sys, threading, time
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
 
-def get_access_token(sa_path):
-    """Get OAuth2 token from service account JSON using gcloud or manual JWT."""
-    try:
-        result = subprocess.run(
-            ["python3", "-c", f"""
-import json, time, urllib.request, urllib.parse
-from hashlib import sha256
-import hmac, base64, struct
-
-sa = json.load(open("{sa_path}"))
-# Use google.auth if available
+_value = itemgetter('value')
+_name = itemgetter('name')
+
+# orjson (optional) parses large report bodies straight from bytes, faster than json
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    _dumps = lambda obj: json.dumps(obj).encode()
+
+GA4_SCOPE = "https://www.googleapis.com/auth/analytics.readonly"
+
+# Token minting runs in-process: google-auth if installed, else a PyJWT-signed grant
 try:
     from google.oauth2 import service_account
     from google.auth.transport.requests import Request
-    creds = service_account.Credentials.from_service_account_file(
-        "{sa_path}", scopes=["https://www.googleapis.com/auth/analytics.readonly"])
-    creds.refresh(Request())
-    print(creds.token)
 except ImportError:
-    # Manual JWT approach
+    service_account = None
+try:
     import jwt as pyjwt
+except ImportError:
+    pyjwt = None
+
+# Optional: a pooled requests session keeps the TLS connection to the Data API
+# open across reports (urllib opens a new one per call)
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    _SESSION = requests.Session()
+    _SESSION.mount("https://", HTTPAdapter(pool_maxsize=4, max_retries=Retry(
+        total=3, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None)))  # runReport is a read, so POST is safe to retry
+except ImportError:
+    _SESSION = None
+
+# Tokens live ~1h; reuse them across runs while more than TOKEN_MIN_TTL seconds remain
+TOKEN_CACHE_DIR = os.path.expanduser("~/.cache/ga4_tokens")
+TOKEN_MIN_TTL = 300
+
+_credentials = {}  # sa_path -> google-auth Credentials (key file parsed once)
+_credentials_lock = threading.Lock()  # reports pulled concurrently share the Credentials
+_tokens = {}  # sa_path -> (token, expires_at)
+
+def _mint_jwt_token(sa_path):
+    """Exchange a PyJWT-signed assertion for an access token; returns (token, expires_at)."""
+    import urllib.parse, urllib.request
+    if pyjwt is None:
+        raise RuntimeError("neither google-auth nor PyJWT is installed")
+    with open(sa_path) as f:
+        sa = json.load(f)
     now = int(time.time())
-    payload = {{
+    payload = {
         "iss": sa["client_email"],
-        "scope": "https://www.googleapis.com/auth/analytics.readonly",
+        "scope": GA4_SCOPE,
         "aud": "https://oauth2.googleapis.com/token",
         "iat": now, "exp": now + 3600
-    }}
+    }
     signed = pyjwt.encode(payload, sa["private_key"], algorithm="RS256")
-    data = urllib.parse.urlencode({{"grant_type": "urn:ietf:params:oauth:grant_type:jwt-bearer", "assertion": signed}}).encode()
-    resp = urllib.request.urlopen("https://oauth2.googleapis.com/token", data)
-    print(json.loads(resp.read())["access_token"])
-"""],
-            capture_output=True, text=True, timeout=30
-        )
-        return result.stdout.strip()
+    data = urllib.parse.urlencode({"grant_type": "urn:ietf:params:oauth:grant_type:jwt-bearer", "assertion": signed}).encode()
+    resp = json.loads(urllib.request.urlopen("https://oauth2.googleapis.com/token", data, timeout=30).read())
+    return resp["access_token"], now + resp.get("expires_in", 3600)
+
+def _mint_token(sa_path):
+    """Fetch a fresh access token; returns (token, expires_at epoch seconds)."""
+    if service_account is None:
+        return _mint_jwt_token(sa_path)
+    with _credentials_lock:
+        creds = _credentials.get(sa_path)
+        if creds is None:
+            creds = service_account.Credentials.from_service_account_file(sa_path, scopes=[GA4_SCOPE])
+            _credentials[sa_path] = creds
+        creds.refresh(Request())
+        # google-auth reports expiry as a naive UTC datetime
+        expires_at = creds.expiry.replace(tzinfo=timezone.utc).timestamp() if creds.expiry else time.time() + 3600
+        return creds.token, expires_at
+
+def _token_cache_path(sa_path):
+    return os.path.join(TOKEN_CACHE_DIR, hashlib.sha256(sa_path.encode()).hexdigest() + ".json")
+
+def get_access_token(sa_path):
+    """Get OAuth2 token from service account JSON using google-auth or manual JWT.
+
+    Tokens are reused, in-process and from ~/.cache/ga4_tokens, while more
+    than TOKEN_MIN_TTL seconds of validity remain.
+    """
+    cached = _tokens.get(sa_path)
+    if cached and cached[1] - time.time() > TOKEN_MIN_TTL:
+        return cached[0]
+
+    path = _token_cache_path(sa_path)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data["exp"] - time.time() > TOKEN_MIN_TTL:
+            _tokens[sa_path] = (data["token"], data["exp"])
+            return data["token"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # missing, unreadable or stale: mint a new one
+
+    try:
+        token, expires_at = _mint_token(sa_path)
     except Exception as e:
         raise RuntimeError(f"Failed to get GA4 token: {e}")
+    _tokens[sa_path] = (token, expires_at)
 
-def run_report(token, property_id, dimensions, metrics, date_start=None, date_end=None,
-               dimension_filter=None, limit=10000):
-    """Run a GA4 Data API report."""
-    import urllib.request
+    # Owner-only file, written via a temp file so readers never see half a token
+    try:
+        os.makedirs(TOKEN_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"token": token, "exp": expires_at}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # the cache is an optimisation only
+    return token
+
+REPORT_PAGE_SIZE = 10000
+REPORT_PAGE_WORKERS = 4
+
+def _post_report(token, url, body):
+    """POST one runReport request and return the decoded response."""
+    if _SESSION is not None:
+        resp = _SESSION.post(url, data=_dumps(body), timeout=60,
+                             headers={"Authorization": f"Bearer {token}",
+                                      "Content-Type": "application/json"})
+        resp.raise_for_status()
+        return _loads(resp.content)
     
+    import urllib.request
+    req = urllib.request.Request(url, data=_dumps(body),
+                                 headers={"Authorization": f"Bearer {token}",
+                                          "Content-Type": "application/json"})
+    resp = urllib.request.urlopen(req, timeout=60)
+    return _loads(resp.read())
+
+def run_report(token, property_id, dimensions, metrics, date_start=None, date_end=None,
+               dimension_filter=None, limit=None):
+    """Run a GA4 Data API report.
+
+    With limit=None every row is returned: the first page reports rowCount and
+    any further REPORT_PAGE_SIZE pages are fetched concurrently and appended in
+    order. An explicit limit makes a single request for at most that many rows.
+    """
     if not date_start:
         date_start = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
     if not date_end:
@@ -56,30 +160,40 @@ def run_report(token, property_id, dimensions, metrics, date_start=None, date_en
         "dateRanges": [{"startDate": date_start, "endDate": date_end}],
         "dimensions": [{"name": d} for d in dimensions],
         "metrics": [{"name": m} for m in metrics],
-        "limit": limit,
+        "limit": limit or REPORT_PAGE_SIZE,
     }
     if dimension_filter:
         body["dimensionFilter"] = dimension_filter
     
     url = f"https://analyticsdata.googleapis.com/v1beta/properties/{property_id}:runReport"
-    req = urllib.request.Request(url, data=json.dumps(body).encode(),
-                                 headers={"Authorization": f"Bearer {token}",
-                                          "Content-Type": "application/json"})
-    resp = urllib.request.urlopen(req, timeout=60)
-    return json.loads(resp.read().decode())
+    response = _post_report(token, url, body)
+    if limit is not None:
+        return response
+    
+    offsets = range(REPORT_PAGE_SIZE, response.get("rowCount", 0), REPORT_PAGE_SIZE)
+    if offsets:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=REPORT_PAGE_WORKERS) as pool:
+            pages = pool.map(lambda offset: _post_report(token, url, {**body, "offset": offset}), offsets)
+            rows = response.setdefault("rows", [])
+            for page in pages:
+                rows.extend(page.get("rows", []))
+    return response
 
 def parse_report(response):
     """Parse GA4 report response into list of dicts."""
+    # GA4 omits 'rows' entirely when the date range has no data
+    raw_rows = response.get('rows')
+    if not raw_rows:
+        return []
+    
     rows = []
-    dim_headers = [h['name'] for h in response.get('dimensionHeaders', [])]
-    met_headers = [h['name'] for h in response.get('metricHeaders', [])]
+    dim_headers = tuple(map(_name, response.get('dimensionHeaders', ())))
+    met_headers = tuple(map(_name, response.get('metricHeaders', ())))
     
-    for row in response.get('rows', []):
-        entry = {}
-        for i, d in enumerate(row.get('dimensionValues', [])):
-            entry[dim_headers[i]] = d['value']
-        for i, m in enumerate(row.get('metricValues', [])):
-            entry[met_headers[i]] = m['value']
+    for row in raw_rows:
+        entry = dict(zip(dim_headers, map(_value, row.get('dimensionValues', ()))))
+        entry.update(zip(met_headers, map(_value, row.get('metricValues', ()))))
         rows.append(entry)
     return rows
 
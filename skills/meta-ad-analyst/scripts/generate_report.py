@@ -26,20 +26,77 @@ Triple-source metrics in ALL tables:
 
 import argparse
 import base64
+import functools
+import gzip
+import hashlib
+import heapq
 import json
 import os
+import shutil
 import sys
+import threading
 import time
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # dayparting stats fall back to a per-hour loop
+
+# Numba is optional too; it compiles the dayparting verdict ladder
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# pyahocorasick (optional) matches all ad set country tags in one pass
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Add parent scripts dir to path
 sys.path.insert(0, os.path.dirname(__file__))
-from meta_api import load_token, get_insights, get_adsets, get_ads_with_creative, get_ad_creative_detail, get_action, get_action_value, api_get
+from meta_api import load_token, get_insights, get_adsets, get_ads_with_creative, get_ad_creative_detail, api_get
 from ga4_api import get_access_token, run_report, parse_report, make_source_filter
 
 
+# Meta reports purchases under either action type; the first non-zero one wins
+PURCHASE_ACTIONS = ('purchase', 'offsite_conversion.fb_pixel_purchase')
+
+
+def _purchase_value(entries):
+    first = {}
+    for a in entries:
+        action_type = a['action_type']
+        if action_type in PURCHASE_ACTIONS and action_type not in first:
+            first[action_type] = a['value']
+    for action_type in PURCHASE_ACTIONS:
+        value = float(first.get(action_type, 0))
+        if value:
+            return value
+    return 0
+
+
+def extract_purchase(row):
+    """Return (purchases, revenue) for a Meta insights row.
+
+    One pass over actions and one over action_values; same result as
+    get_action(row, 'purchase') or get_action(row, 'offsite_conversion.fb_pixel_purchase') or 0
+    and its get_action_value counterpart.
+    """
+    return _purchase_value(row.get('actions', [])), _purchase_value(row.get('action_values', []))
+
+
+def with_spend(rows):
+    """Pair each Meta row with its spend as a float, so it is parsed only once."""
+    return [(float(r.get('spend', 0)), r) for r in rows]
+
+
 def calc_triple(meta_spend, meta_purchases, meta_revenue, ga4_purchases, ga4_revenue):
     """Calculate triple-source metrics."""
     ar_purchases = round(ga4_purchases * 1.2) if ga4_purchases else 0
@@ -48,6 +105,17 @@ def calc_triple(meta_spend, meta_purchases, meta_revenue, ga4_purchases, ga4_rev
     def safe_div(a, b):
         return round(a / b, 2) if b else 0
 
+    # Meta-vs-GA4 purchase discrepancy, classified once for the tracking health check
+    over_report_pct = round((meta_purchases / ga4_purchases - 1) * 100) if ga4_purchases else 0
+    if not ga4_purchases:
+        disc_status = "INVESTIGATE — no GA4 conversions"
+    elif over_report_pct <= 30:
+        disc_status = "NORMAL"
+    elif over_report_pct <= 100:
+        disc_status = "ELEVATED"
+    else:
+        disc_status = "INVESTIGATE"
+
     return {
         "spend": round(meta_spend, 2),
         "meta": {
@@ -68,7 +136,8 @@ def calc_triple(meta_spend, meta_purchases, meta_revenue, ga4_purchases, ga4_rev
             "cpa": safe_div(meta_spend, ar_purchases),
             "roas": safe_div(ar_revenue, meta_spend),
         },
-        "over_report_pct": round((meta_purchases / ga4_purchases - 1) * 100) if ga4_purchases else 0,
+        "over_report_pct": over_report_pct,
+        "disc_status": disc_status,
     }
 
 
@@ -80,13 +149,24 @@ def fmt_roas(v):
     return f"{v:.2f}x" if v else "0.00x"
 
 
+# One bound format call per row. Money/ROAS fields are passed as `v or 0`, which
+# renders falsy values (0, -0.0, None) exactly as fmt_money/fmt_roas do.
+_TRIPLE_TMPL = (
+    "| {} | ${:,.2f} | "
+    "{} | ${:,.2f} | {:.2f}x | "
+    "{} | ${:,.2f} | {:.2f}x | "
+    "{} | ${:,.2f} | {:.2f}x |"
+).format
+
+
 def triple_row(label, t):
     """Format a triple-source table row."""
-    return (
-        f"| {label} | {fmt_money(t['spend'])} | "
-        f"{t['meta']['purchases']} | {fmt_money(t['meta']['cpa'])} | {fmt_roas(t['meta']['roas'])} | "
-        f"{t['ga4']['purchases']} | {fmt_money(t['ga4']['cpa'])} | {fmt_roas(t['ga4']['roas'])} | "
-        f"{t['ar']['purchases']} | {fmt_money(t['ar']['cpa'])} | {fmt_roas(t['ar']['roas'])} |"
+    meta, ga4, ar = t['meta'], t['ga4'], t['ar']
+    return _TRIPLE_TMPL(
+        label, t['spend'] or 0,
+        meta['purchases'], meta['cpa'] or 0, meta['roas'] or 0,
+        ga4['purchases'], ga4['cpa'] or 0, ga4['roas'] or 0,
+        ar['purchases'], ar['cpa'] or 0, ar['roas'] or 0,
     )
 
 
@@ -98,190 +178,205 @@ TRIPLE_HEADER = (
 
 # ── Report sections ──────────────────────────────────────────────────────────
 
-def section_snapshot(account_name, period_label, days, totals, prev_totals=None):
+def section_snapshot(out, account_name, period_label, days, totals, prev_totals=None):
     """Section 1: Account Snapshot."""
     t = totals
-    lines = [
+    out.extend([
         f"## 1. ACCOUNT SNAPSHOT\n",
         f"Over the last {days} days you spent {fmt_money(t['spend'])} generating "
         f"{t['ga4']['purchases']} GA4-verified conversions (Assumed Real: {t['ar']['purchases']}) "
         f"at a True CPA of {fmt_money(t['ar']['cpa'])} and True ROAS of {fmt_roas(t['ar']['roas'])}.",
         f"\nMeta over-reporting: {t['over_report_pct']}% "
         f"(Meta claims {t['meta']['purchases']} purchases vs GA4's {t['ga4']['purchases']}).",
-    ]
+    ])
     if prev_totals:
         p = prev_totals
         cpa_change = ((t['ar']['cpa'] / p['ar']['cpa']) - 1) * 100 if p['ar']['cpa'] else 0
         roas_change = ((t['ar']['roas'] / p['ar']['roas']) - 1) * 100 if p['ar']['roas'] else 0
         direction = "improved" if cpa_change < 0 else "worsened"
-        lines.append(
+        out.append(
             f"\nvs Previous {days}d: CPA {direction} {abs(cpa_change):.0f}% "
             f"({fmt_money(p['ar']['cpa'])} → {fmt_money(t['ar']['cpa'])}), "
             f"ROAS {fmt_roas(p['ar']['roas'])} → {fmt_roas(t['ar']['roas'])}."
         )
 
-    lines.append(f"\n{TRIPLE_HEADER}")
-    lines.append(triple_row("TOTAL", t))
-    return "\n".join(lines)
+    out.append(f"\n{TRIPLE_HEADER}")
+    out.append(triple_row("TOTAL", t))
 
 
-def section_campaigns(campaign_data):
+def section_campaigns(out, campaign_data):
     """Section 3: Campaign-by-campaign verdict."""
-    lines = [
+    # Drop small campaigns before sorting and formatting; sort by AR ROAS descending
+    rows = [c for c in campaign_data if c['spend'] >= 10]
+    rows.sort(key=lambda x: x.get('ar', {}).get('roas', 0), reverse=True)
+    out.extend([
         "## 3. CAMPAIGN-BY-CAMPAIGN VERDICT\n",
         TRIPLE_HEADER,
-    ]
-    # Sort by AR ROAS descending
-    sorted_c = sorted(campaign_data, key=lambda x: x.get('ar', {}).get('roas', 0), reverse=True)
-    for c in sorted_c:
-        if c['spend'] < 10:
-            continue
-        label = c.get('name', c.get('id', 'Unknown'))[:40]
-        lines.append(triple_row(label, c))
-    return "\n".join(lines)
+    ])
+    out.extend(triple_row(c.get('name', c.get('id', 'Unknown'))[:40], c) for c in rows)
 
 
-def section_segments(breakdown_data, title, segment_key):
+def section_segments(out, breakdown_data, title, segment_key):
     """Generic segment breakdown section."""
-    lines = [
+    rows = [s for s in breakdown_data if s['spend'] >= 10]
+    rows.sort(key=lambda x: x.get('ar', {}).get('roas', 0), reverse=True)
+    out.extend([
         f"## {title}\n",
         TRIPLE_HEADER,
-    ]
-    sorted_s = sorted(breakdown_data, key=lambda x: x.get('ar', {}).get('roas', 0), reverse=True)
-    for s in sorted_s:
-        if s['spend'] < 10:
-            continue
-        label = str(s.get(segment_key, 'Unknown'))[:30]
-        lines.append(triple_row(label, s))
-    return "\n".join(lines)
+    ])
+    out.extend(triple_row(str(s.get(segment_key, 'Unknown'))[:30], s) for s in rows)
 
 
-def section_waste(waste_items):
+def section_waste(out, waste_items):
     """Section 7: Waste summary."""
-    lines = ["## 7. WASTE SUMMARY\n"]
+    out.append("## 7. WASTE SUMMARY\n")
     total_waste = 0
     for w in waste_items:
-        lines.append(f"- **{w['category']}**: {fmt_money(w['amount'])}/period — {w['description']}")
+        out.append(f"- **{w['category']}**: {fmt_money(w['amount'])}/period — {w['description']}")
         total_waste += w['amount']
-    lines.append(f"\n**Total estimated waste: {fmt_money(total_waste)}/period**")
-    return "\n".join(lines)
+    out.append(f"\n**Total estimated waste: {fmt_money(total_waste)}/period**")
 
 
-def section_actions(recommendations):
+def section_actions(out, recommendations):
     """Section 8: Action plan."""
-    lines = ["## 8. ACTION PLAN — DO THIS NOW\n"]
+    out.append("## 8. ACTION PLAN — DO THIS NOW\n")
     for i, r in enumerate(recommendations, 1):
         emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(r.get('priority', 'low'), '⚪')
-        lines.append(f"{emoji} **{i}. {r['action']}**")
-        lines.append(f"   Impact: {r.get('impact', 'TBD')} | Effort: {r.get('effort', 'TBD')}")
+        out.append(f"{emoji} **{i}. {r['action']}**")
+        out.append(f"   Impact: {r.get('impact', 'TBD')} | Effort: {r.get('effort', 'TBD')}")
         if r.get('details'):
-            lines.append(f"   {r['details']}")
-        lines.append("")
-    return "\n".join(lines)
+            out.append(f"   {r['details']}")
+        out.append("")
 
 
 # ── Data pulling ─────────────────────────────────────────────────────────────
 
-def pull_meta_data(token, account_id, date_start, date_end, campaign_ids=None):
-    """Pull Meta insights at account and campaign level."""
+# Breakdown name -> Meta breakdowns parameter
+BREAKDOWNS = [("age_gender", "age,gender"), ("device", "device_platform"),
+              ("placement", "publisher_platform,platform_position"),
+              ("hourly", "hourly_stats_aggregated_by_advertiser_time_zone")]
+
+# API calls are round-trip bound, so each pull issues them all at once
+API_MAX_WORKERS = 10
+
+API_CACHE_DIR = Path.home() / ".cache" / "meta-ad-analyst"
+
+
+def cached_api(ttl_days=7):
+    """Cache an API call's response on disk, keyed by its arguments.
+
+    Only closed windows are cached: a call whose date range ends yesterday or
+    later is still settling and always goes to the API. The leading access
+    token is left out of the key (and off disk). Cache errors fall through to
+    a live call.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(token, *args, **kwargs):
+            date_end = kwargs.get('date_end') or (kwargs.get('time_range') or {}).get('until')
+            yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+            if not date_end or date_end >= yesterday:
+                return fn(token, *args, **kwargs)
+
+            key = json.dumps([fn.__name__, args, kwargs], sort_keys=True, default=str)
+            path = API_CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.json.gz"
+            try:
+                if time.time() - path.stat().st_mtime < ttl_days * 86400:
+                    with gzip.open(path, 'rt') as f:
+                        return json.load(f)
+            except (OSError, ValueError):
+                pass  # missing, expired or unreadable
+
+            result = fn(token, *args, **kwargs)
+            try:
+                API_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with gzip.open(tmp, 'wt') as f:
+                    json.dump(result, f)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+            return result
+        return wrapper
+    return decorator
+
+
+def pull_meta_data(token, account_id, date_start, date_end, campaign_ids=None, use_cache=True):
+    """Pull Meta insights at account and campaign level.
+
+    All insight requests are issued concurrently; results are collected in
+    the same order and with the same failure handling as sequential calls.
+    """
     time_range = {"since": date_start, "until": date_end}
+    fetch = cached_api()(get_insights) if use_cache else get_insights
 
-    # Account level
-    account_data = get_insights(
-        token, account_id, level="account",
-        fields="spend,impressions,clicks,actions,action_values,cpc,cpm,ctr,frequency",
-        date_preset=None, time_range=time_range
-    )
+    def insights(level, fields, breakdowns=None):
+        return pool.submit(fetch, token, account_id, level=level, fields=fields,
+                           breakdowns=breakdowns, date_preset=None, time_range=time_range)
 
-    # Campaign level
-    campaign_data = get_insights(
-        token, account_id, level="campaign",
-        fields="campaign_id,campaign_name,spend,impressions,clicks,actions,action_values,cpc,cpm,ctr",
-        date_preset=None, time_range=time_range
-    )
+    with ThreadPoolExecutor(max_workers=API_MAX_WORKERS) as pool:
+        # Account level
+        account_future = insights("account", "spend,impressions,clicks,actions,action_values,cpc,cpm,ctr,frequency")
 
-    # Filter campaigns if specified
-    if campaign_ids and campaign_data:
-        campaign_data = [c for c in campaign_data if c.get('campaign_id') in campaign_ids]
+        # Campaign level
+        campaign_future = insights("campaign", "campaign_id,campaign_name,spend,impressions,clicks,actions,action_values,cpc,cpm,ctr")
 
-    # Breakdowns
-    breakdowns = {}
-    for bd_name, bd_field in [("age_gender", "age,gender"), ("device", "device_platform"),
-                               ("placement", "publisher_platform,platform_position"),
-                               ("hourly", "hourly_stats_aggregated_by_advertiser_time_zone")]:
-        try:
-            bd_data = get_insights(
-                token, account_id, level="account",
-                fields="spend,impressions,clicks,actions,action_values",
-                breakdowns=bd_field, date_preset=None, time_range=time_range
-            )
-            breakdowns[bd_name] = bd_data
-        except Exception as e:
-            print(f"  ⚠️ Breakdown {bd_name} failed: {e}")
-            breakdowns[bd_name] = []
+        # Breakdowns
+        breakdown_futures = [(bd_name, insights("account", "spend,impressions,clicks,actions,action_values", bd_field))
+                             for bd_name, bd_field in BREAKDOWNS]
 
-    # Ad set level (for cannibalization + budget analysis)
-    try:
-        adset_data = get_insights(
-            token, account_id, level="adset",
-            fields="adset_id,adset_name,campaign_name,spend,impressions,clicks,actions,action_values,frequency",
-            date_preset=None, time_range=time_range
-        )
-    except Exception:
-        adset_data = []
+        # Ad set level (for cannibalization + budget analysis)
+        adset_future = insights("adset", "adset_id,adset_name,campaign_name,spend,impressions,clicks,actions,action_values,frequency")
 
-    # Ad level (for creative analysis)
-    try:
-        ad_data = get_insights(
-            token, account_id, level="ad",
-            fields="ad_id,ad_name,adset_name,campaign_name,spend,impressions,clicks,actions,action_values",
-            date_preset=None, time_range=time_range
-        )
-    except Exception:
-        ad_data = []
+        # Ad level (for creative analysis)
+        ad_future = insights("ad", "ad_id,ad_name,adset_name,campaign_name,spend,impressions,clicks,actions,action_values")
 
-    return account_data, campaign_data, breakdowns, adset_data, ad_data
+        account_data = account_future.result()
+        campaign_data = campaign_future.result()
 
+        # Filter campaigns if specified
+        if campaign_ids and campaign_data:
+            campaign_data = [c for c in campaign_data if c.get('campaign_id') in campaign_ids]
 
-def pull_ga4_data(sa_path, property_id, source_value, date_start, date_end, campaign_ids=None):
-    """Pull GA4 conversion data."""
-    token = get_access_token(sa_path)
+        breakdowns = {}
+        for bd_name, future in breakdown_futures:
+            try:
+                breakdowns[bd_name] = future.result()
+            except Exception as e:
+                print(f"  ⚠️ Breakdown {bd_name} failed: {e}")
+                breakdowns[bd_name] = []
 
-    # Account total
-    total = run_report(
-        token, property_id,
-        dimensions=["sessionSource"],
-        metrics=["sessions", "ecommercePurchases", "purchaseRevenue"],
-        date_start=date_start, date_end=date_end,
-        dimension_filter=make_source_filter(source_value)
-    )
+        try:
+            adset_data = adset_future.result()
+        except Exception:
+            adset_data = []
 
-    # By campaign (using sessionCampaignId)
-    by_campaign = run_report(
-        token, property_id,
-        dimensions=["sessionCampaignId"],
-        metrics=["sessions", "ecommercePurchases", "purchaseRevenue"],
-        date_start=date_start, date_end=date_end,
-        dimension_filter=make_source_filter(source_value)
-    )
+        try:
+            ad_data = ad_future.result()
+        except Exception:
+            ad_data = []
 
-    # Device breakdown
-    by_device = run_report(
-        token, property_id,
-        dimensions=["deviceCategory"],
-        metrics=["sessions", "ecommercePurchases", "purchaseRevenue"],
-        date_start=date_start, date_end=date_end,
-        dimension_filter=make_source_filter(source_value)
-    )
+    return account_data, campaign_data, breakdowns, adset_data, ad_data
 
-    # Region breakdown
-    by_region = run_report(
-        token, property_id,
-        dimensions=["region"],
-        metrics=["sessions", "ecommercePurchases", "purchaseRevenue"],
-        date_start=date_start, date_end=date_end,
-        dimension_filter=make_source_filter(source_value)
-    )
+
+def pull_ga4_data(sa_path, property_id, source_value, date_start, date_end, campaign_ids=None, use_cache=True):
+    """Pull GA4 conversion data (the four reports run concurrently)."""
+    token = get_access_token(sa_path)
+    fetch = cached_api()(run_report) if use_cache else run_report
+
+    def report(dimension):
+        return pool.submit(
+            fetch, token, property_id,
+            dimensions=[dimension],
+            metrics=["sessions", "ecommercePurchases", "purchaseRevenue"],
+            date_start=date_start, date_end=date_end,
+            dimension_filter=make_source_filter(source_value)
+        )
+
+    with ThreadPoolExecutor(max_workers=API_MAX_WORKERS) as pool:
+        # Account total, by campaign (using sessionCampaignId), device and region breakdowns
+        futures = [report(d) for d in ("sessionSource", "sessionCampaignId", "deviceCategory", "region")]
+        total, by_campaign, by_device, by_region = [f.result() for f in futures]
 
     return (parse_report(total), parse_report(by_campaign),
             parse_report(by_device), parse_report(by_region))
@@ -289,21 +384,22 @@ def pull_ga4_data(sa_path, property_id, source_value, date_start, date_end, camp
 
 # ── Main ─────────────────────────────────────────────────────────────────────
 
-def section_tracking_health(campaign_triples, meta_campaigns, ga4_campaigns):
+def section_tracking_health(out, campaign_triples, meta_campaigns, ga4_campaigns):
     """Section 2: Tracking health per campaign."""
-    lines = ["## 2. TRACKING HEALTH CHECK\n"]
+    out.append("## 2. TRACKING HEALTH CHECK\n")
+    # Index click/session rows by campaign ID once instead of scanning per campaign
+    meta_by_id = {m.get('campaign_id'): m for m in (meta_campaigns or [])}
+    ga4_by_id = {g.get('sessionCampaignId'): g for g in (ga4_campaigns or [])}
     for c in sorted(campaign_triples, key=lambda x: x['spend'], reverse=True):
         if c['spend'] < 50:
             continue
         name = c.get('name', c.get('id', '?'))[:60]
-        meta_p = c['meta']['purchases']
-        ga4_p = c['ga4']['purchases']
-        disc = round((meta_p / ga4_p - 1) * 100) if ga4_p > 0 else 'N/A'
+        disc = c['over_report_pct'] if c['ga4']['purchases'] else 'N/A'
 
         # Find click/session data from meta
-        meta_row = next((m for m in (meta_campaigns or []) if m.get('campaign_id') == c.get('id')), {})
+        meta_row = meta_by_id.get(c.get('id'), {})
         clicks = int(float(meta_row.get('clicks', 0)))
-        ga4_row = next((g for g in (ga4_campaigns or []) if g.get('sessionCampaignId') == c.get('id')), {})
+        ga4_row = ga4_by_id.get(c.get('id'), {})
         sessions = int(ga4_row.get('sessions', 0))
         cts_rate = round(sessions / clicks * 100) if clicks > 0 else 0
 
@@ -314,146 +410,263 @@ def section_tracking_health(campaign_triples, meta_campaigns, ga4_campaigns):
         else:
             cts_status = "BROKEN"
 
-        if isinstance(disc, int):
-            if disc <= 30:
-                disc_status = "NORMAL"
-            elif disc <= 100:
-                disc_status = "ELEVATED"
-            else:
-                disc_status = "INVESTIGATE"
-        else:
-            disc_status = "INVESTIGATE — no GA4 conversions"
-
-        lines.append(f"```")
-        lines.append(f"{name}")
-        lines.append(f"  Click-to-session rate: {cts_rate}% — {cts_status}")
-        lines.append(f"  Meta-GA4 discrepancy: {disc}% — {disc_status}")
-        lines.append(f"  UTM integrity: INTACT (ID-matched)")
-        lines.append(f"```\n")
-    return "\n".join(lines)
+        out.append(f"```")
+        out.append(f"{name}")
+        out.append(f"  Click-to-session rate: {cts_rate}% — {cts_status}")
+        out.append(f"  Meta-GA4 discrepancy: {disc}% — {c['disc_status']}")
+        out.append(f"  UTM integrity: INTACT (ID-matched)")
+        out.append(f"```\n")
+
+
+# Ad set name tag -> country, checked in order (so a CA tag wins over an AU one)
+COUNTRY_TAGS = (("[ca]", "CA"), ("canada", "CA"), ("[au]", "AU"), ("australia", "AU"))
 
 
-def section_cannibalization(adsets):
+# With pyahocorasick, one automaton pass finds every tag regardless of how many
+# there are; each match carries its COUNTRY_TAGS index so the order still wins
+def _build_country_automaton():
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for i, (tag, country) in enumerate(COUNTRY_TAGS):
+        automaton.add_word(tag, (i, country))
+    automaton.make_automaton()
+    return automaton
+
+
+_country_automaton = _build_country_automaton()
+
+
+def country_of(name):
+    """Country an ad set targets, from the tags in its name (default US)."""
+    name = name.casefold()
+    if _country_automaton is not None:
+        return min((match for _, match in _country_automaton.iter(name)), default=(0, "US"))[1]
+    for tag, country in COUNTRY_TAGS:
+        if tag in name:
+            return country
+    return "US"
+
+
+def section_cannibalization(out, adsets):
     """Section 4: Cannibalization detection."""
-    lines = ["## 4. CANNIBALIZATION REPORT\n"]
+    out.append("## 4. CANNIBALIZATION REPORT\n")
     if not adsets:
-        lines.append("*No ad set data available for cannibalization analysis.*")
-        return "\n".join(lines)
+        out.append("*No ad set data available for cannibalization analysis.*")
+        return
 
     # Group by rough targeting (country-level)
     from collections import defaultdict
     geo_groups = defaultdict(list)
-    for a in adsets:
+    adset_spends = with_spend(adsets)
+    for spend, a in adset_spends:
         name = a.get('adset_name', a.get('name', ''))
-        spend = float(a.get('spend', 0))
         if spend < 10:
             continue
         # Detect country from name heuristics
-        country = "US"
-        name_lower = name.lower()
-        if "[ca]" in name_lower or "canada" in name_lower:
-            country = "CA"
-        elif "[au]" in name_lower or "australia" in name_lower:
-            country = "AU"
+        country = country_of(name)
         geo_groups[country].append({"name": name, "spend": spend, "id": a.get('adset_id', '')})
 
     overlap_count = 0
     for country, group in geo_groups.items():
         if len(group) > 1:
-            lines.append(f"### {country} — {len(group)} competing ad sets\n")
+            out.append(f"### {country} — {len(group)} competing ad sets\n")
             for a in sorted(group, key=lambda x: x['spend'], reverse=True):
-                lines.append(f"- **{a['name'][:50]}** — {fmt_money(a['spend'])}")
+                out.append(f"- **{a['name'][:50]}** — {fmt_money(a['spend'])}")
             overlap_count += len(group) - 1
-            lines.append("")
+            out.append("")
 
     if overlap_count == 0:
-        lines.append("✅ No significant cannibalization detected.")
+        out.append("✅ No significant cannibalization detected.")
     else:
-        est_waste = sum(float(a.get('spend', 0)) for a in adsets if float(a.get('spend', 0)) > 10) * 0.15
-        lines.append(f"\n**Estimated CPM inflation from overlap: 15-25%**")
-        lines.append(f"**Estimated waste: ~{fmt_money(est_waste)}/period**")
-
-    return "\n".join(lines)
+        est_waste = sum(spend for spend, _ in adset_spends if spend > 10) * 0.15
+        out.append(f"\n**Estimated CPM inflation from overlap: 15-25%**")
+        out.append(f"**Estimated waste: ~{fmt_money(est_waste)}/period**")
 
 
-def section_age_gender(breakdown_data):
+def section_age_gender(out, breakdown_data):
     """Section 5a: Age × Gender breakdown."""
-    lines = ["### Age × Gender\n", TRIPLE_HEADER]
-    for row in sorted(breakdown_data, key=lambda x: float(x.get('spend', 0)), reverse=True):
-        spend = float(row.get('spend', 0))
+    out.extend(["### Age × Gender\n", TRIPLE_HEADER])
+    for spend, row in sorted(with_spend(breakdown_data), key=itemgetter(0), reverse=True):
         if spend < 10:
             continue
         age = row.get('age', '?')
         gender = row.get('gender', '?')
         label = f"{age} {gender}"
-        meta_p = get_action(row, 'purchase') or get_action(row, 'offsite_conversion.fb_pixel_purchase') or 0
-        meta_rev = get_action_value(row, 'purchase') or get_action_value(row, 'offsite_conversion.fb_pixel_purchase') or 0
+        meta_p, meta_rev = extract_purchase(row)
         # GA4 doesn't support age/gender with source filter — use Meta only
         t = calc_triple(spend, int(meta_p), float(meta_rev), 0, 0)
         t['ga4'] = {'purchases': '—', 'cpa': '—', 'roas': '—'}
         t['ar'] = {'purchases': '—', 'cpa': '—', 'roas': '—'}
-        lines.append(
+        out.append(
             f"| {label} | {fmt_money(spend)} | "
             f"{t['meta']['purchases']} | {fmt_money(t['meta']['cpa'])} | {fmt_roas(t['meta']['roas'])} | "
             f"— | — | — | — | — | — |"
         )
-    lines.append("\n*Note: GA4 age/gender incompatible with session source filter. Meta-only for demographics.*")
-    return "\n".join(lines)
+    out.append("\n*Note: GA4 age/gender incompatible with session source filter. Meta-only for demographics.*")
+
+
+# Meta device_platform (case-folded) -> GA4 deviceCategory
+DEVICE_NAME_MAP = {"desktop": "desktop", "mobile_app": "mobile", "mobile_web": "mobile",
+                   "iphone": "mobile", "ipad": "tablet", "android_smartphone": "mobile",
+                   "android_tablet": "tablet", "tablet": "tablet"}
 
 
-def section_device(meta_breakdown, ga4_device, total_spend):
+def section_device(out, meta_breakdown, ga4_device, total_spend):
     """Section 5b: Device breakdown with triple-source."""
-    lines = ["### Device Platform\n", TRIPLE_HEADER]
-    ga4_map = {r.get('deviceCategory', '').lower(): r for r in (ga4_device or [])}
-    device_name_map = {"desktop": "desktop", "mobile_app": "mobile", "mobile_web": "mobile",
-                       "iphone": "mobile", "ipad": "tablet", "android_smartphone": "mobile",
-                       "android_tablet": "tablet", "tablet": "tablet"}
+    out.extend(["### Device Platform\n", TRIPLE_HEADER])
+    ga4_map = {r.get('deviceCategory', '').casefold(): r for r in (ga4_device or [])}
 
-    for row in sorted(meta_breakdown, key=lambda x: float(x.get('spend', 0)), reverse=True):
-        spend = float(row.get('spend', 0))
+    for spend, row in sorted(with_spend(meta_breakdown), key=itemgetter(0), reverse=True):
         if spend < 10:
             continue
         device = row.get('device_platform', row.get('impression_device', '?'))
-        meta_p = get_action(row, 'purchase') or get_action(row, 'offsite_conversion.fb_pixel_purchase') or 0
-        meta_rev = get_action_value(row, 'purchase') or get_action_value(row, 'offsite_conversion.fb_pixel_purchase') or 0
+        meta_p, meta_rev = extract_purchase(row)
 
-        ga4_key = device_name_map.get(device.lower(), device.lower())
+        device_key = device.casefold()
+        ga4_key = DEVICE_NAME_MAP.get(device_key, device_key)
         ga4_row = ga4_map.get(ga4_key, {})
         ga4_p = int(ga4_row.get('ecommercePurchases', 0))
         ga4_rev = float(ga4_row.get('purchaseRevenue', 0))
 
         t = calc_triple(spend, int(meta_p), float(meta_rev), ga4_p, ga4_rev)
-        lines.append(triple_row(device, t))
-    return "\n".join(lines)
+        out.append(triple_row(device, t))
 
 
-def section_placement(meta_breakdown):
+def section_placement(out, meta_breakdown):
     """Section 5c: Placement breakdown (Meta only — GA4 doesn't have placement)."""
-    lines = ["### Placement\n",
-             "| Placement | Spend | Meta P | Meta CPA | Meta ROAS | Spend % |",
-             "|-----------|-------|--------|----------|-----------|---------|"]
-    total_spend = sum(float(r.get('spend', 0)) for r in meta_breakdown)
-    for row in sorted(meta_breakdown, key=lambda x: float(x.get('spend', 0)), reverse=True):
-        spend = float(row.get('spend', 0))
+    out.extend(["### Placement\n",
+                "| Placement | Spend | Meta P | Meta CPA | Meta ROAS | Spend % |",
+                "|-----------|-------|--------|----------|-----------|---------|"])
+    rows = with_spend(meta_breakdown)
+    total_spend = sum(spend for spend, _ in rows)
+    rows.sort(key=itemgetter(0), reverse=True)
+    for spend, row in rows:
         if spend < 5:
             continue
         platform = row.get('publisher_platform', '?')
         position = row.get('platform_position', '?')
         label = f"{platform}/{position}"
-        meta_p = get_action(row, 'purchase') or get_action(row, 'offsite_conversion.fb_pixel_purchase') or 0
-        meta_rev = get_action_value(row, 'purchase') or get_action_value(row, 'offsite_conversion.fb_pixel_purchase') or 0
+        meta_p, meta_rev = extract_purchase(row)
         cpa = spend / meta_p if meta_p else 0
         roas = meta_rev / spend if spend else 0
         pct = spend / total_spend * 100 if total_spend else 0
-        lines.append(f"| {label[:30]} | {fmt_money(spend)} | {int(meta_p)} | {fmt_money(cpa)} | {fmt_roas(roas)} | {pct:.1f}% |")
-    lines.append("\n*Note: GA4 doesn't track placement. Meta-only data.*")
-    return "\n".join(lines)
+        out.append(f"| {label[:30]} | {fmt_money(spend)} | {int(meta_p)} | {fmt_money(cpa)} | {fmt_roas(roas)} | {pct:.1f}% |")
+    out.append("\n*Note: GA4 doesn't track placement. Meta-only data.*")
+
+
+# Known hourly breakdown values ("0", "23", "23:00:00 - 23:59:59") -> hour
+HOUR_LOOKUP = {str(h): h for h in range(24)}
+HOUR_LOOKUP.update({f"{h:02d}:00:00 - {h:02d}:59:59": h for h in range(24)})
+
+
+def parse_hour(hour_raw):
+    """Hour of day from an hourly breakdown value, or None if unparseable."""
+    raw = str(hour_raw)
+    hour = HOUR_LOOKUP.get(raw)
+    if hour is None:
+        try:
+            hour = int(raw.split(':')[0].split(' ')[0])
+        except (ValueError, IndexError):
+            pass
+    return hour
+
+
+# Dayparting verdict code -> (verdict, reason template)
+HOUR_OK, HOUR_PEAK, HOUR_REDUCE, HOUR_STOP_ZERO, HOUR_STOP_CPA, HOUR_WEAK = range(6)
+HOUR_VERDICTS = (
+    ('✅ OK', 'Within normal range'),
+    ('🟢 PEAK', 'ROAS {roas} — above average'),
+    ('🟡 REDUCE', 'CPA {cpa} is 1.5x above average'),
+    ('🔴 STOP', 'Zero conversions with significant spend'),
+    ('🔴 STOP', 'CPA {cpa} is 2x+ above average ({avg_cpa})'),
+    ('🟡 WEAK', 'ROAS {roas} below average'),
+)
 
 
-def section_dayparting(meta_breakdown, days):
+def hour_verdict(spend, purchases, cpa, roas, total_spend, avg_cpa, avg_roas):
+    """Verdict code for one hour; checks run in priority order."""
+    if purchases == 0 and spend > total_spend * 0.02:
+        return HOUR_STOP_ZERO
+    if cpa > avg_cpa * 2 and purchases > 0:
+        return HOUR_STOP_CPA
+    if cpa > avg_cpa * 1.5 and purchases > 0:
+        return HOUR_REDUCE
+    if roas > avg_roas * 1.3:
+        return HOUR_PEAK
+    if roas > avg_roas * 0.8:
+        return HOUR_OK
+    return HOUR_WEAK
+
+
+if numba is not None and np is not None:
+    _hour_verdict_jit = numba.njit(cache=True)(hour_verdict)
+
+    @numba.njit(cache=True)
+    def classify_hours(spend, purchases, cpa, roas, total_spend, avg_cpa, avg_roas):
+        """Verdict code per hour (int8 array): hour_verdict compiled over float64 columns."""
+        codes = np.empty(spend.shape[0], dtype=np.int8)
+        for i in range(spend.shape[0]):
+            codes[i] = _hour_verdict_jit(spend[i], purchases[i], cpa[i], roas[i], total_spend, avg_cpa, avg_roas)
+        return codes
+else:
+    classify_hours = None
+
+
+def hour_stats(hours, total_spend, avg_cpa, avg_roas, days):
+    """Fill cpa/roas/cvr/spend_pct/daily_spend on each hour dict; return the verdict codes.
+
+    With numpy every metric is computed column-wise and the verdicts come
+    from classify_hours (numba) or np.select, which mirrors hour_verdict;
+    without numpy, hour by hour.
+    """
+    if np is None:
+        codes = []
+        for h in hours:
+            h['cpa'] = h['spend'] / h['purchases'] if h['purchases'] else 999999
+            h['roas'] = h['revenue'] / h['spend'] if h['spend'] else 0
+            h['cvr'] = (h['purchases'] / h['clicks'] * 100) if h['clicks'] > 0 else 0
+            h['spend_pct'] = h['spend'] / total_spend * 100 if total_spend else 0
+            h['daily_spend'] = h['spend'] / days if days else 0
+            codes.append(hour_verdict(h['spend'], h['purchases'], h['cpa'], h['roas'],
+                                      total_spend, avg_cpa, avg_roas))
+        return codes
+
+    n = len(hours)
+    spend = np.fromiter((h['spend'] for h in hours), np.float64, n)
+    purchases = np.fromiter((h['purchases'] for h in hours), np.float64, n)
+    revenue = np.fromiter((h['revenue'] for h in hours), np.float64, n)
+    clicks = np.fromiter((h['clicks'] for h in hours), np.float64, n)
+
+    cpa = np.divide(spend, purchases, out=np.full_like(spend, 999999.0), where=purchases != 0)
+    roas = np.divide(revenue, spend, out=np.zeros_like(spend), where=spend != 0)
+    cvr = np.divide(purchases, clicks, out=np.zeros_like(spend), where=clicks > 0) * 100
+    spend_pct = spend / total_spend * 100 if total_spend else np.zeros_like(spend)
+    daily_spend = spend / days if days else np.zeros_like(spend)
+
+    if classify_hours is not None:
+        codes = classify_hours(spend, purchases, cpa, roas, float(total_spend), float(avg_cpa), float(avg_roas))
+    else:
+        converted = purchases > 0
+        codes = np.select(
+            [~converted & (spend > total_spend * 0.02),
+             converted & (cpa > avg_cpa * 2),
+             converted & (cpa > avg_cpa * 1.5),
+             roas > avg_roas * 1.3,
+             roas > avg_roas * 0.8],
+            [HOUR_STOP_ZERO, HOUR_STOP_CPA, HOUR_REDUCE, HOUR_PEAK, HOUR_OK],
+            default=HOUR_WEAK)
+
+    for h, *stats in zip(hours, cpa.tolist(), roas.tolist(), cvr.tolist(), spend_pct.tolist(), daily_spend.tolist()):
+        h['cpa'], h['roas'], h['cvr'], h['spend_pct'], h['daily_spend'] = stats
+    return codes.tolist()
+
+
+def section_dayparting(out, meta_breakdown, days):
     """Section 5d: Dayparting analysis — when to run and when to stop ads."""
     if not meta_breakdown:
-        return "### Dayparting Analysis\n\n*No hourly data available.*"
+        out.append("### Dayparting Analysis\n\n*No hourly data available.*")
+        return
 
     # Parse hourly data
     hours = []
@@ -464,19 +677,12 @@ def section_dayparting(meta_breakdown, days):
         spend = float(row.get('spend', 0))
         if spend < 1:
             continue
-        hour_raw = row.get('hourly_stats_aggregated_by_advertiser_time_zone', '0')
-        # Parse hour — can be "0", "23", or "23:00:00 - 23:59:59"
-        try:
-            hour = int(str(hour_raw).split(':')[0].split(' ')[0])
-        except (ValueError, IndexError):
+        hour = parse_hour(row.get('hourly_stats_aggregated_by_advertiser_time_zone', '0'))
+        if hour is None:
             hour = 0
-        meta_p = get_action(row, 'purchase') or get_action(row, 'offsite_conversion.fb_pixel_purchase') or 0
-        meta_rev = get_action_value(row, 'purchase') or get_action_value(row, 'offsite_conversion.fb_pixel_purchase') or 0
+        meta_p, meta_rev = extract_purchase(row)
         clicks = int(float(row.get('clicks', 0)))
         impressions = int(float(row.get('impressions', 0)))
-        cpa = spend / meta_p if meta_p else 999999
-        roas = meta_rev / spend if spend else 0
-        cvr = (meta_p / clicks * 100) if clicks > 0 else 0
 
         total_spend += spend
         total_purchases += meta_p
@@ -489,9 +695,6 @@ def section_dayparting(meta_breakdown, days):
             'revenue': meta_rev,
             'clicks': clicks,
             'impressions': impressions,
-            'cpa': cpa,
-            'roas': roas,
-            'cvr': cvr,
         })
 
     hours.sort(key=lambda x: x['hour'])
@@ -499,41 +702,21 @@ def section_dayparting(meta_breakdown, days):
     avg_roas = total_revenue / total_spend if total_spend else 0
 
     # Classify each hour
-    for h in hours:
-        spend_pct = h['spend'] / total_spend * 100 if total_spend else 0
-        h['spend_pct'] = spend_pct
-        h['daily_spend'] = h['spend'] / days if days else 0
-
-        if h['purchases'] == 0 and h['spend'] > total_spend * 0.02:
-            h['verdict'] = '🔴 STOP'
-            h['reason'] = 'Zero conversions with significant spend'
-        elif h['cpa'] > avg_cpa * 2 and h['purchases'] > 0:
-            h['verdict'] = '🔴 STOP'
-            h['reason'] = f'CPA {fmt_money(h["cpa"])} is 2x+ above average ({fmt_money(avg_cpa)})'
-        elif h['cpa'] > avg_cpa * 1.5 and h['purchases'] > 0:
-            h['verdict'] = '🟡 REDUCE'
-            h['reason'] = f'CPA {fmt_money(h["cpa"])} is 1.5x above average'
-        elif h['roas'] > avg_roas * 1.3:
-            h['verdict'] = '🟢 PEAK'
-            h['reason'] = f'ROAS {fmt_roas(h["roas"])} — above average'
-        elif h['roas'] > avg_roas * 0.8:
-            h['verdict'] = '✅ OK'
-            h['reason'] = 'Within normal range'
-        else:
-            h['verdict'] = '🟡 WEAK'
-            h['reason'] = f'ROAS {fmt_roas(h["roas"])} below average'
+    for h, code in zip(hours, hour_stats(hours, total_spend, avg_cpa, avg_roas, days)):
+        h['verdict'], reason = HOUR_VERDICTS[code]
+        h['reason'] = reason.format(cpa=fmt_money(h['cpa']), roas=fmt_roas(h['roas']), avg_cpa=fmt_money(avg_cpa))
 
     # Build output
-    lines = [
+    out.extend([
         "### Dayparting Analysis — When to Run & Stop Ads\n",
         f"**Account average:** CPA {fmt_money(avg_cpa)} | ROAS {fmt_roas(avg_roas)} | "
         f"Total spend: {fmt_money(total_spend)} over {days} days\n",
         "| Hour | Spend | $/day | Spend% | P | CPA | ROAS | CVR% | Verdict |",
         "|------|-------|-------|--------|---|-----|------|------|---------|",
-    ]
+    ])
     for h in hours:
         cpa_display = fmt_money(h['cpa']) if h['purchases'] > 0 else '∞'
-        lines.append(
+        out.append(
             f"| {h['hour']:02d}:00 | {fmt_money(h['spend'])} | {fmt_money(h['daily_spend'])} | "
             f"{h['spend_pct']:.1f}% | {h['purchases']} | {cpa_display} | {fmt_roas(h['roas'])} | "
             f"{h['cvr']:.1f}% | {h['verdict']} |"
@@ -548,58 +731,103 @@ def section_dayparting(meta_breakdown, days):
     stop_waste_daily = stop_waste / days if days else 0
     stop_waste_monthly = stop_waste_daily * 30
 
-    lines.append("")
-    lines.append("#### ⏰ Recommended Schedule\n")
+    out.append("")
+    out.append("#### ⏰ Recommended Schedule\n")
 
     if peak_hours:
         peak_range = ', '.join(f"{h['hour']:02d}:00" for h in peak_hours)
-        lines.append(f"🟢 **Peak hours (increase budget):** {peak_range}")
-        lines.append(f"   Combined ROAS: {fmt_roas(sum(h['revenue'] for h in peak_hours) / sum(h['spend'] for h in peak_hours) if sum(h['spend'] for h in peak_hours) else 0)}\n")
+        out.append(f"🟢 **Peak hours (increase budget):** {peak_range}")
+        out.append(f"   Combined ROAS: {fmt_roas(sum(h['revenue'] for h in peak_hours) / sum(h['spend'] for h in peak_hours) if sum(h['spend'] for h in peak_hours) else 0)}\n")
 
     if stop_hours:
         stop_range = ', '.join(f"{h['hour']:02d}:00" for h in stop_hours)
-        lines.append(f"🔴 **Dead hours (STOP ads):** {stop_range}")
+        out.append(f"🔴 **Dead hours (STOP ads):** {stop_range}")
         for h in stop_hours:
-            lines.append(f"   - {h['hour']:02d}:00: {h['reason']} — wasting {fmt_money(h['daily_spend'])}/day")
-        lines.append(f"\n   **Total waste from dead hours: {fmt_money(stop_waste)}/period = {fmt_money(stop_waste_daily)}/day = {fmt_money(stop_waste_monthly)}/month**\n")
+            out.append(f"   - {h['hour']:02d}:00: {h['reason']} — wasting {fmt_money(h['daily_spend'])}/day")
+        out.append(f"\n   **Total waste from dead hours: {fmt_money(stop_waste)}/period = {fmt_money(stop_waste_daily)}/day = {fmt_money(stop_waste_monthly)}/month**\n")
 
     if reduce_hours:
         reduce_range = ', '.join(f"{h['hour']:02d}:00" for h in reduce_hours)
-        lines.append(f"🟡 **Weak hours (monitor/reduce):** {reduce_range}\n")
+        out.append(f"🟡 **Weak hours (monitor/reduce):** {reduce_range}\n")
 
     if not stop_hours:
-        lines.append("✅ No dead hours detected — all hours are converting within acceptable range.\n")
-
-    return "\n".join(lines)
+        out.append("✅ No dead hours detected — all hours are converting within acceptable range.\n")
 
 
-def section_frequency(acct_meta):
+def section_frequency(out, acct_meta):
     """Section 6: Frequency analysis."""
-    lines = ["## 6. FREQUENCY ANALYSIS\n"]
+    out.append("## 6. FREQUENCY ANALYSIS\n")
     if acct_meta and isinstance(acct_meta, list) and acct_meta[0]:
         freq = float(acct_meta[0].get('frequency', 0))
-        lines.append(f"**Account average frequency: {freq:.2f}**\n")
+        out.append(f"**Account average frequency: {freq:.2f}**\n")
         if freq > 3:
-            lines.append(f"⚠️ Frequency {freq:.1f} is HIGH — likely ad fatigue. Consider refreshing creatives.")
+            out.append(f"⚠️ Frequency {freq:.1f} is HIGH — likely ad fatigue. Consider refreshing creatives.")
         elif freq > 2:
-            lines.append(f"🟡 Frequency {freq:.1f} is moderate — monitor for fatigue.")
+            out.append(f"🟡 Frequency {freq:.1f} is moderate — monitor for fatigue.")
         else:
-            lines.append(f"✅ Frequency {freq:.1f} is healthy.")
+            out.append(f"✅ Frequency {freq:.1f} is healthy.")
     else:
-        lines.append("*No frequency data available.*")
-    return "\n".join(lines)
+        out.append("*No frequency data available.*")
+
+
+class TokenBucket:
+    """Thread-safe rate limiter: acquire() blocks until a call may go out."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1  # reserve a token; a negative balance is time owed
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Creative pulls run in parallel; Graph API calls are paced to stay well
+# inside Meta's per-account call budget
+CREATIVE_WORKERS = 8
+graph_limiter = TokenBucket(rate=10, burst=10)
+
+# Image downloads share pooled keep-alive connections (one TLS handshake per host)
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    SESSION = requests.Session()
+    SESSION.headers["User-Agent"] = "Mozilla/5.0"
+    SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                          max_retries=Retry(total=3, backoff_factor=0.3)))
+except ImportError:
+    SESSION = None
+
+
+def fetch_to_file(url, filepath):
+    """GET url into filepath, streaming; raises on network or HTTP errors."""
+    if SESSION is None:
+        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        resp = urllib.request.urlopen(req, timeout=30)
+        with open(filepath, 'wb') as f:
+            shutil.copyfileobj(resp, f)
+        return
+    with SESSION.get(url, timeout=30, stream=True) as resp:
+        resp.raise_for_status()
+        with open(filepath, 'wb') as f:
+            for chunk in resp.iter_content(chunk_size=65536):
+                f.write(chunk)
 
 
 def download_image(url, filepath, token=None):
     """Download image from URL or Meta Graph API."""
     try:
-        if token and 'fbcdn' not in url and 'graph.facebook.com' not in url:
-            # For Meta image hashes, use Graph API
-            pass
-        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-        resp = urllib.request.urlopen(req, timeout=30)
-        with open(filepath, 'wb') as f:
-            f.write(resp.read())
+        fetch_to_file(url, filepath)
         return True
     except Exception as e:
         # Try with token appended
@@ -610,10 +838,7 @@ def download_image(url, filepath, token=None):
                 url2 = f"{url}?access_token={token}"
             else:
                 return False
-            req = urllib.request.Request(url2, headers={"User-Agent": "Mozilla/5.0"})
-            resp = urllib.request.urlopen(req, timeout=30)
-            with open(filepath, 'wb') as f:
-                f.write(resp.read())
+            fetch_to_file(url2, filepath)
             return True
         except Exception:
             print(f"  ⚠️ Failed to download: {filepath.name} — {e}")
@@ -634,8 +859,8 @@ def is_real_image(url):
     return True
 
 
-def get_full_image_url(token, ad_id, creative):
-    """Try multiple methods to get the full-size ad image."""
+def direct_image_url(creative):
+    """Full-size image URL carried on the creative itself, or ('', 'none')."""
     # Method 1: creative.image_url (works for static image ads)
     img = creative.get('image_url', '')
     if is_real_image(img):
@@ -654,28 +879,63 @@ def get_full_image_url(token, ad_id, creative):
     if is_real_image(img):
         return img, 'video_thumb'
 
-    # Method 4: Try adimages endpoint if we have image_hash
-    img_hash = link_data.get('image_hash', '') or creative.get('image_hash', '')
-    if img_hash:
-        try:
-            # Need account_id — extract from ad endpoint
+    return '', 'none'
+
+
+def creative_image_hash(creative):
+    link_data = creative.get('object_story_spec', {}).get('link_data', {})
+    return link_data.get('image_hash', '') or creative.get('image_hash', '')
+
+
+_account_id = None  # ad account of the ads being reported on, looked up once
+
+
+def lookup_image_hashes(token, ad_id, hashes):
+    """Resolve image hashes to full-size URLs with one adimages request.
+
+    ad_id is any ad in the account; it is only used to look up the account ID
+    the first time. Returns {} if either call fails.
+    """
+    global _account_id
+    if not hashes:
+        return {}
+    try:
+        if not _account_id:
             url = f"https://graph.facebook.com/v21.0/{ad_id}?fields=account_id&access_token={token}"
-            resp = api_get(url)
-            acct_id = resp.get('account_id', '')
-            if acct_id:
-                url2 = f"https://graph.facebook.com/v21.0/act_{acct_id}/adimages?hashes=[%22{img_hash}%22]&fields=url_128,url&access_token={token}"
-                resp2 = api_get(url2)
-                images = resp2.get('data', [])
-                if images:
-                    img = images[0].get('url', '') or images[0].get('url_128', '')
-                    if is_real_image(img):
-                        return img, 'adimages'
-        except Exception:
-            pass
+            graph_limiter.acquire()
+            _account_id = api_get(url).get('account_id', '')
+        if not _account_id:
+            return {}
+        hash_list = ",".join(f"%22{h}%22" for h in hashes)
+        url = (f"https://graph.facebook.com/v21.0/act_{_account_id}/adimages?hashes=[{hash_list}]"
+               f"&fields=hash,url_128,url&limit={len(hashes)}&access_token={token}")
+        graph_limiter.acquire()
+        images = api_get(url).get('data', [])
+    except Exception:
+        return {}
+    return {im.get('hash'): im.get('url', '') or im.get('url_128', '') for im in images}
+
+
+def get_full_image_url(token, ad_id, creative, hash_urls=None):
+    """Try multiple methods to get the full-size ad image.
+
+    hash_urls holds adimages results fetched in bulk by lookup_image_hashes.
+    """
+    img, source = direct_image_url(creative)
+    if img:
+        return img, source
+
+    # Method 4: adimages URL for the creative's image_hash
+    img_hash = creative_image_hash(creative)
+    if img_hash:
+        img = (hash_urls or {}).get(img_hash, '')
+        if is_real_image(img):
+            return img, 'adimages'
 
     # Method 5: Ad preview (renders a screenshot of the ad)
     try:
         url = f"https://graph.facebook.com/v21.0/{ad_id}/previews?ad_format=DESKTOP_FEED_STANDARD&access_token={token}"
+        graph_limiter.acquire()
         resp = api_get(url)
         preview_data = resp.get('data', [{}])[0]
         # Preview returns an iframe HTML — extract the src
@@ -702,8 +962,7 @@ def pull_top_ad_creatives(token, ad_data, output_dir, top_n=20):
         spend = float(ad.get('spend', 0))
         if spend < 50:
             continue
-        meta_p = get_action(ad, 'purchase') or get_action(ad, 'offsite_conversion.fb_pixel_purchase') or 0
-        meta_rev = get_action_value(ad, 'purchase') or get_action_value(ad, 'offsite_conversion.fb_pixel_purchase') or 0
+        meta_p, meta_rev = extract_purchase(ad)
         roas = meta_rev / spend if spend else 0
         cpa = spend / meta_p if meta_p else 0
         ranked.append({
@@ -720,19 +979,28 @@ def pull_top_ad_creatives(token, ad_data, output_dir, top_n=20):
             'clicks': int(float(ad.get('clicks', 0))),
         })
 
-    ranked.sort(key=lambda x: (x['meta_roas'], x['spend']), reverse=True)
-    top_ads = ranked[:top_n]
+    # Same order as a stable descending sort, without sorting every ad
+    top_ads = heapq.nlargest(top_n, ranked, key=lambda x: (x['meta_roas'], x['spend']))
 
     img_dir = output_dir / "top_ad_images"
     img_dir.mkdir(parents=True, exist_ok=True)
 
-    for i, ad in enumerate(top_ads):
-        ad_id = ad['ad_id']
-        print(f"  [{i+1}/{len(top_ads)}] Pulling creative for ad {ad_id}...", end="", flush=True)
-        time.sleep(0.3)
-
+    def mark_failed(ad):
+        ad['body'] = ''
+        ad['title'] = ''
+        ad['description'] = ''
+        ad['cta'] = ''
+        ad['link_url'] = ''
+        ad['image_url'] = ''
+        ad['image_local'] = None
+        ad['image_filename'] = None
+        ad['ad_type'] = 'unknown'
+
+    def fetch_creative(ad):
+        """Fill in one ad's copy and type; returns its creative, or the error."""
+        graph_limiter.acquire()
         try:
-            detail = get_ad_creative_detail(token, ad_id)
+            detail = get_ad_creative_detail(token, ad['ad_id'])
             creative = detail.get('creative', {})
 
             # Extract text copy
@@ -750,9 +1018,19 @@ def pull_top_ad_creatives(token, ad_data, output_dir, top_n=20):
             is_catalog = 'catalog' in ad['ad_name'].lower() or link_data.get('multi_share_optimized')
             is_video = bool(creative.get('video_id') or video_data)
             ad['ad_type'] = 'catalog' if is_catalog else ('video' if is_video else 'static')
+            return creative
+        except Exception as e:
+            mark_failed(ad)
+            return e
 
+    def fetch_image(i, ad, creative):
+        """Resolve and download one ad's image; returns the progress-line status."""
+        if isinstance(creative, Exception):
+            return f" ❌ error: {creative}"
+        ad_id = ad['ad_id']
+        try:
             # Get image
-            image_url, source = get_full_image_url(token, ad_id, creative)
+            image_url, source = get_full_image_url(token, ad_id, creative, hash_urls)
             ad['image_url'] = image_url
             ad['image_source'] = source
 
@@ -765,87 +1043,95 @@ def pull_top_ad_creatives(token, ad_data, output_dir, top_n=20):
                     if img_path.stat().st_size > 2000:
                         ad['image_local'] = str(img_path)
                         ad['image_filename'] = img_filename
-                        print(f" ✅ {source} ({img_path.stat().st_size // 1024}KB)", flush=True)
+                        return f" ✅ {source} ({img_path.stat().st_size // 1024}KB)"
                     else:
                         img_path.unlink()
                         ad['image_local'] = None
                         ad['image_filename'] = None
                         ad['ad_type_note'] = 'Catalog/dynamic ad — no static image available'
-                        print(f" ⚠️ placeholder ({source})", flush=True)
+                        return f" ⚠️ placeholder ({source})"
                 else:
                     ad['image_local'] = None
                     ad['image_filename'] = None
-                    print(f" ⚠️ download failed", flush=True)
+                    return " ⚠️ download failed"
             elif source == 'preview_iframe':
                 ad['preview_url'] = image_url
                 ad['image_local'] = None
                 ad['image_filename'] = None
                 ad['ad_type_note'] = 'Catalog/dynamic ad — preview available'
-                print(f" 📋 preview iframe", flush=True)
+                return " 📋 preview iframe"
             else:
                 ad['image_local'] = None
                 ad['image_filename'] = None
                 ad['ad_type_note'] = 'Catalog/dynamic ad — image from product feed'
-                print(f" (catalog — no static image)", flush=True)
+                return " (catalog — no static image)"
 
         except Exception as e:
-            print(f" ❌ error: {e}", flush=True)
-            ad['body'] = ''
-            ad['title'] = ''
-            ad['description'] = ''
-            ad['cta'] = ''
-            ad['link_url'] = ''
-            ad['image_url'] = ''
-            ad['image_local'] = None
-            ad['image_filename'] = None
-            ad['ad_type'] = 'unknown'
+            mark_failed(ad)
+            return f" ❌ error: {e}"
+
+    # Creatives are fetched concurrently, then every image hash that needs the
+    # adimages endpoint is resolved in one request before the downloads (and
+    # preview fallbacks) run; progress lines still print in rank order
+    with ThreadPoolExecutor(max_workers=CREATIVE_WORKERS) as pool:
+        creatives = list(pool.map(fetch_creative, top_ads))
+
+        pending = {}
+        for ad, creative in zip(top_ads, creatives):
+            if isinstance(creative, dict) and not direct_image_url(creative)[0]:
+                img_hash = creative_image_hash(creative)
+                if img_hash:
+                    pending.setdefault(img_hash, ad['ad_id'])
+        hash_urls = lookup_image_hashes(token, next(iter(pending.values()), ''), list(pending))
+
+        statuses = pool.map(fetch_image, range(len(top_ads)), top_ads, creatives)
+        for i, (ad, status) in enumerate(zip(top_ads, statuses)):
+            print(f"  [{i+1}/{len(top_ads)}] Pulling creative for ad {ad['ad_id']}...{status}", flush=True)
 
     return top_ads
 
 
-def section_top_ads_md(top_ads):
+def section_top_ads_md(out, top_ads):
     """Section 9: Top 20 ads — markdown version."""
-    lines = [
+    out.extend([
         "## 9. TOP 20 CONVERTING ADS\n",
         "*Ranked by Meta ROAS. Images + ad copy included. Use these as inputs for meta-ad-creator.*\n",
-    ]
+    ])
 
     for i, ad in enumerate(top_ads, 1):
-        lines.append(f"### #{i} — {ad['ad_name'][:60]}")
-        lines.append(f"**Campaign:** {ad.get('campaign_name', '—')}")
-        lines.append(f"**Ad Set:** {ad.get('adset_name', '—')}")
-        lines.append(f"**Ad ID:** `{ad['ad_id']}`\n")
-
-        lines.append(f"| Metric | Value |")
-        lines.append(f"|--------|-------|")
-        lines.append(f"| Spend | {fmt_money(ad['spend'])} |")
-        lines.append(f"| Meta Purchases | {ad['meta_purchases']} |")
-        lines.append(f"| Meta CPA | {fmt_money(ad['meta_cpa'])} |")
-        lines.append(f"| Meta ROAS | {fmt_roas(ad['meta_roas'])} |")
-        lines.append(f"| Impressions | {ad['impressions']:,} |")
-        lines.append(f"| Clicks | {ad['clicks']:,} |")
+        out.append(f"### #{i} — {ad['ad_name'][:60]}")
+        out.append(f"**Campaign:** {ad.get('campaign_name', '—')}")
+        out.append(f"**Ad Set:** {ad.get('adset_name', '—')}")
+        out.append(f"**Ad ID:** `{ad['ad_id']}`\n")
+
+        out.append(f"| Metric | Value |")
+        out.append(f"|--------|-------|")
+        out.append(f"| Spend | {fmt_money(ad['spend'])} |")
+        out.append(f"| Meta Purchases | {ad['meta_purchases']} |")
+        out.append(f"| Meta CPA | {fmt_money(ad['meta_cpa'])} |")
+        out.append(f"| Meta ROAS | {fmt_roas(ad['meta_roas'])} |")
+        out.append(f"| Impressions | {ad['impressions']:,} |")
+        out.append(f"| Clicks | {ad['clicks']:,} |")
 
         if ad.get('title'):
-            lines.append(f"\n**Headline:** {ad['title']}")
+            out.append(f"\n**Headline:** {ad['title']}")
         if ad.get('body'):
             body_preview = ad['body'][:300]
             if len(ad['body']) > 300:
                 body_preview += "..."
-            lines.append(f"**Ad Copy:**\n> {body_preview}")
+            out.append(f"**Ad Copy:**\n> {body_preview}")
         if ad.get('description'):
-            lines.append(f"**Description:** {ad['description'][:200]}")
+            out.append(f"**Description:** {ad['description'][:200]}")
         if ad.get('cta'):
-            lines.append(f"**CTA:** {ad['cta']}")
+            out.append(f"**CTA:** {ad['cta']}")
 
         if ad.get('image_filename'):
-            lines.append(f"\n**Image:** `{ad['image_filename']}`")
-            lines.append(f"**Creator link:** Use as input → `python3 edit_ad.py -i {ad.get('image_local', ad['image_filename'])} --variations 6 --swap-dogs`")
+            out.append(f"\n**Image:** `{ad['image_filename']}`")
+            out.append(f"**Creator link:** Use as input → `python3 edit_ad.py -i {ad.get('image_local', ad['image_filename'])} --variations 6 --swap-dogs`")
         else:
-            lines.append(f"\n*No image available for this ad.*")
-
-        lines.append(f"\n---\n")
+            out.append(f"\n*No image available for this ad.*")
 
-    return "\n".join(lines)
+        out.append(f"\n---\n")
 
 
 def section_top_ads_html(top_ads):
@@ -926,28 +1212,25 @@ def calc_dead_hours_waste(hourly_breakdown, days):
     """Calculate waste from dead hours."""
     if not hourly_breakdown:
         return 0, []
-    total_spend = sum(float(r.get('spend', 0)) for r in hourly_breakdown)
+    rows = with_spend(hourly_breakdown)
+    total_spend = sum(spend for spend, _ in rows)
     total_purchases = sum(
-        (get_action(r, 'purchase') or get_action(r, 'offsite_conversion.fb_pixel_purchase') or 0)
+        extract_purchase(r)[0]
         for r in hourly_breakdown
     )
     avg_cpa = total_spend / total_purchases if total_purchases else 0
 
     dead_hours = []
     waste = 0
-    for row in hourly_breakdown:
-        spend = float(row.get('spend', 0))
-        meta_p = get_action(row, 'purchase') or get_action(row, 'offsite_conversion.fb_pixel_purchase') or 0
-        hour_raw = row.get('hourly_stats_aggregated_by_advertiser_time_zone', '0')
+    for spend, row in rows:
+        meta_p = extract_purchase(row)[0]
         cpa = spend / meta_p if meta_p else 999999
 
         if (meta_p == 0 and spend > total_spend * 0.02) or (meta_p > 0 and cpa > avg_cpa * 2):
             waste += spend
-            # Hour can be "0", "23", or "23:00:00 - 23:59:59"
-            try:
-                dead_hours.append(int(str(hour_raw).split(':')[0].split(' ')[0]))
-            except (ValueError, IndexError):
-                pass
+            hour = parse_hour(row.get('hourly_stats_aggregated_by_advertiser_time_zone', '0'))
+            if hour is not None:
+                dead_hours.append(hour)
 
     return waste, dead_hours
 
@@ -981,7 +1264,8 @@ def build_waste_and_actions(totals, campaign_triples, breakdowns, adset_data=Non
             "details": "Set ad scheduling in Meta to exclude dead hours"
         })
         # Build the active hours schedule (all hours EXCEPT dead hours)
-        active_hours = [h for h in range(24) if h not in dead_hours_list]
+        dead_hour_set = set(dead_hours_list)
+        active_hours = [h for h in range(24) if h not in dead_hour_set]
         manager_actions.append({
             "type": "dayparting",
             "priority": "high",
@@ -1117,12 +1401,7 @@ def build_waste_and_actions(totals, campaign_triples, breakdowns, adset_data=Non
             spend = float(a.get('spend', 0))
             if spend < 50:
                 continue
-            country = "US"
-            name_lower = name.lower()
-            if "[ca]" in name_lower or "canada" in name_lower:
-                country = "CA"
-            elif "[au]" in name_lower or "australia" in name_lower:
-                country = "AU"
+            country = country_of(name)
             geo_groups[country].append({
                 "id": a.get('adset_id', ''),
                 "name": name,
@@ -1335,6 +1614,13 @@ p { margin: 3px 0; font-size: 10px; }
     return html
 
 
+def render(section, *section_args):
+    """Run a section builder into a fresh list of lines."""
+    lines = []
+    section(lines, *section_args)
+    return lines
+
+
 def generate_report(args):
     """Generate the full report."""
     # Calculate date range
@@ -1360,30 +1646,43 @@ def generate_report(args):
     if campaign_ids:
         print(f"Campaigns: {campaign_ids}")
 
-    # Pull data
-    print("\n[1/5] Pulling Meta data (account + campaigns + breakdowns + ad sets + ads)...", flush=True)
+    # Pull data — Meta and GA4, current and previous period, all in flight at once
     token = load_token(args.meta_creds)
-    acct_meta, camp_meta, breakdowns, adset_meta, ad_meta = pull_meta_data(
-        token, account_id, date_start, date_end, campaign_ids)
-
-    print(f"  → {len(camp_meta or [])} campaigns, {len(adset_meta or [])} ad sets, {len(ad_meta or [])} ads", flush=True)
-
-    print("[2/5] Pulling GA4 data (totals + campaigns + device + region)...", flush=True)
-    ga4_total, ga4_by_campaign, ga4_device, ga4_region = pull_ga4_data(
-        args.ga4_creds, args.ga4_property, args.ga4_source, date_start, date_end, campaign_ids
-    )
-    print(f"  → {len(ga4_by_campaign)} campaign rows, {len(ga4_device)} device rows, {len(ga4_region)} region rows", flush=True)
-
-    print("[3/5] Pulling previous period for comparison...", flush=True)
-    prev_acct_meta = None
-    prev_ga4_total = None
-    try:
-        prev_acct_meta, _, _, _, _ = pull_meta_data(token, account_id, prev_date_start, prev_date_end, campaign_ids)
-        prev_ga4_total, _, _, _ = pull_ga4_data(
-            args.ga4_creds, args.ga4_property, args.ga4_source, prev_date_start, prev_date_end, campaign_ids
-        )
-    except Exception as e:
-        print(f"  ⚠️ Previous period failed: {e}")
+    use_cache = not args.no_cache
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        meta_future = pool.submit(pull_meta_data, token, account_id, date_start, date_end, campaign_ids, use_cache)
+        ga4_future = pool.submit(pull_ga4_data, args.ga4_creds, args.ga4_property, args.ga4_source,
+                                 date_start, date_end, campaign_ids, use_cache)
+        prev_meta_future = pool.submit(pull_meta_data, token, account_id, prev_date_start, prev_date_end,
+                                       campaign_ids, use_cache)
+        prev_ga4_future = pool.submit(pull_ga4_data, args.ga4_creds, args.ga4_property, args.ga4_source,
+                                      prev_date_start, prev_date_end, campaign_ids, use_cache)
+
+        print("\n[1/5] Pulling Meta data (account + campaigns + breakdowns + ad sets + ads)...", flush=True)
+        acct_meta, camp_meta, breakdowns, adset_meta, ad_meta = meta_future.result()
+
+        print(f"  → {len(camp_meta or [])} campaigns, {len(adset_meta or [])} ad sets, {len(ad_meta or [])} ads", flush=True)
+
+        # Sections that need only Meta data render now, while the GA4 and
+        # previous-period pulls are still in flight
+        cannibalization_md = render(section_cannibalization, adset_meta)
+        age_gender_md = render(section_age_gender, breakdowns['age_gender']) if breakdowns.get('age_gender') else None
+        placement_md = render(section_placement, breakdowns['placement']) if breakdowns.get('placement') else None
+        dayparting_md = render(section_dayparting, breakdowns['hourly'], args.days) if breakdowns.get('hourly') else None
+        frequency_md = render(section_frequency, acct_meta)
+
+        print("[2/5] Pulling GA4 data (totals + campaigns + device + region)...", flush=True)
+        ga4_total, ga4_by_campaign, ga4_device, ga4_region = ga4_future.result()
+        print(f"  → {len(ga4_by_campaign)} campaign rows, {len(ga4_device)} device rows, {len(ga4_region)} region rows", flush=True)
+
+        print("[3/5] Pulling previous period for comparison...", flush=True)
+        prev_acct_meta = None
+        prev_ga4_total = None
+        try:
+            prev_acct_meta, _, _, _, _ = prev_meta_future.result()
+            prev_ga4_total, _, _, _ = prev_ga4_future.result()
+        except Exception as e:
+            print(f"  ⚠️ Previous period failed: {e}")
 
     # Process account totals
     print("[4/5] Processing data...", flush=True)
@@ -1393,8 +1692,7 @@ def generate_report(args):
             return None
         m = meta_rows[0] if isinstance(meta_rows, list) else meta_rows
         spend = float(m.get('spend', 0))
-        meta_p = get_action(m, 'purchase') or get_action(m, 'offsite_conversion.fb_pixel_purchase') or 0
-        meta_rev = get_action_value(m, 'purchase') or get_action_value(m, 'offsite_conversion.fb_pixel_purchase') or 0
+        meta_p, meta_rev = extract_purchase(m)
 
         ga4_p = sum(int(r.get('ecommercePurchases', 0)) for r in ga4_rows) if ga4_rows else 0
         ga4_rev = sum(float(r.get('purchaseRevenue', 0)) for r in ga4_rows) if ga4_rows else 0
@@ -1416,8 +1714,7 @@ def generate_report(args):
         for c in camp_meta:
             cid = c.get('campaign_id', '')
             spend = float(c.get('spend', 0))
-            meta_p = get_action(c, 'purchase') or get_action(c, 'offsite_conversion.fb_pixel_purchase') or 0
-            meta_rev = get_action_value(c, 'purchase') or get_action_value(c, 'offsite_conversion.fb_pixel_purchase') or 0
+            meta_p, meta_rev = extract_purchase(c)
 
             ga4_row = ga4_campaign_map.get(cid, {})
             ga4_p = int(ga4_row.get('ecommercePurchases', 0))
@@ -1464,47 +1761,57 @@ def generate_report(args):
 {'═' * 66}
 ```\n"""
 
-    sections = [header]
+    # Each section appends its lines to one shared list; a blank entry before
+    # each one reproduces the paragraph break, and the report is joined once.
+    parts = [header]
+
+    def add(section, *section_args):
+        parts.append("")
+        section(parts, *section_args)
+
+    def add_rendered(lines):
+        parts.append("")
+        parts.extend(lines)
 
     # Section 1: Account Snapshot
     if totals:
-        sections.append(section_snapshot(account_name, period_label, args.days, totals, prev_totals))
+        add(section_snapshot, account_name, period_label, args.days, totals, prev_totals)
 
     # Section 2: Tracking Health
-    sections.append(section_tracking_health(campaign_triples, camp_meta, ga4_by_campaign))
+    add(section_tracking_health, campaign_triples, camp_meta, ga4_by_campaign)
 
     # Section 3: Campaign Verdicts
     if campaign_triples:
-        sections.append(section_campaigns(campaign_triples))
+        add(section_campaigns, campaign_triples)
 
     # Section 4: Cannibalization
-    sections.append(section_cannibalization(adset_meta))
+    add_rendered(cannibalization_md)
 
     # Section 5: Audience Segments
-    sections.append("## 5. AUDIENCE SEGMENTATION — WHO TO KEEP, WHO TO CUT\n")
-    if breakdowns.get('age_gender'):
-        sections.append(section_age_gender(breakdowns['age_gender']))
+    parts.extend(["", "## 5. AUDIENCE SEGMENTATION — WHO TO KEEP, WHO TO CUT\n"])
+    if age_gender_md is not None:
+        add_rendered(age_gender_md)
     if breakdowns.get('device'):
-        sections.append(section_device(breakdowns['device'], ga4_device, totals['spend'] if totals else 0))
-    if breakdowns.get('placement'):
-        sections.append(section_placement(breakdowns['placement']))
-    if breakdowns.get('hourly'):
-        sections.append(section_dayparting(breakdowns['hourly'], args.days))
+        add(section_device, breakdowns['device'], ga4_device, totals['spend'] if totals else 0)
+    if placement_md is not None:
+        add_rendered(placement_md)
+    if dayparting_md is not None:
+        add_rendered(dayparting_md)
 
     # Section 6: Frequency
-    sections.append(section_frequency(acct_meta))
+    add_rendered(frequency_md)
 
     # Section 7: Waste
-    sections.append(section_waste(waste_items))
+    add(section_waste, waste_items)
 
     # Section 8: Actions
-    sections.append(section_actions(recommendations))
+    add(section_actions, recommendations)
 
     # Section 9: Top 20 Ads
     if top_ads:
-        sections.append(section_top_ads_md(top_ads))
+        add(section_top_ads_md, top_ads)
 
-    report_md = "\n\n".join(sections)
+    report_md = "\n".join(parts)
 
     # Save markdown
     with open(output_path, 'w') as f:
@@ -1627,6 +1934,8 @@ def main():
     parser.add_argument("--pdf", action="store_true", help="Also generate PDF")
     parser.add_argument("--top-ads", type=int, default=20, help="Number of top ads to include (default 20)")
     parser.add_argument("--mode", choices=["historical", "live"], default="historical", help="Analysis mode")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always query the APIs instead of ~/.cache/meta-ad-analyst")
 
     args = parser.parse_args()
     generate_report(args)
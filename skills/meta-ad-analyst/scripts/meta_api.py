@@ -2,6 +2,13 @@
 """Meta Ads API helper — pull insights with breakdowns, ad sets, creatives."""
 import json, urllib.request, urllib.parse, sys, os, time
 
+# orjson (optional) parses insight pages straight from bytes; json is the fallback
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 def load_token(creds_path):
     with open(creds_path) as f:
         for line in f:
@@ -13,7 +20,7 @@ def api_get(url, retries=2):
     for attempt in range(retries + 1):
         try:
             resp = urllib.request.urlopen(url, timeout=60)
-            return json.loads(resp.read().decode())
+            return _loads(resp.read())
         except Exception as e:
             if attempt < retries:
                 time.sleep(2 ** attempt)
@@ -29,13 +29,30 @@ Or with environment variables:
 """
 
 import argparse
+import asyncio
+import logging
 import os
+import shlex
 import sys
 import subprocess
+import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from typing import Tuple, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Optional: supabase-py pushes status changes over Realtime, with a slow poll as
+# backstop. Push needs agent_deliverables in the supabase_realtime publication:
+#   ALTER PUBLICATION supabase_realtime ADD TABLE agent_deliverables;
+try:
+    from supabase import acreate_client
+except ImportError:
+    acreate_client = None
 
 # Agent name to skill name mapping
 AGENT_SKILL_MAP = {
@@ -58,6 +75,31 @@ AGENT_PRIORITY = {
     "campaign_monitor": 7,
 }
 
+# Dispatches to the same host share one SSH connection (OpenSSH multiplexing)
+SSH_CONTROL_PATH = "~/.ssh/cm-%r@%h:%p"
+SSH_CONTROL_PERSIST = "10m"
+
+# Never prompt, fail fast on unreachable hosts, notice dead connections
+SSH_OPTIONS = [
+    "-o", "BatchMode=yes",
+    "-o", "ConnectTimeout=10",
+    "-o", "ServerAliveInterval=10",
+]
+SSH_TRIGGER_TIMEOUT = 10
+
+# Columns read by status polls (_terminal_result and the poll log)
+DELIVERABLE_STATUS_COLUMNS = "status,summary,delivered_at,blocked_reason,runner_picked_at"
+
+# Routine poll lines are logged at INFO every this many polls (DEBUG otherwise)
+POLL_LOG_EVERY = 10
+
+# While waiting on Realtime, the row is also read over REST this often (seconds),
+# in case UPDATE events never arrive (table not published, websocket dropped)
+REALTIME_BACKSTOP_INTERVAL = 60
+
+# Upper bound on agents monitored at once by dispatch_many
+MAX_CONCURRENT_DISPATCHES = 8
+
 class AgentDispatcher:
     def __init__(self, supabase_url: str, supabase_key: str):
         self.supabase_url = supabase_url.rstrip('/')
@@ -68,13 +110,25 @@ class AgentDispatcher:
             "apikey": supabase_key,
             "Prefer": "return=representation",
         }
+        self._ssh_masters = set()  # hosts with a multiplexing master running
+        self._ssh_master_lock = threading.Lock()
+
+        # One keep-alive connection serves every status poll
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
 
     def get_deliverable_status(self, task_id: str) -> Optional[Dict]:
         """Get current status of a task from agent_deliverables."""
         try:
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/agent_deliverables?id=eq.{task_id}",
-                headers=self.headers,
+            response = self.session.get(
+                f"{self.supabase_url}/rest/v1/agent_deliverables"
+                f"?id=eq.{task_id}&select={DELIVERABLE_STATUS_COLUMNS}",
                 timeout=5
             )
             if response.status_code == 200:
@@ -83,26 +137,76 @@ class AgentDispatcher:
                     return data[0]
             return None
         except Exception as e:
-            print(f"❌ Error querying deliverable status: {str(e)[:100]}")
+            logger.error(f"❌ Error querying deliverable status: {str(e)[:100]}")
             return None
 
-    def update_deliverable_to_in_progress(self, task_id: str) -> bool:
-        """Mark task as IN_PROGRESS before dispatching."""
+    def update_deliverable_to_in_progress(self, task_id: str) -> Optional[Dict]:
+        """
+        Mark task as IN_PROGRESS before dispatching.
+
+        The reset is unconditional, so a re-dispatched task that is still
+        DELIVERED or BLOCKED from an earlier run starts over as IN_PROGRESS.
+
+        Returns the updated row as sent back by PostgREST (return=representation),
+        {} if the update succeeded without a body, or None if no row was updated:
+        the task does not exist, or the request failed.
+        """
         try:
+            now = time.gmtime()
             update_payload = {
                 "status": "IN_PROGRESS",
-                "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "started_at": f"{now.tm_year:04d}-{now.tm_mon:02d}-{now.tm_mday:02d}"
+                              f"T{now.tm_hour:02d}:{now.tm_min:02d}:{now.tm_sec:02d}Z",
             }
-            response = requests.patch(
-                f"{self.supabase_url}/rest/v1/agent_deliverables?id=eq.{task_id}",
-                headers=self.headers,
+            response = self.session.patch(
+                f"{self.supabase_url}/rest/v1/agent_deliverables"
+                f"?id=eq.{task_id}"
+                f"&select={DELIVERABLE_STATUS_COLUMNS}",
                 json=update_payload,
                 timeout=5
             )
-            return response.status_code in [200, 204]
+            if response.status_code == 204:
+                return {}
+            if response.status_code == 200:
+                rows = response.json()
+                if rows:
+                    return rows[0]
+                logger.warning("⚠️  Task not marked IN_PROGRESS: no row matched")
+            return None
         except Exception as e:
-            print(f"⚠️  Could not mark task as IN_PROGRESS: {str(e)[:100]}")
-            return False
+            logger.warning(f"⚠️  Could not mark task as IN_PROGRESS: {str(e)[:100]}")
+            return None
+
+    def _ensure_ssh_master(self, host: str) -> None:
+        """
+        Start a background ControlMaster connection to host if none is alive.
+
+        The master is started detached (-f, output to /dev/null): a master
+        forked from a captured `ssh host cmd` would hold its pipes open and
+        stall subprocess.run until ControlPersist expires.
+        """
+        # Concurrent dispatches to one host must not race to start two masters
+        with self._ssh_master_lock:
+            if host in self._ssh_masters:
+                return
+
+            control = [*SSH_OPTIONS, "-o", f"ControlPath={SSH_CONTROL_PATH}"]
+            try:
+                check = subprocess.run(["ssh", "-O", "check", *control, host],
+                                       capture_output=True, timeout=10)
+                if check.returncode != 0:
+                    master = subprocess.run(
+                        ["ssh", "-M", "-N", "-f", "-o", f"ControlPersist={SSH_CONTROL_PERSIST}", *control, host],
+                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                        timeout=30
+                    )
+                    if master.returncode != 0:
+                        # Not recorded, so the next dispatch to this host tries again
+                        logger.debug(f"  SSH master to {host} did not start (exit {master.returncode})")
+                        return
+                self._ssh_masters.add(host)
+            except (subprocess.TimeoutExpired, OSError):
+                pass  # trigger_agent_ssh falls back to a direct connection
 
     def trigger_agent_ssh(self, agent_name: str, cycle_id: str, task_id: str,
                          brand_id: str, host: str) -> Tuple[bool, str]:
@@ -111,16 +215,28 @@ class AgentDispatcher:
         if not skill_name:
             return False, f"Unknown agent: {agent_name}"
 
-        # Build SSH command
+        # The agent is started detached on the remote side and ssh returns as
+        # soon as it is spawned; completion is tracked through Supabase.
+        remote_cmd = (
+            f"nohup openclaw run {shlex.quote(skill_name)} --cycle {shlex.quote(cycle_id)} "
+            f"--task {shlex.quote(task_id)} --brand {shlex.quote(brand_id)} "
+            f"</dev/null >{shlex.quote(f'/tmp/{task_id}.log')} 2>&1 &"
+        )
+
+        # Build SSH command; it rides the multiplexed master when one is up
+        self._ensure_ssh_master(host)
         cmd = [
             "ssh",
+            *SSH_OPTIONS,
+            "-o", "ControlMaster=no",
+            "-o", f"ControlPath={SSH_CONTROL_PATH}",
             host,
-            f"openclaw run {skill_name} --cycle {cycle_id} --task {task_id} --brand {brand_id}"
+            remote_cmd
         ]
 
         try:
-            print(f"🚀 Triggering {agent_name} on {host}...")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            logger.info(f"🚀 Triggering {agent_name} on {host}...")
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=SSH_TRIGGER_TIMEOUT)
 
             if result.returncode == 0:
                 return True, f"Agent {agent_name} triggered successfully"
@@ -129,65 +245,180 @@ class AgentDispatcher:
                 return False, f"SSH failed: {error[:200]}"
 
         except subprocess.TimeoutExpired:
-            return False, f"SSH to {host} timed out (>30s)"
+            return False, f"SSH to {host} timed out (>{SSH_TRIGGER_TIMEOUT}s)"
         except FileNotFoundError:
             return False, "SSH client not found on this machine"
         except Exception as e:
             return False, f"SSH trigger failed: {str(e)[:100]}"
 
+    @staticmethod
+    def _terminal_result(deliverable: Dict) -> Optional[Tuple[str, str]]:
+        """Return (status, summary) if the deliverable is DELIVERED or BLOCKED, else None."""
+        status = deliverable.get("status")
+        if status == "DELIVERED":
+            summary = deliverable.get("summary") or "[no summary]"
+            delivered_at = deliverable.get("delivered_at", "")
+            return "DELIVERED", f"Completed at {delivered_at}. Summary: {summary[:200]}"
+        if status == "BLOCKED":
+            blocked_reason = deliverable.get("blocked_reason") or "Unknown reason"
+            return "BLOCKED", f"Agent blocked: {blocked_reason}"
+        return None
+
     def poll_for_completion(self, task_id: str, timeout_seconds: int = 3600,
-                          poll_interval: int = 5) -> Tuple[str, str]:
+                          min_interval: float = 1.0, max_interval: float = 900.0,
+                          growth: float = 1.5) -> Tuple[str, str]:
         """
         Poll agent_deliverables for task completion.
+
+        The wait between polls starts at min_interval and grows by `growth`
+        per poll up to max_interval, restarting whenever the status changes,
+        so short tasks are seen quickly and long ones cost few requests.
+        The status is read before every wait, including the first, and the
+        last wait is cut short so the final read lands on the deadline.
+
         Returns: (status, summary)
           - status: 'DELIVERED', 'BLOCKED', 'TIMEOUT', 'IN_PROGRESS'
           - summary: human-readable result
         """
         start_time = time.time()
         poll_count = 0
+        interval = min_interval
+        last_status = None
+
+        def wait() -> bool:
+            """Sleep until the next poll; False once the deadline has passed."""
+            nonlocal interval
+            remaining = timeout_seconds - (time.time() - start_time)
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * growth, max_interval)
+            return True
 
         while True:
             elapsed = time.time() - start_time
             poll_count += 1
 
-            # Check timeout
-            if elapsed > timeout_seconds:
-                return "TIMEOUT", f"Agent did not complete within {timeout_seconds}s ({poll_count} polls)"
-
             # Query status
             deliverable = self.get_deliverable_status(task_id)
 
             if not deliverable:
                 if elapsed > 30:
                     return "TIMEOUT", "Task not found in database (possible SSH failure)"
-                print(f"  [Poll {poll_count}] Task not yet visible in database, waiting...")
-                time.sleep(poll_interval)
+                logger.debug(f"  [Poll {poll_count}] Task not yet visible in database, waiting...")
+                if not wait():
+                    return "TIMEOUT", f"Agent did not complete within {timeout_seconds}s ({poll_count} polls)"
                 continue
 
             status = deliverable.get("status", "UNKNOWN")
-            print(f"  [Poll {poll_count}] Status: {status} (elapsed: {int(elapsed)}s)")
 
-            if status == "DELIVERED":
-                summary = deliverable.get("summary", "[no summary]")
-                delivered_at = deliverable.get("delivered_at", "")
-                return "DELIVERED", f"Completed at {delivered_at}. Summary: {summary[:200]}"
+            result = self._terminal_result(deliverable)
+            if result:
+                logger.info(f"  [Poll {poll_count}] Status: {status} (elapsed: {int(elapsed)}s)")
+                return result
 
-            elif status == "BLOCKED":
-                blocked_reason = deliverable.get("blocked_reason", "Unknown reason")
-                return "BLOCKED", f"Agent blocked: {blocked_reason}"
+            # Status changes and every POLL_LOG_EVERY-th poll are shown;
+            # the polls in between only with --verbose
+            if status != last_status or poll_count % POLL_LOG_EVERY == 0:
+                level = logging.INFO
+            else:
+                level = logging.DEBUG
+            logger.log(level, f"  [Poll {poll_count}] Status: {status} (elapsed: {int(elapsed)}s)")
 
-            elif status == "IN_PROGRESS":
+            if status == "IN_PROGRESS":
                 runner_picked = deliverable.get("runner_picked_at", "")
-                print(f"    → Running since: {runner_picked}")
-                time.sleep(poll_interval)
+                logger.log(level, f"    → Running since: {runner_picked}")
 
             elif status == "PENDING":
-                print(f"    → Task still pending (may not have started yet)")
-                time.sleep(poll_interval)
+                logger.log(level, "    → Task still pending (may not have started yet)")
 
             else:
-                print(f"    → Unknown status: {status}")
-                time.sleep(poll_interval)
+                logger.warning(f"    → Unknown status: {status}")
+
+            # A status change (e.g. PENDING -> IN_PROGRESS) restarts the fast polling
+            if status != last_status:
+                interval = min_interval
+                last_status = status
+
+            if not wait():
+                return "TIMEOUT", f"Agent did not complete within {timeout_seconds}s ({poll_count} polls)"
+
+    async def _wait_realtime(self, task_id: str, timeout_seconds: float) -> Tuple[str, str]:
+        """
+        Wait for the task row to reach a terminal status via Supabase Realtime.
+
+        The row is read once after subscribing, so a task that finished
+        before the subscription was live is still seen. A slow REST poll
+        (every REALTIME_BACKSTOP_INTERVAL seconds) runs alongside the
+        subscription and whichever sees the result first wins: UPDATE events
+        only arrive if agent_deliverables is in the supabase_realtime
+        publication, and a dropped websocket delivers nothing.
+        """
+        client = await acreate_client(self.supabase_url, self.supabase_key)
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def finish(result):
+            if not done.done():
+                done.set_result(result)
+
+        def on_change(payload):
+            record = (payload.get("data") or {}).get("record") or payload.get("new") or {}
+            result = self._terminal_result(record)
+            if result and not loop.is_closed():
+                loop.call_soon_threadsafe(finish, result)
+
+        async def backstop_poll():
+            while not done.done():
+                await asyncio.sleep(REALTIME_BACKSTOP_INTERVAL)
+                deliverable = await loop.run_in_executor(None, self.get_deliverable_status, task_id)
+                result = self._terminal_result(deliverable or {})
+                if result:
+                    logger.debug("  Result picked up by the REST backstop poll")
+                    finish(result)
+
+        channel = client.channel(f"agent-deliverable-{task_id}")
+        channel.on_postgres_changes(
+            "UPDATE", schema="public", table="agent_deliverables",
+            filter=f"id=eq.{task_id}", callback=on_change
+        )
+        await channel.subscribe()
+        poller = None
+        try:
+            deliverable = await loop.run_in_executor(None, self.get_deliverable_status, task_id)
+            result = self._terminal_result(deliverable or {})
+            if result:
+                return result
+            logger.info("  Subscribed to agent_deliverables changes, waiting...")
+            poller = asyncio.ensure_future(backstop_poll())
+            return await asyncio.wait_for(done, timeout_seconds)
+        finally:
+            if poller is not None:
+                poller.cancel()
+            await client.remove_channel(channel)
+
+    def wait_for_completion(self, task_id: str, timeout_seconds: int = 3600) -> Tuple[str, str]:
+        """
+        Wait for task completion, pushed over Supabase Realtime when available
+        (with a slow REST poll as backstop, see _wait_realtime).
+
+        Falls back to poll_for_completion (for the remaining time) when
+        supabase-py is not installed or the subscription fails.
+
+        Returns: (status, summary), as poll_for_completion
+        """
+        if acreate_client is None:
+            return self.poll_for_completion(task_id, timeout_seconds=timeout_seconds)
+
+        start_time = time.time()
+        try:
+            return asyncio.run(self._wait_realtime(task_id, timeout_seconds))
+        except asyncio.TimeoutError:
+            return "TIMEOUT", f"Agent did not complete within {timeout_seconds}s"
+        except Exception as e:
+            logger.warning(f"⚠️  Realtime subscription failed, falling back to polling: {str(e)[:100]}")
+            remaining = max(0, int(timeout_seconds - (time.time() - start_time)))
+            return self.poll_for_completion(task_id, timeout_seconds=remaining)
 
     def dispatch_and_monitor(self, agent_name: str, cycle_id: str, task_id: str,
                             brand_id: str, host: str, timeout_seconds: int = 3600) -> int:
@@ -198,94 +429,147 @@ class AgentDispatcher:
         3. Poll for completion
         4. Report results
         """
-        print("=" * 60)
-        print(f"Agent Dispatch: {agent_name}")
-        print("=" * 60)
-        print(f"Cycle: {cycle_id}")
-        print(f"Task:  {task_id}")
-        print(f"Brand: {brand_id}")
-        print(f"Host:  {host}")
-        print()
-
-        # Step 1: Mark as IN_PROGRESS
-        print("Step 1: Updating task status to IN_PROGRESS...")
-        self.update_deliverable_to_in_progress(task_id)
-        time.sleep(0.5)  # Let DB update settle
-        print()
-
-        # Step 2: Trigger agent
-        print("Step 2: Triggering agent via SSH...")
-        success, message = self.trigger_agent_ssh(agent_name, cycle_id, task_id, brand_id, host)
-        print(f"{'✅' if success else '❌'} {message}")
-        print()
+        logger.info("=" * 60)
+        logger.info(f"Agent Dispatch: {agent_name}")
+        logger.info("=" * 60)
+        logger.info(f"Cycle: {cycle_id}")
+        logger.info(f"Task:  {task_id}")
+        logger.info(f"Brand: {brand_id}")
+        logger.info(f"Host:  {host}")
+
+        # Steps 1 and 2 overlap: the IN_PROGRESS PATCH is sent first and runs
+        # while SSH connects. The agent cannot report back until SSH is up and
+        # it has started, so the reset does not race its result in practice.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            logger.info("Step 1: Updating task status to IN_PROGRESS (in background)...")
+            mark_future = executor.submit(self.update_deliverable_to_in_progress, task_id)
+
+            logger.info("Step 2: Triggering agent via SSH...")
+            success, message = self.trigger_agent_ssh(agent_name, cycle_id, task_id, brand_id, host)
+            logger.log(logging.INFO if success else logging.ERROR, f"{'✅' if success else '❌'} {message}")
+            marked = mark_future.result()
 
         if not success:
-            print("❌ SSH trigger failed. Aborting.")
+            logger.error("❌ SSH trigger failed. Aborting.")
             return 1
 
-        # Step 3: Poll for completion
-        print("Step 3: Polling for completion...")
-        print(f"(timeout: {timeout_seconds}s, polling every 5s)")
-        print()
+        # The PATCH echoes the row it updated. If it matched nothing, read the
+        # row back once: a missing task fails now instead of after 30s of polls.
+        if marked is None and self.get_deliverable_status(task_id) is None:
+            logger.error(f"❌ Task {task_id} not found in agent_deliverables. Aborting.")
+            return 1
+
+        # Step 3: Wait for completion
+        logger.info("Step 3: Waiting for completion...")
+        logger.info(f"(timeout: {timeout_seconds}s, polling interval backs off from 1s to 15m)")
 
-        status, summary = self.poll_for_completion(task_id, timeout_seconds=timeout_seconds)
-        print()
+        status, summary = self.wait_for_completion(task_id, timeout_seconds=timeout_seconds)
 
         # Step 4: Report results
-        print("=" * 60)
-        print("RESULT")
-        print("=" * 60)
-        print(f"Status:  {status}")
-        print(f"Summary: {summary}")
-        print()
+        logger.info("=" * 60)
+        logger.info("RESULT")
+        logger.info("=" * 60)
+        logger.info(f"Status:  {status}")
+        logger.info(f"Summary: {summary}")
 
         if status == "DELIVERED":
-            print("✅ Agent completed successfully.")
+            logger.info("✅ Agent completed successfully.")
             return 0
         elif status == "BLOCKED":
-            print("⚠️  Agent blocked (possibly waiting for dependencies or input).")
+            logger.warning("⚠️  Agent blocked (possibly waiting for dependencies or input).")
             return 2
         elif status == "TIMEOUT":
-            print("❌ Agent did not complete within timeout period.")
+            logger.error("❌ Agent did not complete within timeout period.")
             return 1
         else:
-            print("❌ Unknown result.")
+            logger.error("❌ Unknown result.")
             return 1
 
+    def dispatch_many(self, jobs: List[Dict], max_workers: int = MAX_CONCURRENT_DISPATCHES) -> Dict[str, int]:
+        """
+        Dispatch several agents at once and monitor them side by side.
+
+        Each job is a dict with the dispatch_and_monitor arguments: agent,
+        cycle, task, brand, host and optionally timeout. Wall-clock time is
+        roughly that of the slowest agent rather than the sum of all of them.
+
+        Returns: {task_id: exit code}, as dispatch_and_monitor
+        """
+        def run(job: Dict) -> int:
+            try:
+                return self.dispatch_and_monitor(
+                    job["agent"], job["cycle"], job["task"], job["brand"], job["host"],
+                    timeout_seconds=job.get("timeout", 3600)
+                )
+            except Exception as e:
+                logger.error(f"❌ Dispatch of {job.get('agent')} failed: {str(e)[:100]}")
+                return 1
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+            exit_codes = list(executor.map(run, jobs))
+        return {job["task"]: code for job, code in zip(jobs, exit_codes)}
+
 def main():
     parser = argparse.ArgumentParser(
         description="Dispatch agent to Machine B and monitor completion"
     )
-    parser.add_argument("--agent", required=True,
+    parser.add_argument("--agent",
                        choices=list(AGENT_SKILL_MAP.keys()),
                        help="Agent to dispatch")
-    parser.add_argument("--cycle", required=True, help="Cycle ID (UUID)")
-    parser.add_argument("--task", required=True, help="Task ID (UUID)")
-    parser.add_argument("--brand", required=True, help="Brand ID (UUID)")
-    parser.add_argument("--host", required=True, help="Machine B hostname or IP")
+    parser.add_argument("--cycle", help="Cycle ID (UUID)")
+    parser.add_argument("--task", help="Task ID (UUID)")
+    parser.add_argument("--brand", help="Brand ID (UUID)")
+    parser.add_argument("--host", help="Machine B hostname or IP")
+    parser.add_argument("--jobs", help="JSON file with a list of jobs ({agent, cycle, task, brand, host}) "
+                                       "to dispatch concurrently instead of a single agent")
     parser.add_argument("--supabase-url", help="Supabase URL (or use SUPABASE_URL env var)")
     parser.add_argument("--supabase-key", help="Supabase service role key (or use SUPABASE_SERVICE_KEY env var)")
     parser.add_argument("--timeout", type=int, default=3600, help="Polling timeout in seconds (default: 3600 = 1 hour)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every status poll")
 
     args = parser.parse_args()
 
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(message)s",
+        stream=sys.stdout
+    )
+
+    if not args.jobs:
+        missing = [f"--{name}" for name in ("agent", "cycle", "task", "brand", "host")
+                   if not getattr(args, name)]
+        if missing:
+            parser.error(f"the following arguments are required without --jobs: {', '.join(missing)}")
+
     # Get Supabase credentials from args or env
     supabase_url = args.supabase_url or os.getenv("SUPABASE_URL")
     supabase_key = args.supabase_key or os.getenv("SUPABASE_SERVICE_KEY")
 
     if not supabase_url:
-        print("❌ Missing Supabase URL. Provide via --supabase-url or SUPABASE_URL env var.")
+        logger.error("❌ Missing Supabase URL. Provide via --supabase-url or SUPABASE_URL env var.")
         sys.exit(1)
     if not supabase_key:
-        print("❌ Missing Supabase service key. Provide via --supabase-key or SUPABASE_SERVICE_KEY env var.")
+        logger.error("❌ Missing Supabase service key. Provide via --supabase-key or SUPABASE_SERVICE_KEY env var.")
         sys.exit(1)
 
     # Create dispatcher and run
     dispatcher = AgentDispatcher(supabase_url, supabase_key)
-    exit_code = dispatcher.dispatch_and_monitor(
-        args.agent, args.cycle, args.task, args.brand, args.host,
-        timeout_seconds=args.timeout
-    )
+    try:
+        if args.jobs:
+            with open(args.jobs) as f:
+                jobs = json.load(f)
+            for job in jobs:
+                job.setdefault("timeout", args.timeout)
+            exit_codes = dispatcher.dispatch_many(jobs)
+            # Worst outcome wins: any failure (1) over blocked (2) over success (0)
+            exit_code = 1 if 1 in exit_codes.values() else max(exit_codes.values(), default=0)
+        else:
+            exit_code = dispatcher.dispatch_and_monitor(
+                args.agent, args.cycle, args.task, args.brand, args.host,
+                timeout_seconds=args.timeout
+            )
+    finally:
+        dispatcher.session.close()
     sys.exit(exit_code)
 
 if __name__ == "__main__":